@@ -0,0 +1,89 @@
+import re
+from sqlalchemy import text
+
+# Índice de búsqueda de texto completo (SQLite FTS5) sobre la tabla 'clientes'.
+# Es una tabla de "contenido externo": no duplica los datos, sólo el índice,
+# y los triggers lo mantienen sincronizado con cada INSERT/UPDATE/DELETE.
+# 'remove_diacritics 2' hace que "Martinez" encuentre "Martínez".
+COLUMNAS = ["nombre", "dni", "telefono", "direccion", "lugar_trabajo"]
+
+# Peso de cada columna en el ranking bm25 (mismo orden que COLUMNAS)
+PESOS = [10.0, 8.0, 2.0, 1.0, 1.0]
+
+_cols = ", ".join(COLUMNAS)
+_new = ", ".join(f"new.{c}" for c in COLUMNAS)
+_old = ", ".join(f"old.{c}" for c in COLUMNAS)
+
+DDL_TABLA = f"""
+CREATE VIRTUAL TABLE clientes_fts USING fts5(
+    {_cols},
+    content='clientes', content_rowid='id',
+    tokenize='unicode61 remove_diacritics 2',
+    prefix='2 3'
+)
+"""
+
+DDL_TRIGGERS = [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS clientes_fts_ai AFTER INSERT ON clientes BEGIN
+        INSERT INTO clientes_fts(rowid, {_cols}) VALUES (new.id, {_new});
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS clientes_fts_ad AFTER DELETE ON clientes BEGIN
+        INSERT INTO clientes_fts(clientes_fts, rowid, {_cols}) VALUES ('delete', old.id, {_old});
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS clientes_fts_au AFTER UPDATE ON clientes BEGIN
+        INSERT INTO clientes_fts(clientes_fts, rowid, {_cols}) VALUES ('delete', old.id, {_old});
+        INSERT INTO clientes_fts(rowid, {_cols}) VALUES (new.id, {_new});
+    END
+    """,
+]
+
+# Se pone en False si el SQLite instalado no trae FTS5; la búsqueda vuelve a ILIKE.
+FTS_DISPONIBLE = True
+
+def asegurar_indice_busqueda(engine):
+    """
+    Crea la tabla FTS y sus triggers si no existen. Si la tabla se crea recién
+    (base de datos existente), la llena con los clientes actuales.
+    """
+    global FTS_DISPONIBLE
+    try:
+        with engine.begin() as conn:
+            existe = conn.execute(text(
+                "SELECT 1 FROM sqlite_master WHERE type='table' AND name='clientes_fts'"
+            )).first()
+            if not existe:
+                conn.execute(text(DDL_TABLA))
+            for ddl in DDL_TRIGGERS:
+                conn.execute(text(ddl))
+            if not existe:
+                reconstruir_indice_busqueda(conn)
+        FTS_DISPONIBLE = True
+    except Exception as e:
+        print(f"⚠️ Búsqueda FTS5 no disponible, se usará búsqueda simple: {e}")
+        FTS_DISPONIBLE = False
+    return FTS_DISPONIBLE
+
+def reconstruir_indice_busqueda(conn):
+    """Regenera el índice FTS completo a partir de la tabla 'clientes'."""
+    conn.execute(text("INSERT INTO clientes_fts(clientes_fts) VALUES ('rebuild')"))
+
+def expresion_fts(texto):
+    """
+    Convierte lo que escribe el usuario en una expresión MATCH de FTS5:
+    cada palabra se busca como prefijo y todas deben aparecer ("mart jos" -> "mart"* "jos"*).
+    Devuelve None si no hay palabras buscables.
+    """
+    palabras = re.findall(r"\w+", texto or "")
+    if not palabras:
+        return None
+    return " ".join(f'"{p}"*' for p in palabras)
+
+def consulta_ranking():
+    """SELECT de ids de clientes que coinciden con :expresion, con su puntaje bm25 (menor = mejor)."""
+    pesos = ", ".join(str(p) for p in PESOS)
+    return f"SELECT rowid AS id, bm25(clientes_fts, {pesos}) AS rank FROM clientes_fts WHERE clientes_fts MATCH :expresion"
@@ -0,0 +1,85 @@
+"""
+Caché de archivos generados (PDFs) en disco, con tope de tamaño.
+
+Cada archivo se guarda bajo una clave que ya incluye la huella de su contenido, así que una
+clave vieja nunca devuelve un documento desactualizado. Al pasarse del tope se borran los
+menos usados: la fecha de modificación se renueva en cada lectura y hace de marca LRU.
+"""
+import os
+import threading
+
+class CacheArchivos:
+    def __init__(self, carpeta, tamano_maximo):
+        self.carpeta = carpeta
+        self.tamano_maximo = tamano_maximo
+        self._candado = threading.Lock()
+        self._tamano = None  # Total en disco; se mide al primer uso
+
+    def _ruta(self, clave):
+        return os.path.join(self.carpeta, clave)
+
+    def _archivos(self):
+        if not os.path.isdir(self.carpeta):
+            return []
+        return [e for e in os.scandir(self.carpeta) if e.is_file()]
+
+    def _medir(self):
+        if self._tamano is None:
+            self._tamano = sum(e.stat().st_size for e in self._archivos())
+
+    def leer(self, clave):
+        """Contenido guardado bajo 'clave', o None si no está."""
+        ruta = self._ruta(clave)
+        try:
+            with open(ruta, "rb") as archivo:
+                contenido = archivo.read()
+            os.utime(ruta)  # Recién usado: último en la cola de borrado
+            return contenido
+        except OSError:
+            return None
+
+    def guardar(self, clave, contenido):
+        """Guarda 'contenido' bajo 'clave' y libera espacio si se pasó del tope."""
+        os.makedirs(self.carpeta, exist_ok=True)
+        with self._candado:
+            self._medir()
+            ruta = self._ruta(clave)
+            temporal = f"{ruta}.{threading.get_ident()}.tmp"
+            with open(temporal, "wb") as archivo:
+                archivo.write(contenido)
+            anterior = os.path.getsize(ruta) if os.path.exists(ruta) else 0
+            os.replace(temporal, ruta)
+            self._tamano += len(contenido) - anterior
+            if self._tamano > self.tamano_maximo:
+                self._liberar(conservar=clave)
+
+    def _liberar(self, conservar=None):
+        """Borra los archivos menos usados hasta bajar al 90% del tope."""
+        objetivo = self.tamano_maximo * 0.9
+        for entrada in sorted(self._archivos(), key=lambda e: e.stat().st_mtime):
+            if self._tamano <= objetivo:
+                break
+            if entrada.name == conservar:
+                continue
+            try:
+                tamano = entrada.stat().st_size
+                os.remove(entrada.path)
+                self._tamano -= tamano
+            except OSError:
+                pass  # En uso (Windows) o ya borrado
+
+    def invalidar(self, prefijos):
+        """Borra todos los archivos cuya clave empiece con alguno de 'prefijos' (un solo recorrido de la carpeta)."""
+        prefijos = tuple(prefijos)
+        if not prefijos:
+            return
+        with self._candado:
+            self._medir()
+            for entrada in self._archivos():
+                if entrada.name.startswith(prefijos):
+                    try:
+                        tamano = entrada.stat().st_size
+                        os.remove(entrada.path)
+                        self._tamano -= tamano
+                    except OSError:
+                        pass
@@ -0,0 +1,94 @@
+"""
+Calendario de días hábiles precalculado (Lunes a Viernes, sin feriados).
+
+Guarda, para cada día de un rango fijo, la cantidad acumulada de días hábiles.
+Con eso "días hábiles entre A y B" es una resta y "el N-ésimo día hábil después de A"
+es un acceso a un array: O(1) por consulta, tanto para fechas sueltas como para
+arrays de NumPy completos (toda la cartera de una vez). Las fechas fuera del rango
+(un crédito cargado con un plazo de décadas) no son un error: esas se cuentan con
+np.busday_count / np.busday_offset, con los mismos feriados.
+"""
+import os
+from datetime import date
+from functools import lru_cache
+import numpy as np
+
+# Archivo de feriados junto a la base de datos (una fecha por línea: AAAA-MM-DD,Descripción)
+ARCHIVO_FERIADOS = "feriados.csv"
+
+INICIO_CALENDARIO = date(1990, 1, 1)
+FIN_CALENDARIO = date(2060, 12, 31)
+
+def cargar_feriados(ruta=ARCHIVO_FERIADOS):
+    """Lee el archivo de feriados. Si no existe, no hay feriados (sólo se excluyen fines de semana)."""
+    feriados = []
+    if not os.path.exists(ruta):
+        return feriados
+
+    with open(ruta, encoding="utf-8") as f:
+        for linea in f:
+            linea = linea.strip()
+            if not linea or linea.startswith("#"):
+                continue
+            texto_fecha = linea.split(",")[0].strip()
+            try:
+                feriados.append(date.fromisoformat(texto_fecha))
+            except ValueError:
+                print(f"⚠️ Fecha de feriado inválida en {ruta}: '{texto_fecha}'")
+    return feriados
+
+class CalendarioHabil:
+    def __init__(self, inicio=INICIO_CALENDARIO, fin=FIN_CALENDARIO, feriados=()):
+        self.inicio = np.datetime64(inicio, "D")
+        self.fin = np.datetime64(fin, "D")
+        self.feriados = np.array(sorted(feriados), dtype="datetime64[D]")
+
+        dias = np.arange(self.inicio, self.fin + 1, dtype="datetime64[D]")
+        habil = np.is_busday(dias, holidays=self.feriados)
+        # _acumulado[i] = días hábiles en [inicio, inicio + i)
+        self._acumulado = np.concatenate([[0], np.cumsum(habil, dtype="int64")])
+        # Posición (desde 'inicio') de cada día hábil, en orden
+        self._habiles = np.flatnonzero(habil)
+
+    def _acumulados(self, fechas):
+        """Días hábiles en [inicio, fecha) de cada fecha (negativo antes del inicio)."""
+        fechas = np.asarray(fechas, dtype="datetime64[D]")
+        pos = (fechas - self.inicio).astype("int64")
+        if pos.size == 0 or (pos.min() >= 0 and pos.max() <= len(self._acumulado) - 1):
+            return self._acumulado[pos]
+        # Fuera del rango precalculado: esas fechas se cuentan con NumPy (más lento)
+        fuera = (pos < 0) | (pos > len(self._acumulado) - 1)
+        acumulados = np.array(self._acumulado[np.where(fuera, 0, pos)])
+        afuera = fechas[fuera]
+        acumulados[fuera] = np.where(
+            afuera < self.inicio,
+            -np.busday_count(np.minimum(afuera, self.inicio), self.inicio, holidays=self.feriados),
+            np.busday_count(self.inicio, np.maximum(afuera, self.inicio), holidays=self.feriados),
+        )
+        return acumulados[()]  # Una fecha suelta da un número, como en el rango precalculado
+
+    def es_habil(self, fechas):
+        fechas = np.asarray(fechas, dtype="datetime64[D]")
+        return self._acumulados(fechas + 1) > self._acumulados(fechas)
+
+    def dias_habiles_entre(self, desde, hasta):
+        """Días hábiles en [desde, hasta) (incluye 'desde', excluye 'hasta'), como np.busday_count."""
+        return self._acumulados(hasta) - self._acumulados(desde)
+
+    def fecha_habil(self, desde, n):
+        """Fecha del N-ésimo día hábil posterior a 'desde' (n >= 1)."""
+        # Días hábiles en [inicio, desde]: el siguiente hábil tiene ese número de orden
+        indice = self._acumulados(np.asarray(desde, dtype="datetime64[D]") + 1) + np.asarray(n, dtype="int64") - 1
+        if indice.size == 0 or (indice.min() >= 0 and indice.max() < len(self._habiles)):
+            return self.inicio + self._habiles[indice].astype("timedelta64[D]")
+        # Como np.busday_offset: desde el hábil anterior o igual a 'desde', n hábiles más
+        fuera = (indice < 0) | (indice >= len(self._habiles))
+        desde, n = np.broadcast_arrays(np.asarray(desde, dtype="datetime64[D]"), np.asarray(n, dtype="int64"))
+        fechas = np.array(self.inicio + self._habiles[np.where(fuera, 0, indice)].astype("timedelta64[D]"))
+        fechas[fuera] = np.busday_offset(desde[fuera], n[fuera], roll="backward", holidays=self.feriados)
+        return fechas[()]
+
+@lru_cache(maxsize=1)
+def calendario():
+    """Calendario por defecto de la aplicación (se construye una sola vez)."""
+    return CalendarioHabil(feriados=cargar_feriados())
@@ -0,0 +1,180 @@
+"""
+Hoja de cobranza del día: todos los créditos activos con cuotas vencidas e impagas a una fecha.
+
+Una sola consulta trae los candidatos (por el índice de cuotas impagas, con saldos ya guardados
+en cada crédito) y el motor vectorizado calcula el atraso de todos a la vez; después se agrupa
+por zona (calle) o dirección para armar el recorrido de los cobradores. Con miles de créditos
+atrasados lo que pesa es armar las filas, no el cálculo: la consulta se lee sin pasar por el
+ORM, la zona se calcula una vez por dirección distinta y las filas se arman y ordenan sin
+volver a pasar por pandas.
+"""
+import re
+from datetime import date
+from functools import lru_cache
+import numpy as np
+import pandas as pd
+from sqlalchemy import and_, or_, select
+from sqlalchemy.orm import Session
+from . import models, motor_creditos
+
+AGRUPACIONES = ("zona", "direccion")
+ORDENES = ("atraso", "nombre")
+SIN_DIRECCION = "Sin dirección"
+
+# Prefijos de la dirección que no identifican la zona (domicilio laboral, manzana, lote, etc.)
+PREFIJOS_SIN_ZONA = r"^(?:(?:DL|DP|TRAB|MZA?|MZ|LTE?|LOTE)\.?\s*\d*\s*[-.,]?\s*)+"
+
+_BARRIO = re.compile(r"\b(?:BARRIO|B°|Bº|B\.)\s*([A-ZÁÉÍÓÚÑ ]+)")
+_PREFIJOS = re.compile(PREFIJOS_SIN_ZONA)
+_CALLE = re.compile(r"^([^\d\-,(]+)")
+# Direcciones distintas que se recuerdan con su zona (se repiten en cada hoja)
+MEMORIA_ZONAS = 65536
+
+@lru_cache(maxsize=MEMORIA_ZONAS)
+def zona(direccion):
+    """
+    Zona de cobro a partir de la dirección: el barrio si figura, si no el nombre de la calle,
+    sin numeración ni datos extra. 'CALAMUCHITA 6087.LT. CONSTITUCION' -> 'CALAMUCHITA',
+    'MZA.14 LT.9-BARRIO CABILDO' -> 'BARRIO CABILDO'.
+    """
+    texto = "" if direccion is None else str(direccion).strip().upper()
+    if texto == "NAN":
+        texto = ""
+
+    barrio = _BARRIO.search(texto)
+    if barrio and barrio.group(1).strip():
+        return "BARRIO " + barrio.group(1).strip()
+    calle = _CALLE.search(_PREFIJOS.sub("", texto))
+    calle = calle.group(1).strip(" .") if calle else ""
+    return calle or SIN_DIRECCION
+
+# Columnas de _cargar_candidatos: las de entrada del motor que hacen falta y los datos del cliente
+COLUMNAS_CANDIDATOS = [
+    "id", "cliente_id", "fecha_inicio", "semanas", "frecuencia", "pago_semanal", "monto_total",
+    "recargos", "total_pagado", "ultimo_pago_fecha", "nombre", "dni", "direccion", "telefono",
+]
+COLUMNAS_NUMERICAS_MOTOR = ["semanas", "pago_semanal", "monto_total", "recargos", "total_pagado"]
+
+def _filtro_candidatos(fecha):
+    """
+    Créditos activos que pueden tener atraso a 'fecha': alguna cuota vencida e impaga
+    (por el índice de cuotas) o recargos, que no generan cuotas. El motor decide el atraso exacto.
+    """
+    cuota = models.Cuota
+    # Misma condición que el índice parcial ix_cuotas_impagas, así SQLite lo usa
+    con_cuota_vencida = select(cuota.credito_id).where(
+        cuota.fecha_vencimiento <= fecha,
+        cuota.monto_pagado < cuota.monto,
+    )
+    return and_(models.Credito.activo == True, or_(models.Credito.id.in_(con_cuota_vencida), models.Credito.recargos > 0))
+
+def _cargar_candidatos(db: Session, fecha):
+    """
+    Candidatos de _filtro_candidatos como dict columna -> tupla de valores (ver COLUMNAS_CANDIDATOS).
+    Se lee sin el ORM y sin armar un DataFrame entero: con decenas de miles de candidatos
+    la lectura es la mayor parte del tiempo de la hoja.
+    """
+    credito, cliente = models.Credito, models.Cliente
+    consulta = (
+        select(
+            credito.id, credito.cliente_id, credito.fecha_inicio, credito.semanas, credito.frecuencia,
+            credito.pago_semanal, credito.monto_total, credito.recargos, credito.total_pagado,
+            credito.ultimo_pago_fecha, cliente.nombre, cliente.dni, cliente.direccion, cliente.telefono,
+        )
+        .join(cliente, cliente.id == credito.cliente_id)
+        .where(_filtro_candidatos(fecha))
+        .order_by(credito.id)
+    )
+    filas = db.connection().execute(consulta).all()
+    return dict(zip(COLUMNAS_CANDIDATOS, zip(*filas) if filas else [()] * len(COLUMNAS_CANDIDATOS)))
+
+def _nativos(valores):
+    """Floats de un array como lista de Python, con None en lugar de NaN."""
+    return [None if v != v else v for v in valores.tolist()]
+
+def hoja_cobranza(db: Session, fecha=None, agrupar="zona", orden="atraso"):
+    """
+    Créditos activos con atraso a 'fecha', agrupados por zona o dirección.
+    Devuelve un dict listo para JSON o para la plantilla.
+    """
+    fecha = fecha or date.today()
+    candidatos = _cargar_candidatos(db, fecha)
+    # Sólo las columnas que lee el motor; un None numérico queda NaN, que el motor toma como 0
+    creditos = pd.DataFrame({
+        "fecha_inicio": pd.Series(candidatos["fecha_inicio"], dtype=object),
+        "frecuencia": pd.Series(candidatos["frecuencia"], dtype=object),
+        **{columna: np.array(candidatos[columna], dtype=float) for columna in COLUMNAS_NUMERICAS_MOTOR},
+    })
+    estados = motor_creditos.calcular_estado(creditos, hoy=fecha)
+
+    # Sólo lo que hay que cobrar: cuotas vencidas e impagas
+    atraso = estados["atraso"].to_numpy(dtype=float)
+    con_atraso = np.flatnonzero(atraso > motor_creditos.MARGEN_SALDADO).tolist()
+    direccion = ["" if d is None else str(d).strip() for d in (candidatos["direccion"][i] for i in con_atraso)]
+    nombres = [candidatos["nombre"][i] for i in con_atraso]
+    if agrupar == "zona":
+        grupo = [zona(d) for d in direccion]
+    else:
+        grupo = [SIN_DIRECCION if d in ("", "nan") else d for d in direccion]
+
+    # Orden dentro de cada grupo (estable, como la consulta por id): por nombre, con los que no
+    # tienen al final, o por atraso descendente. lexsort compara los textos por código como Python
+    grupos_filas = np.array(grupo, dtype=str)
+    if orden == "nombre":
+        sin_nombre = np.array([n is None for n in nombres], dtype=bool)
+        posiciones = np.lexsort((np.array([n or "" for n in nombres], dtype=str), sin_nombre, grupos_filas))
+    else:
+        posiciones = np.lexsort((-atraso[con_atraso], grupos_filas))
+    posiciones = posiciones.tolist()
+    filas = np.array(con_atraso, dtype=np.int64)[posiciones]  # Posición de cada fila de la hoja entre los candidatos
+    indices = filas.tolist()
+
+    def columna(nombre):
+        valores = candidatos[nombre]
+        return [valores[i] for i in indices]
+
+    cuota_periodo = estados["cuota_periodo"].to_numpy(dtype=float)[filas]
+    restante = estados["restante"].to_numpy(dtype=float)[filas]
+    # Registros como tipos nativos de Python, columna por columna (NaT pasa a None)
+    valores = {
+        "credito_id": columna("id"),
+        "cliente_id": columna("cliente_id"),
+        "nombre": [nombres[i] for i in posiciones],
+        "dni": columna("dni"),
+        "telefono": columna("telefono"),
+        "direccion": [direccion[i] for i in posiciones],
+        "frecuencia": columna("frecuencia"),
+        "cuota": _nativos(np.where(cuota_periodo > 0, cuota_periodo, restante)),
+        "atraso": _nativos(atraso[filas]),
+        "pagado": _nativos(estados["pagado"].to_numpy(dtype=float)[filas]),
+        "restante": _nativos(restante),
+        "proximo_vencimiento": estados["proximo_vencimiento"].to_numpy().astype("datetime64[D]")[filas].astype(object).tolist(),
+        "ultimo_pago_fecha": columna("ultimo_pago_fecha"),
+    }
+
+    # Cada fila se arma directo de las columnas ya ordenadas: sin guardar una tupla por fila,
+    # que con miles de filas vivas dispara recolecciones completas del GC
+    registros = {}
+    for nombre_grupo, fila in zip([grupo[i] for i in posiciones], zip(*valores.values())):
+        registros.setdefault(nombre_grupo, []).append(dict(zip(valores, fila)))
+
+    grupos = [
+        {
+            "grupo": nombre,
+            "cantidad": len(creditos_grupo),
+            "total_atraso": float(sum(f["atraso"] for f in creditos_grupo)),
+            "creditos": creditos_grupo,
+        }
+        for nombre, creditos_grupo in sorted(registros.items())
+    ]
+    if orden != "nombre":
+        grupos.sort(key=lambda g: -g["total_atraso"])
+
+    return {
+        "fecha": fecha,
+        "agrupar": agrupar,
+        "orden": orden,
+        "cantidad": len(grupo),
+        "total_atraso": float(sum(g["total_atraso"] for g in grupos)),
+        "grupos": grupos,
+    }
@@ -0,0 +1,58 @@
+"""
+Conciliación del flag 'activo' de los créditos.
+
+'activo' se deriva del saldo guardado (ver app/saldos.py): un crédito está activo mientras
+su saldo supere el margen de saldado. Se recalcula para toda la cartera con un único UPDATE,
+al iniciar la aplicación, periódicamente en segundo plano y después de cada importación,
+para que las páginas de consulta no tengan que escribir en la base.
+"""
+import threading
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+from . import models, database
+from .motor_creditos import MARGEN_SALDADO
+
+# Cada cuánto se concilia en segundo plano (segundos)
+INTERVALO_CONCILIACION = 10 * 60
+
+def reconciliar_activos(db: Session):
+    """
+    Pone activo = (saldo > margen) en los créditos que no coinciden, en una sola sentencia.
+    Devuelve la cantidad de créditos corregidos. No confirma la transacción.
+    """
+    credito = models.Credito
+    deberia_estar_activo = credito.saldo > MARGEN_SALDADO
+    resultado = db.execute(
+        update(credito)
+        .where(credito.saldo.is_not(None), credito.activo.is_distinct_from(deberia_estar_activo))
+        .values(activo=deberia_estar_activo)
+        .execution_options(synchronize_session=False)
+    )
+    return resultado.rowcount
+
+def conciliar():
+    """Concilia la cartera en su propia sesión y confirma. Pensado para el arranque y el hilo periódico."""
+    db = database.SessionLocal()
+    try:
+        corregidos = reconciliar_activos(db)
+        db.commit()
+        if corregidos:
+            print(f"🔄 Conciliación: {corregidos} créditos cambiaron de estado (activo/finalizado).")
+        return corregidos
+    except Exception as e:
+        db.rollback()
+        print(f"⚠️ Error en la conciliación de créditos: {e}")
+        return 0
+    finally:
+        db.close()
+
+def iniciar_conciliacion_periodica(intervalo=INTERVALO_CONCILIACION):
+    """Lanza un hilo que concilia cada 'intervalo' segundos. Devuelve el Event para detenerlo."""
+    detener = threading.Event()
+
+    def _bucle():
+        while not detener.wait(intervalo):
+            conciliar()
+
+    threading.Thread(target=_bucle, name="conciliacion-creditos", daemon=True).start()
+    return detener
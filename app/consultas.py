@@ -0,0 +1,115 @@
+import base64
+import json
+from sqlalchemy import exists, case, tuple_, or_, func, text, Integer, Float
+from sqlalchemy.orm import Session
+from . import models, busqueda
+
+TAMANO_PAGINA = 50
+LIMITE_MAXIMO = 200
+
+# Clave de orden de los listados: un cliente sin nombre cuenta como '' (misma expresión que el
+# índice ix_clientes_nombre_orden_id). Con NULL, '(nombre, id) > (NULL, id)' nunca es verdadero
+# y la página siguiente a la que termina en ese cliente saldría vacía.
+NOMBRE_ORDEN = func.coalesce(models.Cliente.nombre, text("''"))
+
+def _consulta_base(db: Session):
+    """Consulta de clientes con su estado, sin filtros ni orden."""
+    tiene_credito_activo = exists().where(
+        models.Credito.cliente_id == models.Cliente.id,
+        models.Credito.activo == True
+    )
+    estado = case((tiene_credito_activo, "Activo"), else_="Sin Crédito").label("estado")
+
+    return db.query(
+        models.Cliente.id,
+        models.Cliente.nombre,
+        models.Cliente.dni,
+        models.Cliente.telefono,
+        models.Cliente.direccion,
+        models.Cliente.foto_perfil,
+        estado
+    )
+
+def clientes_con_estado(db: Session, filtro=None, limite=None, despues=None):
+    """
+    Devuelve los clientes con su estado ("Activo" / "Sin Crédito") en UNA sola consulta.
+    El estado se resuelve con un EXISTS sobre 'creditos' en lugar de consultar
+    los créditos de cada cliente por separado (N+1).
+    Retorna filas livianas (id, nombre, dni, telefono, direccion, foto_perfil, estado)
+    en lugar de objetos ORM completos.
+
+    Paginación por cursor (keyset): 'despues' es la tupla (nombre, id) de la última fila
+    de la página anterior (nombre '' si no tiene). Con el índice compuesto sobre
+    (NOMBRE_ORDEN, id) cada página es un recorrido de rango del índice, sin ordenar toda la tabla.
+    """
+    query = _consulta_base(db)
+    if filtro is not None:
+        query = query.filter(filtro)
+    if despues is not None:
+        # La cota sobre NOMBRE_ORDEN sola es redundante, pero con ella SQLite recorre el índice
+        # de expresión por rango (con la comparación de tuplas sola lo recorre entero)
+        query = query.filter(NOMBRE_ORDEN >= despues[0], tuple_(NOMBRE_ORDEN, models.Cliente.id) > tuple_(*despues))
+
+    query = query.order_by(NOMBRE_ORDEN, models.Cliente.id)
+    if limite is not None:
+        query = query.limit(limite)
+
+    return query.all()
+
+def codificar_cursor(fila):
+    """Cursor opaco para la URL a partir de la última fila de una página."""
+    crudo = json.dumps([fila.nombre or "", fila.id]).encode("utf-8")
+    return base64.urlsafe_b64encode(crudo).decode("ascii")
+
+def decodificar_cursor(cursor):
+    """Inversa de codificar_cursor. Lanza ValueError si el cursor no es válido."""
+    try:
+        nombre, cliente_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+    except Exception:
+        raise ValueError("Cursor inválido")
+    if not isinstance(nombre, str) or not isinstance(cliente_id, int):
+        raise ValueError("Cursor inválido")
+    return nombre, cliente_id
+
+def pagina_clientes(db: Session, limite=TAMANO_PAGINA, cursor=None):
+    """
+    Una página de clientes con estado, más el cursor de la siguiente (None si es la última).
+    Pide una fila de más para saber si hay siguiente página sin hacer un COUNT.
+    """
+    limite = max(1, min(limite, LIMITE_MAXIMO))
+    despues = decodificar_cursor(cursor) if cursor else None
+
+    filas = clientes_con_estado(db, limite=limite + 1, despues=despues)
+    siguiente = None
+    if len(filas) > limite:
+        filas = filas[:limite]
+        siguiente = codificar_cursor(filas[-1])
+
+    return filas, siguiente
+
+def buscar_clientes_con_estado(db: Session, texto):
+    """
+    Búsqueda de clientes por nombre, DNI, teléfono, dirección o lugar de trabajo
+    usando el índice FTS5 (sin distinguir acentos), ordenada por relevancia.
+    Si FTS5 no está disponible o el texto no tiene palabras, usa ILIKE sobre nombre y DNI.
+    """
+    expresion = busqueda.expresion_fts(texto)
+    if not busqueda.FTS_DISPONIBLE or expresion is None:
+        return clientes_con_estado(db, or_(
+            models.Cliente.nombre.ilike(f"%{texto}%"),
+            models.Cliente.dni.ilike(f"%{texto}%")
+        ))
+
+    ranking = (
+        text(busqueda.consulta_ranking())
+        .bindparams(expresion=expresion)
+        .columns(id=Integer, rank=Float)
+        .subquery("ranking")
+    )
+
+    return (
+        _consulta_base(db)
+        .join(ranking, ranking.c.id == models.Cliente.id)
+        .order_by(ranking.c.rank, models.Cliente.nombre, models.Cliente.id)
+        .all()
+    )
@@ -0,0 +1,131 @@
+"""
+Cronograma de cuotas materializado (tabla 'cuotas').
+
+Cada crédito guarda sus cuotas con número, fecha de vencimiento, monto y monto pagado.
+Las fechas siguen la misma lógica que el motor de estado (app/motor_creditos.py):
+una cuota por periodo de días hábiles (Semanal 5, Quincenal 10, Mensual 20) y nunca
+después de la fecha final del crédito. Los pagos se imputan a las cuotas en orden (FIFO).
+"""
+import math
+from datetime import timedelta
+import numpy as np
+import pandas as pd
+from sqlalchemy import insert, update
+from sqlalchemy.orm import Session
+from . import models, calendario
+
+# Tope de cuotas por crédito (10 años semanales); el resto se acumula en la última
+MAXIMO_CUOTAS = 520
+
+DIAS_HABILES_PERIODO = {"Semanal": 5, "Quincenal": 10, "Mensual": 20}
+SEMANAS_POR_PERIODO = {"Semanal": 1, "Quincenal": 2, "Mensual": 4}
+
+def calcular_cuotas(fecha_inicio, semanas, frecuencia, pago_semanal, monto_total, cal=None):
+    """
+    Devuelve el cronograma de un crédito como lista de (numero, fecha_vencimiento, monto).
+    La suma de los montos es siempre 'monto_total' (los recargos no generan cuotas).
+    """
+    cal = cal or calendario.calendario()
+    monto_total = monto_total or 0.0
+    fecha_final = fecha_inicio + timedelta(weeks=semanas or 0)
+
+    frecuencia = frecuencia or "Semanal"
+    cuota = (pago_semanal or 0.0) * SEMANAS_POR_PERIODO.get(frecuencia, 0)
+    if frecuencia not in DIAS_HABILES_PERIODO or cuota <= 0 or monto_total <= 0:
+        # Pago único (o sin cuota definida): todo vence en la fecha final
+        return [(1, fecha_final, monto_total)]
+
+    cantidad = min(max(math.ceil(monto_total / cuota - 1e-9), 1), MAXIMO_CUOTAS)
+    numeros = np.arange(1, cantidad + 1)
+
+    vencimientos = cal.fecha_habil(np.datetime64(fecha_inicio, "D"), numeros * DIAS_HABILES_PERIODO[frecuencia])
+    vencimientos = np.minimum(vencimientos, np.datetime64(fecha_final, "D"))
+
+    montos = np.full(cantidad, cuota)
+    montos[-1] = monto_total - cuota * (cantidad - 1)
+
+    return [
+        (int(numero), pd.Timestamp(vence).date(), float(monto))
+        for numero, vence, monto in zip(numeros, vencimientos, montos)
+    ]
+
+def _imputar(montos, total_pagado):
+    """Reparte 'total_pagado' sobre las cuotas en orden: [monto_pagado de cada cuota]."""
+    acumulado_previo = np.concatenate([[0.0], np.cumsum(montos)[:-1]])
+    return np.clip(total_pagado - acumulado_previo, 0.0, montos)
+
+def _filas_cuotas(credito, cal=None):
+    """Filas para insertar en 'cuotas' con el cronograma del crédito y lo ya pagado imputado."""
+    cronograma = calcular_cuotas(credito.fecha_inicio, credito.semanas, credito.frecuencia, credito.pago_semanal, credito.monto_total, cal)
+    pagados = _imputar(np.array([monto for _, _, monto in cronograma]), credito.total_pagado or 0.0)
+    return [
+        {"credito_id": credito.id, "numero": numero, "fecha_vencimiento": vence, "monto": monto, "monto_pagado": float(pagado)}
+        for (numero, vence, monto), pagado in zip(cronograma, pagados)
+    ]
+
+def generar_cuotas(db: Session, credito: models.Credito):
+    """
+    (Re)genera el cronograma de un crédito con lo ya pagado imputado.
+    Se llama al crear o modificar el crédito. No confirma la transacción.
+    """
+    db.flush()  # Asegura id y fecha_inicio (valor por defecto) del crédito
+    db.query(models.Cuota).filter(models.Cuota.credito_id == credito.id).delete(synchronize_session=False)
+    db.execute(insert(models.Cuota), _filas_cuotas(credito))
+
+def imputar_pagos(db: Session, totales=None):
+    """
+    Vuelve a repartir lo pagado de cada crédito sobre sus cuotas (FIFO).
+    'totales' es {credito_id: total_pagado}; sin él, se reimputa toda la cartera
+    con el total_pagado guardado en cada crédito. No confirma la transacción.
+    """
+    cuota = models.Cuota
+    query = db.query(cuota.id, cuota.credito_id, cuota.monto, cuota.monto_pagado)
+    if totales is None:
+        totales = dict(db.query(models.Credito.id, models.Credito.total_pagado).all())
+    else:
+        query = query.filter(cuota.credito_id.in_(list(totales)))
+
+    filas = pd.DataFrame(query.order_by(cuota.credito_id, cuota.numero).all(), columns=["id", "credito_id", "monto", "monto_pagado"])
+    if filas.empty:
+        return
+
+    # Imputación vectorizada: lo pagado menos lo que cubren las cuotas anteriores del mismo crédito
+    total = filas["credito_id"].map(totales).fillna(0.0).to_numpy(dtype=float)
+    montos = filas["monto"].fillna(0.0).to_numpy(dtype=float)
+    acumulado_previo = filas.groupby("credito_id")["monto"].cumsum().to_numpy(dtype=float) - montos
+    nuevo = np.clip(total - acumulado_previo, 0.0, montos)
+
+    cambios = filas.loc[np.abs(nuevo - filas["monto_pagado"].fillna(-1.0).to_numpy()) > 1e-9, ["id"]]
+    cambios["monto_pagado"] = nuevo[cambios.index]
+    if not cambios.empty:
+        db.execute(update(cuota), cambios.to_dict("records"))
+
+def reconstruir_cuotas(db: Session, credito_ids=None):
+    """
+    Regenera el cronograma de TODOS los créditos (backfill e importaciones), o sólo el de los
+    de 'credito_ids'. No confirma la transacción.
+    """
+    borrar = db.query(models.Cuota)
+    creditos = db.query(models.Credito)
+    if credito_ids is not None:
+        borrar = borrar.filter(models.Cuota.credito_id.in_(credito_ids))
+        creditos = creditos.filter(models.Credito.id.in_(credito_ids))
+    borrar.delete(synchronize_session=False)
+
+    cal = calendario.calendario()
+    filas = []
+    for credito in creditos.order_by(models.Credito.id).yield_per(1000):
+        if credito.fecha_inicio is not None:
+            filas.extend(_filas_cuotas(credito, cal))
+
+    if filas:
+        db.execute(insert(models.Cuota), filas)
+    return len(filas)
+
+def cuotas_que_vencen(db: Session, desde, hasta, solo_impagas=True):
+    """Cuotas con vencimiento entre 'desde' y 'hasta' (inclusive), por rango del índice de vencimientos."""
+    cuota = models.Cuota
+    query = db.query(cuota).filter(cuota.fecha_vencimiento >= desde, cuota.fecha_vencimiento <= hasta)
+    if solo_impagas:
+        query = query.filter(cuota.monto_pagado < cuota.monto - 0.005)
+    return query.order_by(cuota.fecha_vencimiento, cuota.credito_id).all()
@@ -0,0 +1,466 @@
+"""
+Documentos PDF de la aplicación (recibo de pago, estado de cuenta y ficha de pago de un crédito).
+
+Se generan sobre cualquier destino (archivo abierto o ruta), así los usan tanto las
+descargas directas como los trabajos en segundo plano (ver app/trabajos.py).
+
+Los recibos se reimprimen todo el tiempo y casi nunca cambian: se guardan en una caché en
+disco con clave (id del pago, huella de los datos que muestra). Si un dato cambia, cambia la
+huella y el recibo se vuelve a generar; la misma huella sirve de ETag para el navegador.
+"""
+import functools
+import hashlib
+import json
+import math
+from datetime import timedelta
+from io import BytesIO
+from reportlab.lib.pagesizes import letter, A4
+from reportlab.pdfgen import canvas
+from reportlab.lib.units import inch
+from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib.enums import TA_CENTER
+from reportlab.lib import colors
+from reportlab.pdfbase.pdfmetrics import stringWidth
+from .cache_archivos import CacheArchivos
+
+# Fuera del paquete congelado, como 'uploads'
+CARPETA_CACHE_RECIBOS = "cache_recibos"
+TAMANO_CACHE_RECIBOS = 50 * 1024 * 1024
+# Subir al cambiar el diseño del recibo: cambia la huella de todos y se regeneran
+VERSION_RECIBO = 1
+
+cache_recibos = CacheArchivos(CARPETA_CACHE_RECIBOS, TAMANO_CACHE_RECIBOS)
+
+def datos_recibo(pago):
+    """Todo lo que muestra el recibo de 'pago' (y nada más): de esto depende su contenido."""
+    credito = pago.credito
+    return {
+        "pago_id": pago.id,
+        "fecha": pago.fecha.strftime('%d/%m/%Y'),
+        "cliente": credito.cliente.nombre,
+        "monto": pago.monto,
+        "credito_id": credito.id,
+    }
+
+def huella_recibo(datos):
+    return hashlib.sha1(json.dumps([VERSION_RECIBO, datos], sort_keys=True).encode()).hexdigest()[:20]
+
+def escribir_recibo(destino, datos):
+    """Recibo de pago a partir de datos_recibo()."""
+    c = canvas.Canvas(destino, pagesize=letter)
+    
+    # Diseño del Recibo
+    c.setLineWidth(2)
+    c.rect(0.5 * inch, 6 * inch, 7.5 * inch, 4.5 * inch)
+    
+    c.setFont("Helvetica-Bold", 24)
+    c.drawCentredString(4.25 * inch, 9.8 * inch, "CRÉDITOS JARDÍN")
+    
+    c.setFont("Helvetica-Bold", 16)
+    c.drawCentredString(4.25 * inch, 9.4 * inch, "RECIBO DE PAGO")
+    
+    c.setFont("Helvetica", 12)
+    c.drawString(1 * inch, 8.8 * inch, f"Fecha: {datos['fecha']}")
+    c.drawString(5 * inch, 8.8 * inch, f"Recibo N°: {datos['pago_id']:06d}")
+    
+    c.line(1 * inch, 8.6 * inch, 7.5 * inch, 8.6 * inch)
+    
+    c.setFont("Helvetica", 14)
+    c.drawString(1 * inch, 8 * inch, f"Recibí de: {datos['cliente']}")
+    c.drawString(1 * inch, 7.5 * inch, f"La cantidad de: ${datos['monto']:,.2f}")
+    c.drawString(1 * inch, 7 * inch, f"Concepto: Abono a crédito #{datos['credito_id']}")
+    
+    c.setFont("Helvetica-Oblique", 10)
+    c.drawCentredString(4.25 * inch, 6.5 * inch, "Gracias por su pago puntual.")
+    
+    c.save()
+
+def _prefijo_recibo(pago_id):
+    return f"recibo_{pago_id}_"
+
+def clave_recibo(datos, huella=None):
+    """Nombre del recibo en la caché: id del pago y huella de sus datos."""
+    return f"{_prefijo_recibo(datos['pago_id'])}{huella or huella_recibo(datos)}.pdf"
+
+def recibo_pdf(datos, huella=None):
+    """Bytes del recibo: de la caché si ya se generó con estos datos, si no se genera y se guarda."""
+    clave = clave_recibo(datos, huella)
+    contenido = cache_recibos.leer(clave)
+    if contenido is None:
+        buffer = BytesIO()
+        escribir_recibo(buffer, datos)
+        contenido = buffer.getvalue()
+        cache_recibos.guardar(clave, contenido)
+    return contenido
+
+def renderizar_recibos(lista_datos):
+    """
+    Bytes de los recibos de 'lista_datos', sin pasar por la caché. Corre en los procesos de
+    app/lotes_pdf.py: recibe y devuelve sólo datos simples.
+    """
+    pdfs = []
+    for datos in lista_datos:
+        buffer = BytesIO()
+        escribir_recibo(buffer, datos)
+        pdfs.append(buffer.getvalue())
+    return pdfs
+
+def invalidar_recibos(pago_ids):
+    """Quita de la caché los recibos de estos pagos (modificados o eliminados)."""
+    cache_recibos.invalidar(_prefijo_recibo(pago_id) for pago_id in pago_ids)
+
+def datos_estado_cuenta(credito, pagos):
+    """Todo lo que muestra el estado de cuenta de 'credito' (con su cliente) y sus 'pagos' ordenados por fecha."""
+    cliente = credito.cliente
+    return {
+        "cliente": {"nombre": cliente.nombre, "dni": cliente.dni, "direccion": cliente.direccion},
+        "credito": {
+            "id": credito.id,
+            "fecha_inicio": credito.fecha_inicio.strftime('%d/%m/%Y'),
+            "activo": credito.activo,
+            "monto_prestado": credito.monto_prestado,
+            "monto_total": credito.monto_total,
+            "recargos": credito.recargos,
+            "total_pagado": credito.total_pagado,
+            "saldo": credito.saldo,
+        },
+        "pagos": [(pago.fecha.strftime('%d/%m/%Y'), pago.monto) for pago in pagos],
+    }
+
+@functools.lru_cache(maxsize=None)
+def _estilos():
+    """Hoja de estilos del estado de cuenta: se arma una vez por proceso, no en cada documento."""
+    styles = getSampleStyleSheet()
+    styles.add(ParagraphStyle(name='HeaderTitle', parent=styles['Heading1'], alignment=TA_CENTER, fontSize=22, spaceAfter=10, fontName='Helvetica-Bold', textColor=colors.darkgreen))
+    styles.add(ParagraphStyle(name='SubHeader', parent=styles['Normal'], alignment=TA_CENTER, fontSize=12, spaceAfter=20, textColor=colors.gray))
+    styles.add(ParagraphStyle(name='TableLabel', parent=styles['Normal'], fontSize=10, fontName='Helvetica-Bold'))
+    styles.add(ParagraphStyle(name='TableValue', parent=styles['Normal'], fontSize=10))
+    return styles
+
+# Estilos de las tablas del estado de cuenta (iguales para todos los documentos)
+ESTILO_TABLA_CLIENTE = TableStyle([
+    ('VALIGN', (0,0), (-1,-1), 'TOP'),
+    ('LEFTPADDING', (0,0), (-1,-1), 0),
+    ('BOTTOMPADDING', (0,0), (-1,-1), 6),
+    ('TEXTCOLOR', (0,0), (-1,-1), colors.black),
+])
+ESTILO_TABLA_RESUMEN = TableStyle([
+    ('BACKGROUND', (0,0), (1,0), colors.darkgreen),
+    ('TEXTCOLOR', (0,0), (1,0), colors.white),
+    ('ALIGN', (0,0), (0,-1), 'LEFT'),
+    ('ALIGN', (1,0), (1,-1), 'RIGHT'),
+    ('FONTNAME', (0,0), (-1,0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0,0), (-1,-1), 10),
+    ('BOTTOMPADDING', (0,0), (-1,-1), 8),
+    ('TOPPADDING', (0,0), (-1,-1), 8),
+    ('GRID', (0,0), (-1,-1), 0.5, colors.lightgrey),
+    ('FONTNAME', (0,-1), (-1,-1), 'Helvetica-Bold'), # Bold last row
+    ('BACKGROUND', (0,-1), (-1,-1), colors.whitesmoke),
+    ('TEXTCOLOR', (0,-1), (-1,-1), colors.darkred),
+])
+ESTILO_TABLA_PAGOS = TableStyle([
+    ('BACKGROUND', (0,0), (-1,0), colors.gray),
+    ('TEXTCOLOR', (0,0), (-1,0), colors.white),
+    ('ALIGN', (0,0), (-1,-1), 'CENTER'),
+    ('FONTNAME', (0,0), (-1,0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0,0), (-1,0), 10),
+    ('BOTTOMPADDING', (0,0), (-1,0), 8),
+    ('ROWBACKGROUNDS', (0,1), (-1,-1), [colors.white, colors.whitesmoke]),
+    ('GRID', (0,0), (-1,-1), 0.5, colors.lightgrey),
+])
+
+def escribir_estado_cuenta(destino, datos):
+    """Estado de cuenta detallado a partir de datos_estado_cuenta()."""
+    cliente = datos["cliente"]
+    credito = datos["credito"]
+    pagos = datos["pagos"]
+
+    doc = SimpleDocTemplate(destino, pagesize=letter, rightMargin=40, leftMargin=40, topMargin=40, bottomMargin=40)
+    elements = []
+    styles = _estilos()
+    
+    # Header
+    elements.append(Paragraph("CRÉDITOS JARDÍN", styles['HeaderTitle']))
+    elements.append(Paragraph("Estado de Cuenta Detallado", styles['SubHeader']))
+    elements.append(Spacer(1, 12))
+    
+    # Client Info Section
+    data_cliente = [
+        [Paragraph("<b>Cliente:</b>", styles['TableLabel']), Paragraph(cliente["nombre"], styles['TableValue']), Paragraph("<b>Crédito #:</b>", styles['TableLabel']), Paragraph(str(credito["id"]), styles['TableValue'])],
+        [Paragraph("<b>DNI:</b>", styles['TableLabel']), Paragraph(cliente["dni"], styles['TableValue']), Paragraph("<b>Fecha Inicio:</b>", styles['TableLabel']), Paragraph(credito["fecha_inicio"], styles['TableValue'])],
+        [Paragraph("<b>Dirección:</b>", styles['TableLabel']), Paragraph(cliente["direccion"] or "N/A", styles['TableValue']), Paragraph("<b>Estado:</b>", styles['TableLabel']), Paragraph("Activo" if credito["activo"] else "Finalizado", styles['TableValue'])]
+    ]
+    
+    t_cliente = Table(data_cliente, colWidths=[1*inch, 2.5*inch, 1*inch, 2.5*inch])
+    t_cliente.setStyle(ESTILO_TABLA_CLIENTE)
+    elements.append(t_cliente)
+    elements.append(Spacer(1, 20))
+    
+    # Financial Summary (saldos guardados en el crédito)
+    total_pagado = credito["total_pagado"] or 0.0
+    recargos = credito["recargos"] or 0.0
+    monto_total_final = credito["monto_total"] + recargos
+    saldo_restante = max(credito["saldo"] or 0.0, 0)
+    
+    elements.append(Paragraph("Resumen Financiero", styles['Heading3']))
+    
+    data_resumen = [
+        ["Concepto", "Monto"],
+        ["Monto Prestado (Capital)", f"${credito['monto_prestado']:,.2f}"],
+        ["Intereses y Cargos Administrativos", f"${(credito['monto_total'] - credito['monto_prestado']):,.2f}"],
+        ["Recargos por Mora", f"${recargos:,.2f}"],
+        ["MONTO TOTAL A PAGAR", f"${monto_total_final:,.2f}"],
+        ["Total Abonado a la Fecha", f"${total_pagado:,.2f}"],
+        ["SALDO PENDIENTE", f"${saldo_restante:,.2f}"]
+    ]
+    
+    t_resumen = Table(data_resumen, colWidths=[5*inch, 2*inch])
+    t_resumen.setStyle(ESTILO_TABLA_RESUMEN)
+    elements.append(t_resumen)
+    elements.append(Spacer(1, 20))
+    
+    # Payments History
+    elements.append(Paragraph("Historial de Pagos", styles['Heading3']))
+    
+    data_pagos = [["Fecha", "Monto Abonado", "Saldo Restante (Estimado)"]]
+    
+    saldo_temp = monto_total_final
+    for fecha, monto in pagos:
+        saldo_temp -= monto
+        data_pagos.append([
+            fecha,
+            f"${monto:,.2f}",
+            f"${max(0, saldo_temp):,.2f}"
+        ])
+        
+    if not pagos:
+        data_pagos.append(["-", "Sin pagos registrados", "-"])
+        
+    t_pagos = Table(data_pagos, colWidths=[2.5*inch, 2.5*inch, 2*inch])
+    t_pagos.setStyle(ESTILO_TABLA_PAGOS)
+    elements.append(t_pagos)
+    
+    # Footer
+    elements.append(Spacer(1, 40))
+    elements.append(Paragraph("Documento generado automáticamente por el sistema Créditos Jardín.", styles['Normal']))
+    
+    doc.build(elements)
+
+def renderizar_estados_cuenta(lista_datos):
+    """Bytes de los estados de cuenta de 'lista_datos' (ver datos_estado_cuenta); corre en los procesos de app/lotes_pdf.py."""
+    pdfs = []
+    for datos in lista_datos:
+        buffer = BytesIO()
+        escribir_estado_cuenta(buffer, datos)
+        pdfs.append(buffer.getvalue())
+    return pdfs
+
+# Ficha de pago: grilla de cuotas en COLUMNAS_FICHA columnas, con al menos FILAS_MINIMAS_FICHA filas
+COLUMNAS_FICHA = 3
+FILAS_MINIMAS_FICHA = 15
+
+def cuotas_ficha(semanas, frecuencia, pago_semanal):
+    """Cantidad de cuotas y monto de cada una según el plazo (en semanas) y la frecuencia del crédito."""
+    num_cuotas = 0
+    if frecuencia == "Semanal":
+        num_cuotas = int(semanas)
+    elif frecuencia == "Quincenal":
+        num_cuotas = int(semanas / 2)
+    elif frecuencia == "Mensual":
+        num_cuotas = int(semanas / 4)
+    elif frecuencia == "Unico":
+        num_cuotas = 1
+    
+    # Fallback si es 0
+    if num_cuotas < 1: num_cuotas = 1
+    
+    # Calcular monto por cuota real
+    monto_cuota = pago_semanal
+    if frecuencia == "Quincenal":
+        monto_cuota = pago_semanal * 2
+    elif frecuencia == "Mensual":
+        monto_cuota = pago_semanal * 4
+    return num_cuotas, monto_cuota
+
+def filas_ficha(num_cuotas):
+    """Filas por columna de la grilla (mínimo FILAS_MINIMAS_FICHA para que se vea bien)."""
+    return max(math.ceil(num_cuotas / COLUMNAS_FICHA), FILAS_MINIMAS_FICHA)
+
+def datos_ficha(credito, cliente, generado):
+    """
+    Todo lo que muestra la ficha de pago de 'credito'. Sirve tanto con los objetos del ORM
+    como con una fila de consulta que tenga las columnas de ambos (ver app/fichas.py).
+    """
+    num_cuotas, monto_cuota = cuotas_ficha(credito.semanas, credito.frecuencia, credito.pago_semanal)
+    return {
+        "credito_id": credito.id,
+        "cliente_id": credito.cliente_id,
+        "cliente": cliente.nombre,
+        "telefono": cliente.telefono,
+        "frecuencia": credito.frecuencia,
+        "num_cuotas": num_cuotas,
+        "monto_cuota": monto_cuota,
+        "emision": credito.fecha_inicio.strftime('%d/%m/%Y'),
+        "vencimiento": (credito.fecha_inicio + timedelta(weeks=credito.semanas)).strftime('%d/%m/%Y'),
+        "monto_total": credito.monto_total,
+        "generado": generado.strftime('%d/%m/%Y'),
+    }
+
+MARGEN_FICHA = 0.4 * inch
+ALTO_INFO_FICHA = 24
+ALTO_ENCABEZADO_FICHA = 20
+ALTO_FILA_FICHA = 18
+# Celdas de las dos filas de datos: (etiqueta, campo de datos_ficha o None, ancho relativo)
+CELDAS_FICHA = (
+    (("CLIENTE:", "cliente", 3), ("PLAN:", "plan", 2), ("CREDITO JARDIN", None, 1.5)),
+    (("ID CLIENTE:", "cliente_id", 1.2), ("ID CRÉDITO:", "credito_id", 1.2), ("EMISIÓN:", "emision", 1.5),
+     ("VENCIMIENTO:", "vencimiento", 1.6), ("TEL:", "telefono", 1.5)),
+)
+SUBCOLUMNAS_FICHA = (("#", 0.1), ("FECHA", 0.3), ("ENTREGA", 0.3), ("FIRMA", 0.3))
+
+@functools.lru_cache(maxsize=None)
+def _geometria_ficha(filas):
+    """
+    Posiciones de todo lo que se dibuja en una ficha de 'filas' filas por columna: se calculan
+    una vez por cantidad de filas y sirven para todas las fichas iguales.
+    """
+    ancho_pagina, alto_pagina = A4
+    izquierda = MARGEN_FICHA
+    ancho = ancho_pagina - 2 * MARGEN_FICHA
+    arriba = alto_pagina - MARGEN_FICHA
+
+    celdas = []  # (x, y de abajo, ancho, etiqueta, campo, x del valor)
+    y = arriba
+    for fila in CELDAS_FICHA:
+        y -= ALTO_INFO_FICHA
+        x = izquierda
+        total = sum(relativo for _, _, relativo in fila)
+        for etiqueta, campo, relativo in fila:
+            ancho_celda = ancho * relativo / total
+            celdas.append((x, y, ancho_celda, etiqueta, campo, x + 6 + stringWidth(etiqueta, "Helvetica-Bold", 7) + 3))
+            x += ancho_celda
+
+    # Las filas se achican si un plan largo no entra en la página
+    inicio_grilla = y
+    disponible = inicio_grilla - ALTO_ENCABEZADO_FICHA - ALTO_INFO_FICHA - MARGEN_FICHA
+    alto_fila = min(ALTO_FILA_FICHA, disponible / filas)
+    ancho_columna = ancho / COLUMNAS_FICHA
+    columnas = [izquierda + i * ancho_columna for i in range(COLUMNAS_FICHA)]
+    subcolumnas = []
+    x = 0
+    for titulo, relativo in SUBCOLUMNAS_FICHA:
+        subcolumnas.append((x, ancho_columna * relativo, titulo))
+        x += ancho_columna * relativo
+    fin_grilla = inicio_grilla - ALTO_ENCABEZADO_FICHA - filas * alto_fila
+
+    return {
+        "izquierda": izquierda, "ancho": ancho, "arriba": arriba,
+        "celdas": celdas,
+        "inicio_grilla": inicio_grilla, "fin_grilla": fin_grilla, "alto_fila": alto_fila,
+        "columnas": columnas, "ancho_columna": ancho_columna, "subcolumnas": subcolumnas,
+        "abajo": fin_grilla - ALTO_INFO_FICHA,
+    }
+
+def _dibujar_grilla(c, g, filas, num_cuotas):
+    """Lo fijo de la ficha (bordes, títulos, grilla y números de cuota), igual para todas las de 'num_cuotas' cuotas."""
+    # Celdas de datos con sus etiquetas
+    for x, y, ancho_celda, etiqueta, campo, _ in g["celdas"]:
+        if campo is None:
+            c.setFillColor(colors.HexColor("#e0e0e0"))
+            c.rect(x, y, ancho_celda, ALTO_INFO_FICHA, stroke=0, fill=1)
+            c.setFillColor(colors.black)
+            c.setFont("Helvetica-Bold", 11)
+            c.drawCentredString(x + ancho_celda / 2, y + 8, etiqueta)
+            continue
+        if campo == "telefono":
+            c.setFillColor(colors.HexColor("#fff3cd"))
+            c.rect(x, y, ancho_celda, ALTO_INFO_FICHA, stroke=0, fill=1)
+        c.setFillColor(colors.HexColor("#333333"))
+        c.setFont("Helvetica-Bold", 7)
+        c.drawString(x + 6, y + 8, etiqueta)
+        c.setLineWidth(0.75)
+        c.line(x + ancho_celda, y, x + ancho_celda, y + ALTO_INFO_FICHA)
+
+    # Encabezado de las columnas de cuotas
+    c.setFillColor(colors.HexColor("#f0f0f0"))
+    c.rect(g["izquierda"], g["inicio_grilla"] - ALTO_ENCABEZADO_FICHA, g["ancho"], ALTO_ENCABEZADO_FICHA, stroke=0, fill=1)
+    c.setFillColor(colors.black)
+    c.setFont("Helvetica-Bold", 8)
+    y_titulos = g["inicio_grilla"] - ALTO_ENCABEZADO_FICHA + 7
+    for columna in g["columnas"]:
+        for x, ancho_sub, titulo in g["subcolumnas"]:
+            c.drawCentredString(columna + x + ancho_sub / 2, y_titulos, titulo)
+
+    # Líneas finas de la grilla
+    c.setStrokeColor(colors.HexColor("#cccccc"))
+    c.setLineWidth(0.75)
+    y_filas = g["inicio_grilla"] - ALTO_ENCABEZADO_FICHA
+    for i in range(1, filas):
+        y = y_filas - i * g["alto_fila"]
+        c.line(g["izquierda"], y, g["izquierda"] + g["ancho"], y)
+    for columna in g["columnas"]:
+        for x, _, _ in g["subcolumnas"][1:]:
+            c.line(columna + x, g["inicio_grilla"], columna + x, g["fin_grilla"])
+
+    # Números de cuota, de arriba hacia abajo y de izquierda a derecha
+    c.setFillColor(colors.HexColor("#555555"))
+    c.setFont("Helvetica-Bold", 8)
+    _, ancho_numero, _ = g["subcolumnas"][0]
+    for cuota in range(num_cuotas):
+        columna, fila = divmod(cuota, filas)
+        y = y_filas - (fila + 1) * g["alto_fila"] + (g["alto_fila"] - 8) / 2 + 1
+        c.drawCentredString(g["columnas"][columna] + ancho_numero / 2, y, str(cuota + 1))
+
+    # Bordes gruesos: marco, filas de datos, encabezado de la grilla, columnas y pie
+    c.setStrokeColor(colors.black)
+    c.setLineWidth(1.5)
+    c.rect(g["izquierda"], g["abajo"], g["ancho"], g["arriba"] - g["abajo"])
+    for y in (g["arriba"] - ALTO_INFO_FICHA, g["inicio_grilla"], g["inicio_grilla"] - ALTO_ENCABEZADO_FICHA, g["fin_grilla"]):
+        c.line(g["izquierda"], y, g["izquierda"] + g["ancho"], y)
+    for columna in g["columnas"][1:]:
+        c.line(columna, g["inicio_grilla"], columna, g["fin_grilla"])
+    c.setFillColor(colors.black)
+
+def _dibujar_datos_ficha(c, g, datos):
+    """Lo propio de cada crédito, sobre la grilla."""
+    valores = dict(datos, plan=f"{datos['num_cuotas']} x ${datos['monto_cuota'] or 0:.0f} ({datos['frecuencia']})")
+    c.setFillColor(colors.black)
+    c.setFont("Helvetica-Bold", 9)
+    for _, y, _, _, campo, x_valor in g["celdas"]:
+        if campo and valores[campo] is not None:
+            c.drawString(x_valor, y + 8, str(valores[campo]))
+
+    c.setFont("Helvetica", 8)
+    c.setFillColor(colors.HexColor("#666666"))
+    c.drawString(g["izquierda"] + 8, g["abajo"] + 9, f"Documento generado el {datos['generado']}")
+    c.setFillColor(colors.black)
+    c.setFont("Helvetica-Bold", 8)
+    c.drawRightString(g["izquierda"] + g["ancho"] - 8, g["abajo"] + 9, f"TOTAL A PAGAR: ${datos['monto_total'] or 0:.2f}")
+
+def escribir_fichas(destino, lista_datos):
+    """
+    Fichas de pago (una por página) a partir de datos_ficha(). Lo fijo de cada ficha se dibuja
+    una sola vez por cantidad de cuotas como formulario del PDF y las demás lo reutilizan.
+    """
+    c = canvas.Canvas(destino, pagesize=A4)
+    formularios = set()
+    for datos in lista_datos:
+        filas = filas_ficha(datos["num_cuotas"])
+        g = _geometria_ficha(filas)
+        formulario = f"grilla_{datos['num_cuotas']}"
+        if formulario not in formularios:
+            c.beginForm(formulario)
+            _dibujar_grilla(c, g, filas, datos["num_cuotas"])
+            c.endForm()
+            formularios.add(formulario)
+        c.doForm(formulario)
+        _dibujar_datos_ficha(c, g, datos)
+        c.showPage()
+    c.save()
+
+def renderizar_fichas(lista_datos):
+    """Bytes de un PDF con las fichas de 'lista_datos'; corre en los procesos de app/lotes_pdf.py."""
+    buffer = BytesIO()
+    escribir_fichas(buffer, lista_datos)
+    return buffer.getvalue()
@@ -0,0 +1,87 @@
+"""
+Estados de cuenta en lote: el de cada crédito activo, en un solo PDF o en un ZIP, para el cierre de mes.
+
+Corre como trabajo en segundo plano (ver app/trabajos.py). Los créditos activos se recorren por
+lotes y los pagos de cada lote se traen en una sola consulta, ya ordenados por crédito y fecha;
+los documentos se dibujan en tandas de TANDA en el pool de app/lotes_pdf.py.
+"""
+from itertools import groupby
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+from . import models, documentos, exportacion, lotes_pdf
+
+TANDA = 10
+
+FILTRO_ACTIVOS = models.Credito.activo == True
+
+def _consulta_creditos():
+    """Consulta Core con los datos de crédito y cliente del estado de cuenta (el id del crédito primero)."""
+    return (
+        select(
+            models.Credito.id, models.Credito.fecha_inicio, models.Credito.activo, models.Credito.monto_prestado,
+            models.Credito.monto_total, models.Credito.recargos, models.Credito.total_pagado, models.Credito.saldo,
+            models.Cliente.nombre, models.Cliente.dni, models.Cliente.direccion,
+        )
+        .join(models.Cliente, models.Credito.cliente_id == models.Cliente.id)
+        .where(FILTRO_ACTIVOS)
+    )
+
+def _datos(fila, pagos):
+    credito_id, fecha_inicio, activo, monto_prestado, monto_total, recargos, total_pagado, saldo, nombre, dni, direccion = fila
+    # Igual que documentos.datos_estado_cuenta, sin cargar los objetos
+    return {
+        "cliente": {"nombre": nombre, "dni": dni, "direccion": direccion},
+        "credito": {
+            "id": credito_id,
+            "fecha_inicio": fecha_inicio.strftime('%d/%m/%Y'),
+            "activo": activo,
+            "monto_prestado": monto_prestado,
+            "monto_total": monto_total,
+            "recargos": recargos,
+            "total_pagado": total_pagado,
+            "saldo": saldo,
+        },
+        "pagos": pagos,
+    }
+
+def _lotes_datos(db: Session):
+    """Lotes de datos_estado_cuenta: una consulta para los créditos del lote y otra para todos sus pagos."""
+    for lote in exportacion.lotes_consulta(db, _consulta_creditos(), models.Credito.id):
+        pagos = db.execute(
+            select(models.Pago.credito_id, models.Pago.fecha, models.Pago.monto)
+            .where(models.Pago.credito_id.in_([fila[0] for fila in lote]))
+            .order_by(models.Pago.credito_id, models.Pago.fecha, models.Pago.id)
+        ).all()
+        por_credito = {
+            credito_id: [(fecha.strftime('%d/%m/%Y'), monto) for _, fecha, monto in filas]
+            for credito_id, filas in groupby(pagos, key=lambda pago: pago[0])
+        }
+        yield [_datos(fila, por_credito.get(fila[0], [])) for fila in lote]
+
+def _tandas(db: Session):
+    """(ids de los créditos, sus datos) de a TANDA, para lotes_pdf.en_orden."""
+    for lote in _lotes_datos(db):
+        for inicio in range(0, len(lote), TANDA):
+            tanda = lote[inicio:inicio + TANDA]
+            yield [datos["credito"]["id"] for datos in tanda], tanda
+
+def escribir_estados_cuenta(db: Session, destino, formato, progreso=None):
+    """
+    Escribe en 'destino' (archivo abierto) los estados de cuenta de todos los créditos activos,
+    como un solo PDF (formato 'pdf') o un ZIP con uno por crédito ('zip'). 'progreso' recibe la
+    fracción de créditos ya escritos.
+    """
+    total = db.query(func.count(models.Credito.id)).filter(FILTRO_ACTIVOS).scalar()
+    hechos = 0
+
+    def estados():
+        nonlocal hechos
+        for credito_ids, pdfs in lotes_pdf.en_orden(documentos.renderizar_estados_cuenta, _tandas(db)):
+            for credito_id, pdf in zip(credito_ids, pdfs):
+                yield f"estado_cuenta_{credito_id}.pdf", pdf
+            hechos += len(credito_ids)
+            if progreso and total:
+                progreso(hechos / total)
+
+    for bloque in lotes_pdf.en_bloques(lotes_pdf.PARTES[formato](estados())):
+        destino.write(bloque)
@@ -0,0 +1,329 @@
+"""
+Exportación de la cartera en streaming: Excel, CSV y Parquet.
+
+Las tablas se recorren por lotes (paginación por id) y cada lote se convierte y se envía antes
+de leer el siguiente, así que la memoria no crece con la cantidad de filas.
+- Excel: cada lote de créditos se calcula con el motor vectorizado y sus filas salen como XML
+  comprimido de la hoja apenas se arma (app/libro_xlsx.py): el libro se envía mientras se escribe.
+- CSV y Parquet: cada lote sale como filas de CSV o como un row group de Parquet apenas se arma.
+  Parquet necesita pyarrow, que es opcional.
+Las exportaciones incrementales traen sólo las filas cambiadas (actualizado_en) desde la marca
+de la exportación anterior y registran la suya al terminar (tabla marcas_exportacion). Las bajas
+se exportan aparte, como la tabla 'eliminaciones' que llenan los triggers de DDL_ELIMINACIONES.
+"""
+import importlib.util
+from datetime import date, datetime, timedelta
+import pandas as pd
+from sqlalchemy import and_, or_, func, select, text
+from sqlalchemy.orm import Session
+from . import models, database, motor_creditos, libro_xlsx
+
+TIPO_XLSX = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+TIPOS_MEDIA = {
+    "csv": "text/csv; charset=utf-8",
+    "parquet": "application/vnd.apache.parquet",
+}
+FORMATOS = tuple(TIPOS_MEDIA)
+
+# Créditos por lote y bytes por bloque enviado
+TAMANO_LOTE = 5000
+TAMANO_BLOQUE = 64 * 1024
+# Lo cambiado en los últimos segundos queda para la próxima exportación incremental,
+# así no se pierde una transacción que empezó antes de la marca y todavía no confirmó
+MARGEN_MARCA = timedelta(seconds=5)
+
+COLUMNAS_REPORTE = [
+    "CTO", "Nombre y Apellido", "Domicilio part. y laboral", "D.N.I",
+    "Fecha Inicio del credito", "Fecha Final del credito", "cantidad total de dias",
+    "Dias Abonados", "Dias Pendientes", "Plan. Pagos", "Capital", "Monto Devolver",
+    "Cuota Semanal", "Acumulado $$$", "Pendiente $$$", "Semanas Abonadas",
+    "Semanas Pendientes", "Mes abonado", "MES PENDIENTE",
+]
+COLUMNAS_PAGOS = ["ID Pago", "CTO", "Nombre y Apellido", "D.N.I", "Fecha", "Monto", "Nota"]
+COLUMNAS_CLIENTES = [
+    "ID Cliente", "Nombre y Apellido", "Domicilio", "Lugar de trabajo", "Telefono", "D.N.I",
+    "Fecha de registro",
+]
+COLUMNAS_ELIMINACIONES = ["ID", "Tabla", "ID Fila", "Eliminado en"]
+
+# Tablas cuyas bajas se registran en 'eliminaciones' (con la misma hora que guarda SQLAlchemy)
+TABLAS_ELIMINACIONES = ("clientes", "creditos", "pagos")
+DDL_ELIMINACIONES = [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {tabla}_eliminaciones_ad AFTER DELETE ON {tabla} BEGIN
+        INSERT INTO eliminaciones(tabla, fila_id, eliminado_en)
+        VALUES ('{tabla}', old.id, strftime('%Y-%m-%d %H:%M:%f000', 'now', 'localtime'));
+    END
+    """
+    for tabla in TABLAS_ELIMINACIONES
+]
+
+def lotes_creditos(db: Session, filtro=None, tamano=TAMANO_LOTE):
+    """Recorre los créditos por lotes de 'tamano' ordenados por id (DataFrames de cargar_creditos)."""
+    ultimo_id = 0
+    while True:
+        condicion = models.Credito.id > ultimo_id
+        if filtro is not None:
+            condicion = and_(filtro, condicion)
+        lote = motor_creditos.cargar_creditos(db, condicion, limite=tamano)
+        if lote.empty:
+            return
+        yield lote
+        ultimo_id = int(lote["id"].iloc[-1])
+
+def lotes_consulta(db: Session, consulta, columna_id, tamano=TAMANO_LOTE):
+    """
+    Recorre una consulta Core por lotes de 'tamano' filas ordenadas por 'columna_id' (la primera
+    columna de la consulta). Cada lote es una consulta corta: no queda un cursor abierto, que en
+    SQLite bloquearía la carga de pagos mientras el cliente descarga el archivo.
+    """
+    ultimo_id = 0
+    while True:
+        filas = db.execute(consulta.where(columna_id > ultimo_id).order_by(columna_id).limit(tamano)).all()
+        if not filas:
+            return
+        yield filas
+        ultimo_id = filas[-1][0]
+
+def hoja_reporte(creditos, estados):
+    """Filas del reporte completo (columnas de COLUMNAS_REPORTE) para un lote ya calculado por el motor."""
+    return pd.DataFrame({
+        "CTO": creditos["id"],
+        "Nombre y Apellido": creditos["cliente_nombre"],
+        "Domicilio part. y laboral": [f"{d} / {t or 'N/A'}" for d, t in zip(creditos["cliente_direccion"], creditos["cliente_lugar_trabajo"])],
+        "D.N.I": creditos["cliente_dni"],
+        "Fecha Inicio del credito": pd.Series(estados["fecha_inicio"]).dt.date,
+        "Fecha Final del credito": pd.Series(estados["fecha_final"]).dt.date,
+        "cantidad total de dias": estados["dias_calendario"],
+        "Dias Abonados": motor_creditos.redondear(estados["dias_calendario_abonados"]),
+        "Dias Pendientes": motor_creditos.redondear(estados["dias_calendario_pendientes"]),
+        # Plan de Pagos String
+        "Plan. Pagos": [f"{sem} semanas ${total:,.2f}" for sem, total in zip(creditos["semanas"], creditos["monto_total"])],
+        "Capital": creditos["monto_prestado"],
+        "Monto Devolver": creditos["monto_total"],
+        "Cuota Semanal": creditos["pago_semanal"],
+        "Acumulado $$$": estados["pagado"],
+        "Pendiente $$$": estados["pendiente_sin_recargos"],
+        "Semanas Abonadas": motor_creditos.redondear(estados["semanas_abonadas"]),
+        "Semanas Pendientes": motor_creditos.redondear(estados["semanas_pendientes"]),
+        "Mes abonado": motor_creditos.redondear(estados["meses_abonados"]),
+        "MES PENDIENTE": motor_creditos.redondear(estados["meses_pendientes"])
+    })
+
+def _hojas_creditos(db: Session, hoy, tamano, filtro=None):
+    for creditos in lotes_creditos(db, filtro, tamano):
+        yield hoja_reporte(creditos, motor_creditos.calcular_estado(creditos, hoy=hoy))
+
+def _hojas_pagos(db: Session, hoy, tamano, filtro=None):
+    consulta = select(
+        models.Pago.id, models.Pago.credito_id, models.Cliente.nombre, models.Cliente.dni,
+        models.Pago.fecha, models.Pago.monto, models.Pago.nota,
+    ).outerjoin(models.Credito, models.Credito.id == models.Pago.credito_id
+    ).outerjoin(models.Cliente, models.Cliente.id == models.Credito.cliente_id)
+    if filtro is not None:
+        consulta = consulta.where(filtro)
+    for filas in lotes_consulta(db, consulta, models.Pago.id, tamano):
+        yield pd.DataFrame(filas, columns=COLUMNAS_PAGOS)
+
+def _hojas_clientes(db: Session, hoy, tamano, filtro=None):
+    cliente = models.Cliente
+    consulta = select(
+        cliente.id, cliente.nombre, cliente.direccion, cliente.lugar_trabajo, cliente.telefono,
+        cliente.dni, cliente.fecha_registro,
+    )
+    if filtro is not None:
+        consulta = consulta.where(filtro)
+    for filas in lotes_consulta(db, consulta, cliente.id, tamano):
+        yield pd.DataFrame(filas, columns=COLUMNAS_CLIENTES)
+
+def _hojas_eliminaciones(db: Session, hoy, tamano, filtro=None):
+    eliminacion = models.Eliminacion
+    consulta = select(eliminacion.id, eliminacion.tabla, eliminacion.fila_id, eliminacion.eliminado_en)
+    if filtro is not None:
+        consulta = consulta.where(filtro)
+    for filas in lotes_consulta(db, consulta, eliminacion.id, tamano):
+        yield pd.DataFrame(filas, columns=COLUMNAS_ELIMINACIONES)
+
+# Tabla exportable: (columnas, generador de DataFrames por lote)
+TABLAS = {
+    "creditos": (COLUMNAS_REPORTE, _hojas_creditos),
+    "pagos": (COLUMNAS_PAGOS, _hojas_pagos),
+    "clientes": (COLUMNAS_CLIENTES, _hojas_clientes),
+    "eliminaciones": (COLUMNAS_ELIMINACIONES, _hojas_eliminaciones),
+}
+
+def asegurar_registro_eliminaciones(engine):
+    """Crea los triggers que registran las bajas en 'eliminaciones' si no existen."""
+    with engine.begin() as conn:
+        for ddl in DDL_ELIMINACIONES:
+            conn.execute(text(ddl))
+
+def reiniciar_incrementales(db: Session):
+    """
+    Olvida las marcas y las bajas registradas, para después de reemplazar toda la cartera
+    (import_data.py): los ids cambian, así que la próxima exportación incremental de cada tabla
+    sale completa y quien sincroniza reemplaza la tabla en lugar de aplicar cambios.
+    No confirma: va en la transacción del reemplazo.
+    """
+    db.query(models.MarcaExportacion).delete(synchronize_session=False)
+    db.query(models.Eliminacion).delete(synchronize_session=False)
+
+def filtro_cambios(tabla, desde, hasta):
+    """
+    Condición de las filas de 'tabla' cambiadas entre 'desde' (None: desde siempre) y 'hasta' (excluido).
+    Créditos y pagos también cuentan como cambiados si cambió su cliente: el nombre y el DNI van en la fila.
+    Las bajas no cambian: cuentan por el momento en que se borró la fila.
+    """
+    if tabla == "eliminaciones":
+        eliminado = models.Eliminacion.eliminado_en
+        return eliminado < hasta if desde is None else and_(eliminado >= desde, eliminado < hasta)
+
+    cliente, credito, pago = models.Cliente, models.Credito, models.Pago
+    propia = {"clientes": cliente, "creditos": credito, "pagos": pago}[tabla].actualizado_en
+    if desde is None:
+        return propia < hasta
+
+    # Subconsultas no correlacionadas: las consultas de exportación ya unen créditos y clientes
+    clientes_cambiados = select(cliente.id).where(cliente.actualizado_en >= desde, cliente.actualizado_en < hasta).correlate(None)
+    if tabla == "clientes":
+        por_cliente = None
+    elif tabla == "creditos":
+        por_cliente = credito.cliente_id.in_(clientes_cambiados)
+    else:
+        por_cliente = pago.credito_id.in_(select(credito.id).where(credito.cliente_id.in_(clientes_cambiados)).correlate(None))
+    cambiada = propia >= desde if por_cliente is None else or_(propia >= desde, por_cliente)
+    # Las filas nuevas después de 'hasta' quedan para la próxima, aunque su cliente haya cambiado antes
+    return and_(propia < hasta, cambiada)
+
+def ultima_marca(db: Session, tabla):
+    """'hasta' de la última exportación incremental de 'tabla' (None si nunca se exportó)."""
+    marca = models.MarcaExportacion
+    return db.query(func.max(marca.hasta)).filter(marca.tabla == tabla).scalar()
+
+def hasta_cambios():
+    """Marca de una exportación incremental que empieza ahora."""
+    return datetime.now() - MARGEN_MARCA
+
+def hojas_reporte(db: Session, hoy=None, tamano_lote=TAMANO_LOTE, progreso=None):
+    """
+    Hoja del reporte completo de créditos para libro_xlsx.partes_xlsx, recorriendo la cartera por lotes.
+    'progreso', si se pasa, se llama después de cada lote con la fracción de créditos escritos.
+    """
+    hoy = hoy or date.today()
+    total = db.query(func.count(models.Credito.id)).scalar() if progreso else 0
+
+    def lotes():
+        escritos = 0
+        for hoja in _hojas_creditos(db, hoy, tamano_lote):
+            yield hoja
+            escritos += len(hoja)
+            if progreso:
+                progreso(min(escritos / total, 1.0) if total else 1.0)
+
+    return [("Sheet1", COLUMNAS_REPORTE, lotes())]
+
+def escribir_reporte(db: Session, destino, hoy=None, tamano_lote=TAMANO_LOTE, progreso=None):
+    """Escribe el reporte completo de créditos en 'destino' (archivo abierto en binario); ver hojas_reporte."""
+    libro_xlsx.escribir_xlsx(destino, hojas_reporte(db, hoy, tamano_lote, progreso))
+
+def stream_reporte(sesion=database.SessionLocal, hoy=None):
+    """
+    Generador con los bytes del reporte para un StreamingResponse: cada lote de créditos sale
+    comprimido apenas se calcula, el primero sin esperar al resto de la cartera.
+    Abre su propia sesión: corre mientras se envía la respuesta, cuando la del request ya se cerró.
+    """
+    db = sesion()
+    try:
+        yield from libro_xlsx.partes_xlsx(hojas_reporte(db, hoy))
+    finally:
+        db.close()
+
+def parquet_disponible():
+    return importlib.util.find_spec("pyarrow") is not None
+
+def _bloques_csv(hojas, columnas):
+    # BOM para que Excel abra los acentos bien; el encabezado sale aunque la tabla esté vacía
+    yield pd.DataFrame(columns=columnas).to_csv(index=False).encode("utf-8-sig")
+    for hoja in hojas:
+        yield hoja.to_csv(index=False, header=False).encode("utf-8")
+
+class SalidaSecuencial:
+    """
+    Archivo de sólo escritura que acumula lo escrito hasta que se lo vacía, para escritores que
+    sólo escriben hacia adelante (ParquetWriter, zipfile sin seek) y enviar su salida por partes.
+    """
+    closed = False
+
+    def __init__(self):
+        self.partes = []
+        self.posicion = 0
+
+    def write(self, datos):
+        datos = bytes(datos)
+        self.partes.append(datos)
+        self.posicion += len(datos)
+        return len(datos)
+
+    def tell(self):
+        return self.posicion
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def vaciar(self):
+        datos = b"".join(self.partes)
+        self.partes = []
+        return datos
+
+def _bloques_parquet(hojas, columnas):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    salida = SalidaSecuencial()
+    escritor = None
+    esquema = None
+    for hoja in hojas:
+        if escritor is None:
+            # Esquema del primer lote; una columna toda vacía no tiene tipo y se toma como texto
+            inferido = pa.Schema.from_pandas(hoja, preserve_index=False)
+            esquema = pa.schema([c.with_type(pa.string()) if pa.types.is_null(c.type) else c for c in inferido])
+            escritor = pq.ParquetWriter(salida, esquema)
+        escritor.write_table(pa.Table.from_pandas(hoja, schema=esquema, preserve_index=False))
+        yield salida.vaciar()
+
+    if escritor is None:
+        escritor = pq.ParquetWriter(salida, pa.schema([(c, pa.string()) for c in columnas]))
+    escritor.close()
+    yield salida.vaciar()
+
+def stream_tabla(tabla, formato, sesion=database.SessionLocal, hoy=None, tamano_lote=TAMANO_LOTE, cambios=None, registrar=False):
+    """
+    Generador con los bytes de 'tabla' (ver TABLAS) en 'formato' (csv o parquet) para un
+    StreamingResponse: cada lote se envía apenas se arma. Abre su propia sesión, como stream_reporte.
+    Con 'cambios' = (desde, hasta) sólo van las filas cambiadas en ese intervalo; con 'registrar',
+    una vez enviado todo se guarda la marca para que la próxima incremental siga desde 'hasta'
+    (si la descarga se corta, no se registra y la próxima repite el intervalo).
+    """
+    columnas, hojas = TABLAS[tabla]
+    bloques = _bloques_csv if formato == "csv" else _bloques_parquet
+    filtro = filtro_cambios(tabla, *cambios) if cambios else None
+    filas = 0
+
+    def contar(lotes):
+        nonlocal filas
+        for hoja in lotes:
+            filas += len(hoja)
+            yield hoja
+
+    db = sesion()
+    try:
+        yield from bloques(contar(hojas(db, hoy or date.today(), tamano_lote, filtro)), columnas)
+        if cambios and registrar:
+            desde, hasta = cambios
+            db.add(models.MarcaExportacion(tabla=tabla, formato=formato, desde=desde, hasta=hasta, filas=filas))
+            db.commit()
+    finally:
+        db.close()
@@ -0,0 +1,53 @@
+"""
+Fichas de pago en lote: las de todos los créditos que empezaron en un rango de fechas (por ej.
+los de esta semana) o de una lista de créditos, en un solo PDF para imprimir de una vez.
+
+Se dibujan en tandas de TANDA en el pool de app/lotes_pdf.py; cada tanda es un PDF donde lo
+fijo de la ficha se dibuja una vez por plan (ver documentos.escribir_fichas), y las tandas se
+unen y envían en orden a medida que terminan.
+"""
+from datetime import date
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+from . import models, database, documentos, exportacion, lotes_pdf
+
+TANDA = 50
+
+def consulta_fichas(desde=None, hasta=None, credito_ids=None):
+    """Consulta Core con las columnas de crédito y cliente que usa documentos.datos_ficha (el id del crédito primero)."""
+    consulta = (
+        select(
+            models.Credito.id, models.Credito.cliente_id, models.Credito.semanas, models.Credito.frecuencia,
+            models.Credito.pago_semanal, models.Credito.fecha_inicio, models.Credito.monto_total,
+            models.Cliente.nombre, models.Cliente.telefono,
+        )
+        .join(models.Cliente, models.Credito.cliente_id == models.Cliente.id)
+    )
+    if credito_ids:
+        consulta = consulta.where(models.Credito.id.in_(credito_ids))
+    if desde:
+        consulta = consulta.where(models.Credito.fecha_inicio >= desde)
+    if hasta:
+        consulta = consulta.where(models.Credito.fecha_inicio <= hasta)
+    return consulta
+
+def contar_fichas(db: Session, consulta):
+    return db.execute(select(func.count()).select_from(consulta.subquery())).scalar()
+
+def _tandas(db: Session, consulta, generado):
+    """(número de tanda, datos_ficha de sus créditos) de a TANDA, para lotes_pdf.en_orden."""
+    numero = 0
+    for lote in exportacion.lotes_consulta(db, consulta, models.Credito.id):
+        for inicio in range(0, len(lote), TANDA):
+            numero += 1
+            # La fila tiene las columnas del crédito y del cliente con sus nombres
+            yield numero, [documentos.datos_ficha(fila, fila, generado) for fila in lote[inicio:inicio + TANDA]]
+
+def stream_fichas(consulta, sesion=database.SessionLocal, hoy=None):
+    """Generador con los bytes del PDF de fichas para un StreamingResponse. Abre su propia sesión."""
+    db = sesion()
+    try:
+        tandas = lotes_pdf.en_orden(documentos.renderizar_fichas, _tandas(db, consulta, hoy or date.today()))
+        yield from lotes_pdf.en_bloques(lotes_pdf.partes_pdf((f"fichas_{numero}.pdf", pdf) for numero, pdf in tandas))
+    finally:
+        db.close()
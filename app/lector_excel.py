@@ -0,0 +1,249 @@
+"""
+Lectura por streaming de la planilla de clientes (datos_clientes.xlsx).
+
+La hoja se recorre fila por fila con openpyxl en modo read_only (iter_rows), sin armar la grilla
+completa como pd.read_excel: la planilla tiene una columna por fecha de pago y casi todas sus
+celdas están vacías. Cada fila se convierte en un registro con el cliente, el crédito y la lista
+de pagos (sólo las celdas con monto), así la memoria no depende de cuántas filas ni cuántas
+columnas de fecha tenga la hoja. Lo usan import_data.py y los scripts de control.
+"""
+import datetime
+import functools
+import math
+import re
+import openpyxl
+import pandas as pd
+
+# Valores distintos que se recuerdan ya interpretados (montos, fechas): en la planilla se repiten mucho
+MEMORIA = 4096
+
+# Textos que pd.read_excel toma como celda vacía
+VACIOS = {"", "#N/A", "N/A", "NA", "n/a", "NaN", "nan", "NULL", "null", "None"}
+
+def parse_date(date_val):
+    """Intenta parsear una fecha de varios formatos."""
+    if pd.isna(date_val) or str(date_val).strip().lower() == 'nat':
+        return None
+
+    if isinstance(date_val, datetime.datetime):
+        return date_val.date()
+
+    date_str = str(date_val).strip()
+
+    # Formatos comunes: DD.MM.YY, DD/MM/YYYY, YYYY-MM-DD
+    formats = [
+        "%d.%m.%y", "%d.%m.%Y",
+        "%d/%m/%y", "%d/%m/%Y",
+        "%Y-%m-%d"
+    ]
+
+    for fmt in formats:
+        try:
+            return datetime.datetime.strptime(date_str, fmt).date()
+        except ValueError:
+            continue
+
+    return None
+
+def clean_money(val):
+    """Extrae un valor monetario de una cadena sucia, evitando concatenar números de texto."""
+    if pd.isna(val):
+        return 0.0
+
+    # Si ya es número, devolverlo directamente
+    if isinstance(val, (int, float)):
+        return float(val)
+
+    s = str(val).strip()
+
+    # Caso especial: Multiplicación explícita (ej: 110*19200)
+    if '*' in s:
+        parts = s.split('*')
+        try:
+            # Limpiar cada parte individualmente
+            p1 = clean_money(parts[0])
+            p2 = clean_money(parts[1])
+            if p1 > 0 and p2 > 0:
+                return p1 * p2
+        except:
+            pass
+
+    # Si hay signo $, tomar lo que sigue
+    if '$' in s:
+        s = s.split('$')[1]
+
+    # Intentar conversión directa primero (maneja "540000.0" correctamente)
+    try:
+        # Eliminar espacios y símbolos de moneda comunes antes de intentar
+        clean_s = s.replace('$', '').replace(' ', '')
+        return float(clean_s)
+    except:
+        pass
+
+    # Estrategia: Buscar todas las secuencias numéricas posibles
+    matches = re.findall(r'[\d]+[.,\d]*', s)
+
+    if not matches:
+        return 0.0
+
+    candidates = []
+    for m in matches:
+        try:
+            # Heurística para detectar separadores
+            # Si tiene punto y coma, el último es el decimal
+            clean_m = m
+            if '.' in m and ',' in m:
+                if m.rfind('.') > m.rfind(','): # Estilo US: 1,000.00
+                    clean_m = m.replace(',', '')
+                else: # Estilo AR/EU: 1.000,00
+                    clean_m = m.replace('.', '').replace(',', '.')
+            elif '.' in m:
+                # Solo puntos.
+                # Si el punto está seguido de 3 dígitos exactos, asumimos miles (ej: 100.000)
+                # Si no, asumimos decimal (ej: 540000.0 o 10.5)
+                parts = m.split('.')
+                if len(parts) > 1 and len(parts[-1]) == 3:
+                    clean_m = m.replace('.', '')
+                else:
+                    clean_m = m # Dejar el punto como decimal
+            elif ',' in m:
+                # Solo comas.
+                # Si la coma está seguida de 3 dígitos, asumimos miles (ej: 100,000)
+                # Si no, asumimos decimal (ej: 10,5)
+                parts = m.split(',')
+                if len(parts) > 1 and len(parts[-1]) == 3:
+                    clean_m = m.replace(',', '')
+                else:
+                    clean_m = m.replace(',', '.')
+
+            val_float = float(clean_m)
+            candidates.append(val_float)
+        except:
+            continue
+
+    if not candidates:
+        return 0.0
+
+    return max(candidates)
+
+def is_payment_column(col_name):
+    return re.match(r'^\d{1,2}\.\d{1,2}\.\d{2,4}$', str(col_name)) is not None
+
+def normalizar_cto(valor):
+    """Número de contrato como texto ('2762' para 2762.0 o '2762.0'); None si la celda está vacía."""
+    if pd.isna(valor):
+        return None
+    texto = str(valor).strip()
+    try:
+        numero = float(texto)
+    except ValueError:
+        return texto or None
+    if math.isnan(numero):
+        return None
+    return str(int(numero)) if numero.is_integer() else texto
+
+def _encabezados(valores):
+    """Nombres de las columnas como los deja pd.read_excel (más el strip de la importación)."""
+    nombres, vistos = [], {}
+    for posicion, valor in enumerate(valores):
+        nombre = f"Unnamed: {posicion}" if valor is None else str(valor)
+        if nombre in vistos:
+            # Repetidas: "31.10.22", "31.10.22.1", ... (la repetida ya no es una columna de pago)
+            vistos[nombre] += 1
+            nombre = f"{nombre}.{vistos[nombre]}"
+        else:
+            vistos[nombre] = 0
+        nombres.append(nombre.strip())
+    return nombres
+
+def _celda(valor):
+    if isinstance(valor, str) and valor in VACIOS:
+        return None
+    return valor
+
+def columnas(ruta, hoja=0):
+    """Nombres de las columnas de la hoja (su primera fila), sin leer el resto."""
+    libro = openpyxl.load_workbook(ruta, read_only=True, data_only=True)
+    try:
+        return _encabezados(next(libro.worksheets[hoja].iter_rows(values_only=True), ()))
+    finally:
+        libro.close()
+
+def filas(ruta, hoja=0):
+    """
+    Filas de la hoja como (número de fila en el Excel, {columna: valor}), de a una; las celdas
+    vacías son None y las fórmulas traen su último valor calculado. Como pd.read_excel, las
+    filas vacías del final no se devuelven (las del medio sí).
+    """
+    libro = openpyxl.load_workbook(ruta, read_only=True, data_only=True)
+    try:
+        celdas = libro.worksheets[hoja].iter_rows(values_only=True)
+        encabezados = _encabezados(next(celdas, ()))
+        vacias = 0  # Filas vacías seguidas todavía sin devolver: sólo si después hay datos
+        for numero, valores in enumerate(celdas, start=2):
+            valores = [_celda(valor) for valor in valores]
+            if all(valor is None for valor in valores):
+                vacias += 1
+                continue
+            for vacia in range(numero - vacias, numero):
+                yield vacia, dict.fromkeys(encabezados)
+            vacias = 0
+            yield numero, dict(zip(encabezados, valores))
+    finally:
+        libro.close()
+
+def _texto(valor):
+    """Texto de la celda sin espacios de más; None si está vacía."""
+    if valor is None:
+        return None
+    return str(valor).strip()
+
+def registros(filas):
+    """
+    Registros normalizados de las (número, fila) de 'filas':
+    {"fila", "cliente": {nombre, dni, domicilio}, "credito": {cto, plan, capital, monto_devolver,
+    acumulado, pendiente, fecha_inicio, fecha_final}, "pagos": [(fecha, monto), ...]}.
+    Montos con clean_money y fechas con parse_date; 'pendiente' es None si la celda está vacía
+    y los pagos son sólo los de monto positivo en una columna de fecha válida, en orden.
+    """
+    dinero = functools.lru_cache(maxsize=MEMORIA)(clean_money)
+    fecha = functools.lru_cache(maxsize=MEMORIA)(parse_date)
+    columnas_pago = None
+
+    for numero, fila in filas:
+        if columnas_pago is None:
+            columnas_pago = [(columna, parse_date(columna)) for columna in fila if is_payment_column(columna)]
+            columnas_pago = [(columna, dia) for columna, dia in columnas_pago if dia]
+
+        pagos = []
+        for columna, dia in columnas_pago:
+            valor = fila.get(columna)
+            if valor is not None:
+                monto = dinero(valor)
+                if monto > 0:
+                    pagos.append((dia, monto))
+
+        pendiente = fila.get('Pendiente $$$')
+        yield {
+            "fila": numero,
+            "cliente": {
+                "nombre": _texto(fila.get('Nombre y Apellido')),
+                "dni": _texto(fila.get('D.N.I')),
+                "domicilio": _texto(fila.get('Domicilio part. y laboral')),
+            },
+            "credito": {
+                "cto": normalizar_cto(fila.get('CTO.')),
+                "plan": _texto(fila.get('Plan. Pagos')) or "",
+                "capital": dinero(fila.get('Capital')),
+                "monto_devolver": dinero(fila.get('Monto Devolver')),
+                "acumulado": dinero(fila.get('Acumulado $$$')),
+                "pendiente": None if pendiente is None else dinero(pendiente),
+                "fecha_inicio": fecha(fila.get('Fecha Inicio del credito')),
+                "fecha_final": fecha(fila.get('Fecha Final del credito')),
+            },
+            "pagos": pagos,
+        }
+
+def leer(ruta, hoja=0):
+    """Registros normalizados de la planilla 'ruta', leída por streaming (ver registros)."""
+    return registros(filas(ruta, hoja))
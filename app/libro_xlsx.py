@@ -0,0 +1,132 @@
+"""
+Libros Excel (.xlsx) escritos en streaming: el ZIP se arma a medida que llegan las filas y cada
+lote sale comprimido apenas se escribe, así el primer byte no espera a todo el libro y la
+memoria no crece con la cantidad de filas.
+
+openpyxl en modo 'write_only' no sirve para esto: vuelca cada hoja a un archivo temporal y
+recién arma el ZIP al guardar. Acá el XML de cada hoja va directo a un ZIP de sólo avance
+(exportacion.SalidaSecuencial), con lo mínimo que piden Excel y LibreOffice: celdas de texto
+en línea (sin tabla de textos compartidos), encabezado en negrita y fechas con formato.
+"""
+import math
+import re
+import zipfile
+from datetime import date, datetime
+from xml.sax.saxutils import escape, quoteattr
+from openpyxl.utils import get_column_letter
+
+# Estilos de styles.xml (índices de cellXfs): los mismos formatos de fecha que usa openpyxl
+ESTILO_ENCABEZADO = 1
+ESTILO_FECHA = 2
+ESTILO_FECHA_HORA = 3
+EPOCA_EXCEL = datetime(1899, 12, 30)
+
+# Caracteres de control que XML no admite (openpyxl los rechaza; acá se quitan)
+_ILEGALES = re.compile(r"[\000-\010\013\014\016-\037]")
+
+_ENCABEZADO_XML = '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+_NS = 'xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"'
+_NS_R = 'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships"'
+_TIPO = "application/vnd.openxmlformats-officedocument"
+_RELACION = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+
+ESTILOS = _ENCABEZADO_XML + f"""<styleSheet {_NS}>
+<numFmts count="2"><numFmt numFmtId="164" formatCode="yyyy-mm-dd"/><numFmt numFmtId="165" formatCode="yyyy-mm-dd h:mm:ss"/></numFmts>
+<fonts count="2"><font><sz val="11"/><name val="Calibri"/></font><font><b/><sz val="11"/><name val="Calibri"/></font></fonts>
+<fills count="2"><fill><patternFill patternType="none"/></fill><fill><patternFill patternType="gray125"/></fill></fills>
+<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>
+<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>
+<cellXfs count="4"><xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/><xf numFmtId="0" fontId="1" fillId="0" borderId="0" xfId="0" applyFont="1"/><xf numFmtId="164" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/><xf numFmtId="165" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/></cellXfs>
+<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>
+</styleSheet>"""
+
+def _partes_fijas(nombres):
+    """Archivos del libro que no dependen de las filas: tipos, relaciones, libro y estilos."""
+    hojas = range(1, len(nombres) + 1)
+    tipos = "".join(f'<Override PartName="/xl/worksheets/sheet{n}.xml" ContentType="{_TIPO}.spreadsheetml.worksheet+xml"/>' for n in hojas)
+    libro = "".join(f'<sheet name={quoteattr(nombre)} sheetId="{n}" r:id="rId{n}"/>' for n, nombre in zip(hojas, nombres))
+    relaciones = "".join(f'<Relationship Id="rId{n}" Type="{_RELACION}/worksheet" Target="worksheets/sheet{n}.xml"/>' for n in hojas)
+    return {
+        "[Content_Types].xml": _ENCABEZADO_XML + (
+            '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+            '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+            '<Default Extension="xml" ContentType="application/xml"/>'
+            f'<Override PartName="/xl/workbook.xml" ContentType="{_TIPO}.spreadsheetml.sheet.main+xml"/>'
+            f'<Override PartName="/xl/styles.xml" ContentType="{_TIPO}.spreadsheetml.styles+xml"/>'
+            f"{tipos}</Types>"
+        ),
+        "_rels/.rels": _ENCABEZADO_XML + (
+            '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+            f'<Relationship Id="rId1" Type="{_RELACION}/officeDocument" Target="xl/workbook.xml"/></Relationships>'
+        ),
+        "xl/workbook.xml": _ENCABEZADO_XML + f"<workbook {_NS} {_NS_R}><sheets>{libro}</sheets></workbook>",
+        "xl/_rels/workbook.xml.rels": _ENCABEZADO_XML + (
+            '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+            f'{relaciones}<Relationship Id="rId{len(nombres) + 1}" Type="{_RELACION}/styles" Target="styles.xml"/></Relationships>'
+        ),
+        "xl/styles.xml": ESTILOS,
+    }
+
+def _texto(referencia, valor, estilo=""):
+    valor = escape(_ILEGALES.sub("", valor))
+    return f'<c r="{referencia}" t="inlineStr"{estilo}><is><t xml:space="preserve">{valor}</t></is></c>'
+
+def celda(referencia, valor):
+    """XML de una celda con un valor nativo de Python; '' si está vacía."""
+    if valor is None:
+        return ""
+    if isinstance(valor, bool):
+        return f'<c r="{referencia}" t="b"><v>{int(valor)}</v></c>'
+    if isinstance(valor, (int, float)):
+        if isinstance(valor, float) and not math.isfinite(valor):
+            return ""
+        return f'<c r="{referencia}"><v>{valor!r}</v></c>'
+    if isinstance(valor, datetime):
+        serial = (valor.replace(tzinfo=None) - EPOCA_EXCEL).total_seconds() / 86400
+        return f'<c r="{referencia}" s="{ESTILO_FECHA_HORA}"><v>{serial!r}</v></c>'
+    if isinstance(valor, date):
+        return f'<c r="{referencia}" s="{ESTILO_FECHA}"><v>{(valor - EPOCA_EXCEL.date()).days}</v></c>'
+    return _texto(referencia, str(valor))
+
+def filas_xml(datos, primera, letras):
+    """XML de las filas de un DataFrame a partir de la fila 'primera' de la hoja."""
+    # tolist por columna es mucho más rápido que recorrer el DataFrame fila por fila
+    valores = [datos[c].astype(object).where(datos[c].notna(), None).tolist() for c in datos.columns]
+    filas = []
+    for numero, fila in enumerate(zip(*valores), start=primera):
+        celdas = "".join(celda(f"{letra}{numero}", valor) for letra, valor in zip(letras, fila))
+        filas.append(f'<row r="{numero}">{celdas}</row>')
+    return "".join(filas)
+
+def partes_xlsx(hojas):
+    """
+    Bytes de un libro .xlsx a medida que se escriben. 'hojas' es una lista de (nombre, columnas,
+    lotes): 'lotes' es un iterable de DataFrames con esas columnas, que recién se recorre cuando
+    le toca a su hoja; cada lote sale comprimido antes de pedir el siguiente.
+    """
+    from .exportacion import SalidaSecuencial  # Acá y no arriba: exportacion importa este módulo
+
+    salida = SalidaSecuencial()
+    with zipfile.ZipFile(salida, "w", zipfile.ZIP_DEFLATED) as libro:
+        for nombre, contenido in _partes_fijas([nombre for nombre, _, _ in hojas]).items():
+            libro.writestr(nombre, contenido)
+        yield salida.vaciar()
+
+        for numero, (_, columnas, lotes) in enumerate(hojas, start=1):
+            letras = [get_column_letter(i) for i in range(1, len(columnas) + 1)]
+            encabezado = "".join(_texto(f"{letra}1", str(titulo), f' s="{ESTILO_ENCABEZADO}"') for letra, titulo in zip(letras, columnas))
+            with libro.open(f"xl/worksheets/sheet{numero}.xml", "w") as hoja:
+                hoja.write((_ENCABEZADO_XML + f'<worksheet {_NS}><sheetData><row r="1">{encabezado}</row>').encode())
+                siguiente = 2
+                for lote in lotes:
+                    hoja.write(filas_xml(lote, siguiente, letras).encode())
+                    siguiente += len(lote)
+                    yield salida.vaciar()
+                hoja.write(b"</sheetData></worksheet>")
+            yield salida.vaciar()
+    yield salida.vaciar()
+
+def escribir_xlsx(destino, hojas):
+    """Escribe en 'destino' (archivo abierto en binario) el libro de partes_xlsx(hojas)."""
+    for parte in partes_xlsx(hojas):
+        destino.write(parte)
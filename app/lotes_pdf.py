@@ -0,0 +1,120 @@
+"""
+PDFs en lote (recibos, estados de cuenta): pool de procesos compartido y armado de la salida.
+
+reportlab es Python puro y no suelta el GIL, así que los documentos se dibujan en un pool de
+procesos (uno por núcleo); el proceso del servidor sólo consulta la base y arma la salida.
+Las tandas se encargan por adelantado (hasta VENTANA por proceso) y se entregan en orden a
+medida que terminan, así lo primero sale enseguida sin esperar a todo el lote. Para el PDF
+unido, leer los documentos terminados también va al pool (ver app/unir_pdf.py).
+"""
+import multiprocessing
+import os
+import threading
+import zipfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from . import exportacion
+from . import unir_pdf
+
+PROCESOS = os.cpu_count() or 1
+# Tandas encargadas por proceso antes de esperar a la primera (acota la memoria de lo adelantado)
+VENTANA = 4
+TIPOS_MEDIA = {"pdf": "application/pdf", "zip": "application/zip"}
+# Bytes de PDFs terminados por fragmento que se manda a leer al pool para unirlos (unos 30 recibos)
+TAMANO_FRAGMENTO = 64 * 1024
+
+_pool = None
+_candado = threading.Lock()
+
+def _procesos():
+    """El pool se crea con el primer lote (arrancar los procesos cuesta) y queda para los siguientes."""
+    global _pool
+    with _candado:
+        if _pool is None:
+            # 'spawn' también en Linux: hacer fork del servidor con sus hilos corriendo no es seguro
+            _pool = ProcessPoolExecutor(max_workers=PROCESOS, mp_context=multiprocessing.get_context("spawn"))
+        return _pool
+
+def detener():
+    """Cierra el pool al cerrar la aplicación."""
+    global _pool
+    with _candado:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+def en_orden(funcion, tandas):
+    """
+    Para cada (contexto, argumento) de 'tandas' devuelve (contexto, funcion(argumento)) en el mismo
+    orden, calculado en el pool. Con argumento None no se encarga nada y el resultado es None.
+    'funcion' tiene que poder importarse desde los procesos (una función de módulo).
+    """
+    pool = _procesos()
+    pendientes = deque()
+
+    def resolver():
+        contexto, futuro = pendientes.popleft()
+        return contexto, futuro.result() if futuro else None
+
+    try:
+        for contexto, argumento in tandas:
+            pendientes.append((contexto, pool.submit(funcion, argumento) if argumento is not None else None))
+            if len(pendientes) >= VENTANA * PROCESOS:
+                yield resolver()
+        while pendientes:
+            yield resolver()
+    finally:
+        # Lote cortado (descarga cancelada, error): lo encargado y no empezado no se dibuja
+        for _, futuro in pendientes:
+            if futuro:
+                futuro.cancel()
+
+def _fragmentos(pdfs, tamano=TAMANO_FRAGMENTO):
+    """Los pdf de 'pdfs' agrupados en tandas de al menos 'tamano' bytes, para unir_pdf.fragmento."""
+    tanda = []
+    acumulado = 0
+    for _, pdf in pdfs:
+        tanda.append(pdf)
+        acumulado += len(pdf)
+        if acumulado >= tamano:
+            yield None, tanda
+            tanda = []
+            acumulado = 0
+    if tanda:
+        yield None, tanda
+
+def partes_pdf(pdfs):
+    """
+    Bytes de un solo PDF con las páginas de cada (nombre, pdf) de 'pdfs', a medida que llegan:
+    cada tanda de PDFs terminados se lee y se renumera en el pool y acá sólo se escribe.
+    """
+    union = unir_pdf.UnionPDF()
+    yield union.inicio()
+    for _, fragmento in en_orden(unir_pdf.fragmento, _fragmentos(pdfs)):
+        yield union.agregar(fragmento)
+    yield union.fin()
+
+def partes_zip(pdfs):
+    """Bytes de un ZIP con un archivo por cada (nombre, pdf) de 'pdfs', a medida que llegan."""
+    salida = exportacion.SalidaSecuencial()
+    with zipfile.ZipFile(salida, "w", zipfile.ZIP_DEFLATED) as archivo_zip:
+        for nombre, pdf in pdfs:
+            archivo_zip.writestr(nombre, pdf)
+            yield salida.vaciar()
+    yield salida.vaciar()
+
+PARTES = {"pdf": partes_pdf, "zip": partes_zip}
+
+def en_bloques(partes, tamano=exportacion.TAMANO_BLOQUE):
+    """Junta partes chicas (un recibo son 2 KB) en bloques de al menos 'tamano' bytes."""
+    bloque = []
+    acumulado = 0
+    for parte in partes:
+        bloque.append(parte)
+        acumulado += len(parte)
+        if acumulado >= tamano:
+            yield b"".join(bloque)
+            bloque = []
+            acumulado = 0
+    if bloque:
+        yield b"".join(bloque)
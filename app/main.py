@@ -1,27 +1,43 @@
-from fastapi import FastAPI, Depends, Request, Form, UploadFile, File
-from fastapi.responses import HTMLResponse, StreamingResponse, RedirectResponse
+from fastapi import FastAPI, Depends, Request, Form, UploadFile, File, HTTPException, Query
+from fastapi.responses import HTMLResponse, StreamingResponse, RedirectResponse, FileResponse, Response
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from sqlalchemy.orm import Session
-from sqlalchemy import or_, func
-from . import models, database
+from sqlalchemy import func
+from . import models, database, consultas, metricas, busqueda, sugerencias, motor_creditos, saldos, conciliacion, cuotas, cobranza, morosidad, planes, proyeccion, exportacion, documentos, trabajos, recibos, lotes_pdf, fichas, calendario
 import pandas as pd
 from io import BytesIO
 from datetime import date, datetime, timedelta
 from fastapi.responses import StreamingResponse
-from reportlab.lib.pagesizes import letter
-from reportlab.pdfgen import canvas
-from reportlab.lib.units import inch
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, Image
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.enums import TA_CENTER, TA_RIGHT, TA_LEFT
-from reportlab.lib import colors
 import shutil
+import json
+import math
 import os
+from contextlib import asynccontextmanager
+from typing import List
 
 models.Base.metadata.create_all(bind=database.engine)
-
-app = FastAPI()
+busqueda.asegurar_indice_busqueda(database.engine)
+exportacion.asegurar_registro_eliminaciones(database.engine)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Construir el índice en memoria del autocompletado de clientes y la fila de métricas
+    db = database.SessionLocal()
+    try:
+        sugerencias.indice.cargar(db)
+        metricas.asegurar_metricas(db)
+    finally:
+        db.close()
+    # Conciliar el estado activo/finalizado de los créditos al iniciar y luego periódicamente
+    conciliacion.conciliar()
+    detener_conciliacion = conciliacion.iniciar_conciliacion_periodica()
+    yield
+    detener_conciliacion.set()
+    trabajos.detener()
+    lotes_pdf.detener()
+
+app = FastAPI(lifespan=lifespan)
 
 # Asegurar que existe el directorio de uploads en el directorio actual (fuera del paquete congelado)
 UPLOAD_DIR = "uploads"
@@ -46,165 +62,190 @@ FRASES_BIENVENIDA = [
     "Organización y disciplina, claves del éxito."
 ]
 
-# Nueva configuración detallada de planes
-PLANES_CONFIG = {
-    "Semanal": {
-        "11": {"dias": 55, "factor": 1.92},
-        "14.2": {"dias": 72, "factor": 2.16},
-        "22": {"dias": 110, "factor": 2.64},
-        "32": {"dias": 160, "factor": 2.88},
-        "40": {"dias": 210, "factor": 3.12},
-        "48": {"dias": 240, "factor": 3.375},
-    },
-    "Quincenal": {
-        "6": {"factor": 1.92},
-        "7": {"factor": 2.16},
-        "11": {"factor": 2.64},
-        "16": {"factor": 2.88},
-        "20": {"factor": 3.12},
-        "24": {"factor": 3.375},
-    },
-    "Mensual": {
-        "4": {"factor": 2.16},
-        "6": {"factor": 2.64},
-        "8": {"factor": 2.88},
-        "10": {"factor": 3.12},
-        "12": {"factor": 3.375},
-    }
-}
-
 def get_frase():
     return random.choice(FRASES_BIENVENIDA)
 
 @app.get("/", response_class=HTMLResponse)
 def read_root(request: Request, db: Session = Depends(database.get_db)):
-    clientes_db = db.query(models.Cliente).order_by(models.Cliente.nombre).all()
-    
-    clientes_con_estado = []
-    for c in clientes_db:
-        # Verificar si tiene ALGUN crédito activo
-        creditos_activos = db.query(models.Credito).filter(models.Credito.cliente_id == c.id, models.Credito.activo == True).all()
-        
-        estado = "Sin Crédito"
-        if creditos_activos:
-            # Si tiene al menos uno activo, verificamos si realmente le falta pagar
-            # (Aunque el flag activo debería controlarlo, hacemos doble check o tomamos el estado del último)
-            estado = "Activo"
-            # Podríamos refinar esto para ver si hay atrasos en alguno
-        
-        clientes_con_estado.append({
-            "id": c.id,
-            "nombre": c.nombre,
-            "dni": c.dni,
-            "telefono": c.telefono,
-            "foto_perfil": c.foto_perfil,
-            "estado": estado
-        })
+    # Primera página de clientes con su estado (el resto se carga con /api/clientes)
+    clientes_con_estado, siguiente = consultas.pagina_clientes(db)
 
-    # Métricas Dashboard
-    total_clientes = db.query(models.Cliente).count()
-    total_prestado_historico = db.query(models.Credito).with_entities(func.sum(models.Credito.monto_prestado)).scalar() or 0
-    total_cobrado_historico = db.query(models.Pago).with_entities(func.sum(models.Pago.monto)).scalar() or 0
-    
-    # Total a cobrar incluye recargos
-    total_monto_original = db.query(models.Credito).with_entities(func.sum(models.Credito.monto_total)).scalar() or 0
-    total_recargos = db.query(models.Credito).with_entities(func.sum(models.Credito.recargos)).scalar() or 0
-    total_a_cobrar = total_monto_original + total_recargos
-    
-    por_cobrar = total_a_cobrar - total_cobrado_historico
-    
-    metrics = {
-        "total_clientes": total_clientes,
-        "total_prestado": total_prestado_historico,
-        "total_cobrado": total_cobrado_historico,
-        "por_cobrar": por_cobrar
-    }
+    # Métricas Dashboard (lectura O(1) de la fila materializada)
+    metrics = metricas.obtener_metricas(db)
     
     return templates.TemplateResponse("index.html", {
         "request": request, 
         "clientes": clientes_con_estado, 
+        "siguiente": siguiente,
         "metrics": metrics,
         "frase_bienvenida": get_frase()
     })
 
 @app.get("/buscar", response_class=HTMLResponse)
 def buscar_cliente(q: str, request: Request, db: Session = Depends(database.get_db)):
-    clientes_db = db.query(models.Cliente).filter(
-        or_(
-            models.Cliente.nombre.ilike(f"%{q}%"),
-            models.Cliente.dni.ilike(f"%{q}%")
-        )
-    ).order_by(models.Cliente.nombre).all()
+    # Búsqueda por índice FTS5, ordenada por relevancia
+    clientes_con_estado = consultas.buscar_clientes_con_estado(db, q)
     
-    clientes_con_estado = []
-    for c in clientes_db:
-        # Verificar si tiene ALGUN crédito activo
-        creditos_activos = db.query(models.Credito).filter(models.Credito.cliente_id == c.id, models.Credito.activo == True).all()
-        
-        estado = "Sin Crédito"
-        if creditos_activos:
-            estado = "Activo"
-        
-        clientes_con_estado.append({
-            "id": c.id,
-            "nombre": c.nombre,
-            "dni": c.dni,
-            "telefono": c.telefono,
-            "foto_perfil": c.foto_perfil,
-            "estado": estado
-        })
-    
-    # Recalcular métricas (o pasar vacías si no queremos mostrarlas en búsqueda)
     # Para consistencia visual, pasamos las mismas métricas globales
-    total_clientes = db.query(models.Cliente).count()
-    total_prestado_historico = db.query(models.Credito).with_entities(func.sum(models.Credito.monto_prestado)).scalar() or 0
-    total_cobrado_historico = db.query(models.Pago).with_entities(func.sum(models.Pago.monto)).scalar() or 0
-    
-    # Total a cobrar incluye recargos
-    total_monto_original = db.query(models.Credito).with_entities(func.sum(models.Credito.monto_total)).scalar() or 0
-    total_recargos = db.query(models.Credito).with_entities(func.sum(models.Credito.recargos)).scalar() or 0
-    total_a_cobrar = total_monto_original + total_recargos
-    
-    por_cobrar = total_a_cobrar - total_cobrado_historico
-    
-    metrics = {
-        "total_clientes": total_clientes,
-        "total_prestado": total_prestado_historico,
-        "total_cobrado": total_cobrado_historico,
-        "por_cobrar": por_cobrar
-    }
+    metrics = metricas.obtener_metricas(db)
 
     return templates.TemplateResponse("index.html", {"request": request, "clientes": clientes_con_estado, "metrics": metrics, "busqueda": q})
 
 @app.get("/lista_clientes", response_class=HTMLResponse)
 def lista_clientes(request: Request, db: Session = Depends(database.get_db)):
-    clientes_db = db.query(models.Cliente).order_by(models.Cliente.nombre).all()
-    
-    clientes_con_estado = []
-    for c in clientes_db:
-        # Verificar si tiene ALGUN crédito activo
-        creditos_activos = db.query(models.Credito).filter(models.Credito.cliente_id == c.id, models.Credito.activo == True).all()
-        
-        estado = "Sin Crédito"
-        if creditos_activos:
-            estado = "Activo"
-        
-        clientes_con_estado.append({
-            "id": c.id,
-            "nombre": c.nombre,
-            "dni": c.dni,
-            "telefono": c.telefono,
-            "direccion": c.direccion,
-            "foto_perfil": c.foto_perfil,
-            "estado": estado
-        })
+    clientes_con_estado, siguiente = consultas.pagina_clientes(db)
     
     return templates.TemplateResponse("lista_clientes.html", {
         "request": request, 
         "clientes": clientes_con_estado,
+        "siguiente": siguiente,
+        "frase_bienvenida": get_frase()
+    })
+
+@app.get("/api/clientes")
+def api_clientes(limit: int = consultas.TAMANO_PAGINA, after: str = None, db: Session = Depends(database.get_db)):
+    """Página de clientes en JSON para el scroll infinito de los listados."""
+    try:
+        filas, siguiente = consultas.pagina_clientes(db, limite=limit, cursor=after)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Parámetro 'after' inválido")
+
+    return {
+        "clientes": [dict(fila._mapping) for fila in filas],
+        "siguiente": siguiente
+    }
+
+@app.get("/api/clientes/sugerir")
+def sugerir_clientes(q: str = "", limite: int = sugerencias.LIMITE_SUGERENCIAS, db: Session = Depends(database.get_db)):
+    """Autocompletado: responde desde el índice de prefijos en memoria, sin consultar la base."""
+    if not sugerencias.indice.cargado:
+        sugerencias.indice.cargar(db)
+    limite = max(1, min(limite, 50))
+    return {"sugerencias": sugerencias.indice.buscar(q, limite)}
+
+# Fechas que aceptan los reportes: las del calendario de días hábiles (fuera, casi siempre es un error de tipeo)
+RANGO_FECHAS = f"{calendario.INICIO_CALENDARIO.isoformat()} a {calendario.FIN_CALENDARIO.isoformat()}"
+
+def _parametro_fecha(fecha):
+    try:
+        fecha_obj = datetime.strptime(fecha, "%Y-%m-%d").date() if fecha else date.today()
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Parámetro 'fecha' inválido (AAAA-MM-DD)")
+    if not calendario.INICIO_CALENDARIO <= fecha_obj <= calendario.FIN_CALENDARIO:
+        raise HTTPException(status_code=400, detail=f"Parámetro 'fecha' fuera de rango ({RANGO_FECHAS})")
+    return fecha_obj
+
+def _parametros_cobranza(fecha, agrupar, orden):
+    fecha_obj = _parametro_fecha(fecha)
+    if agrupar not in cobranza.AGRUPACIONES or orden not in cobranza.ORDENES:
+        raise HTTPException(status_code=400, detail="Parámetros 'agrupar' u 'orden' inválidos")
+    return fecha_obj
+
+@app.get("/cobranza", response_class=HTMLResponse)
+def cobranza_del_dia(request: Request, fecha: str = None, agrupar: str = "zona", orden: str = "atraso", db: Session = Depends(database.get_db)):
+    """Hoja de cobranza: clientes con cuotas vencidas a la fecha, agrupados por zona o dirección."""
+    hoja = cobranza.hoja_cobranza(db, _parametros_cobranza(fecha, agrupar, orden), agrupar, orden)
+
+    return templates.TemplateResponse("cobranza.html", {
+        "request": request,
+        "hoja": hoja,
+        "frase_bienvenida": get_frase()
+    })
+
+def _respuesta_json(datos):
+    """
+    JSON de 'datos' (sólo tipos nativos y fechas) sin pasar por jsonable_encoder, que recorre
+    valor por valor: con miles de filas tarda varias veces más que armarlas. Mismo formato que JSONResponse.
+    """
+    contenido = json.dumps(datos, ensure_ascii=False, allow_nan=False, separators=(",", ":"), default=lambda valor: valor.isoformat())
+    return Response(contenido, media_type="application/json")
+
+@app.get("/api/cobranza")
+def api_cobranza(fecha: str = None, agrupar: str = "zona", orden: str = "atraso", db: Session = Depends(database.get_db)):
+    """Misma hoja de cobranza en JSON."""
+    return _respuesta_json(cobranza.hoja_cobranza(db, _parametros_cobranza(fecha, agrupar, orden), agrupar, orden))
+
+@app.get("/morosidad", response_class=HTMLResponse)
+def reporte_morosidad(request: Request, fecha: str = None, db: Session = Depends(database.get_db)):
+    """Morosidad de la cartera activa por tramos de días hábiles de atraso."""
+    reporte = morosidad.reporte_morosidad(db, _parametro_fecha(fecha))
+
+    return templates.TemplateResponse("morosidad.html", {
+        "request": request,
+        "reporte": reporte,
+        "frase_bienvenida": get_frase()
+    })
+
+@app.get("/api/morosidad")
+def api_morosidad(fecha: str = None, db: Session = Depends(database.get_db)):
+    """Mismo reporte de morosidad en JSON."""
+    return morosidad.reporte_morosidad(db, _parametro_fecha(fecha))
+
+@app.get("/morosidad/excel")
+def exportar_morosidad(fecha: str = None, db: Session = Depends(database.get_db)):
+    """Reporte de morosidad en Excel: resumen por tramo y detalle por crédito."""
+    fecha_obj = _parametro_fecha(fecha)
+    stream = morosidad.excel_morosidad(db, fecha_obj)
+
+    headers = {
+        'Content-Disposition': f'attachment; filename="morosidad_{fecha_obj.isoformat()}.xlsx"'
+    }
+    return StreamingResponse(stream, media_type=exportacion.TIPO_XLSX, headers=headers)
+
+def _parametros_proyeccion(fecha, agrupar, periodos):
+    fecha_obj = _parametro_fecha(fecha)
+    if agrupar not in proyeccion.AGRUPACIONES:
+        raise HTTPException(status_code=400, detail="Parámetro 'agrupar' inválido (semanal o mensual)")
+    if not 1 <= periodos <= proyeccion.MAXIMO_PERIODOS:
+        raise HTTPException(status_code=400, detail=f"Parámetro 'periodos' inválido (1 a {proyeccion.MAXIMO_PERIODOS})")
+    fin = pd.Timestamp(proyeccion.limites_periodos(fecha_obj, agrupar, periodos)[-1]).date() - timedelta(days=1)
+    if fin > calendario.FIN_CALENDARIO:
+        raise HTTPException(status_code=400, detail=f"La proyección terminaría el {fin}, fuera de rango ({RANGO_FECHAS}): elija una fecha anterior o menos periodos")
+    return fecha_obj
+
+@app.get("/proyeccion", response_class=HTMLResponse)
+def proyeccion_cobranza(request: Request, fecha: str = None, agrupar: str = "semanal", periodos: int = 12, db: Session = Depends(database.get_db)):
+    """Cobranza esperada de la cartera activa por semana o por mes, en escenario optimista e histórico."""
+    reporte = proyeccion.proyectar_cobranza(db, _parametros_proyeccion(fecha, agrupar, periodos), agrupar, periodos)
+
+    return templates.TemplateResponse("proyeccion.html", {
+        "request": request,
+        "reporte": reporte,
+        "periodos": periodos,
         "frase_bienvenida": get_frase()
     })
 
+@app.get("/api/proyeccion")
+def api_proyeccion(fecha: str = None, agrupar: str = "semanal", periodos: int = 12, db: Session = Depends(database.get_db)):
+    """Misma proyección de cobranza en JSON."""
+    return proyeccion.proyectar_cobranza(db, _parametros_proyeccion(fecha, agrupar, periodos), agrupar, periodos)
+
+# Tope de montos por cotización y de cada monto (uno enorme, como 1e308, desborda el total del plan a inf)
+MAXIMO_MONTOS_COTIZACION = 200
+MONTO_MAXIMO_COTIZACION = 1e12
+
+@app.get("/api/planes/cotizar")
+def cotizar_planes(monto: List[float] = Query(...), frecuencia: List[str] = Query(None)):
+    """
+    Cotiza todos los planes para uno o varios montos (?monto=50000&monto=80000&frecuencia=Semanal).
+    Sin 'frecuencia' se cotizan todas. Devuelve total, cuota y costo diario de cada plan.
+    """
+    if len(monto) > MAXIMO_MONTOS_COTIZACION:
+        raise HTTPException(status_code=400, detail=f"Se pueden cotizar hasta {MAXIMO_MONTOS_COTIZACION} montos por vez")
+    if not all(math.isfinite(m) and m <= MONTO_MAXIMO_COTIZACION for m in monto):
+        raise HTTPException(status_code=400, detail=f"Los montos tienen que ser números de hasta {MONTO_MAXIMO_COTIZACION:,.0f} (no nan ni inf)")
+    if any(m < 0 for m in monto):
+        raise HTTPException(status_code=400, detail="Los montos no pueden ser negativos")
+    if frecuencia and any(f not in planes.FRECUENCIAS for f in frecuencia):
+        raise HTTPException(status_code=400, detail=f"Frecuencia inválida (opciones: {', '.join(planes.FRECUENCIAS)})")
+    return {"cotizaciones": planes.cotizar(monto, frecuencia)}
+
+def _plan_credito(monto, frecuencia, plazo, tasa):
+    try:
+        return planes.calcular_plan(monto, frecuencia, plazo, tasa)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
 @app.post("/clientes/")
 def create_cliente(
     nombre: str = Form(...),
@@ -233,34 +274,11 @@ def create_cliente(
     frecuencia = frecuencia_pago
     plazo_label = semanas
     
-    config_plan = PLANES_CONFIG.get(frecuencia, {}).get(plazo_label)
-    
-    factor = 0
-    plazo_real = 0
-    
-    if config_plan:
-        factor = config_plan["factor"]
-        monto_total = monto * factor
-        
-        if frecuencia == "Semanal" and "dias" in config_plan:
-            # Lógica precisa por días para Semanal
-            dias_calendario = config_plan["dias"]
-            diario = monto_total / dias_calendario
-            pago_periodo = diario * 5 # 5 días hábiles
-            plazo_real = monto_total / pago_periodo # Puede dar decimal, ej 14.4
-        else:
-            # Lógica estándar para otros
-            plazo_real = float(plazo_label)
-            pago_periodo = monto_total / plazo_real
-    else:
-        # Fallback manual
-        factor = 1 + (tasa / 100)
-        monto_total = monto * factor
-        try:
-            plazo_real = float(plazo_label)
-        except:
-            plazo_real = 1
-        pago_periodo = monto_total / plazo_real
+    plan = _plan_credito(monto, frecuencia, plazo_label, tasa)
+    factor = plan["factor"]
+    monto_total = plan["monto_total"]
+    plazo_real = plan["semanas"] # Puede dar decimal, ej 14.4
+    pago_periodo = plan["pago_periodo"]
 
     credito = models.Credito(
         cliente_id=cliente.id,
@@ -269,90 +287,111 @@ def create_cliente(
         monto_total=monto_total,
         semanas=plazo_real, # Guardamos el plazo real calculado
         frecuencia=frecuencia,
-        pago_semanal=pago_periodo # Guardamos la cuota en 'pago_semanal'
+        pago_semanal=pago_periodo, # Guardamos la cuota en 'pago_semanal'
+        saldo=monto_total # Sin pagos todavía
     )
     db.add(credito)
+    cuotas.generar_cuotas(db, credito)
+    metricas.aplicar_delta(db, clientes=1, prestado=monto, monto=monto_total)
 
     # 3. Confirmar todo
     db.commit()
     db.refresh(cliente)
+    sugerencias.indice.agregar(cliente.id, cliente.nombre, cliente.dni)
     
     return RedirectResponse(url="/", status_code=303)
 
 @app.get("/exportar_excel")
-def exportar_excel(db: Session = Depends(database.get_db)):
-    # Obtener todos los créditos (activos e inactivos) para el reporte completo
-    creditos = db.query(models.Credito).all()
-    data = []
-    
-    for cred in creditos:
-        cliente = cred.cliente
-        
-        # Cálculos de fechas
-        fecha_inicio = cred.fecha_inicio
-        fecha_final = fecha_inicio + timedelta(weeks=cred.semanas)
-        cantidad_total_dias = (fecha_final - fecha_inicio).days
-        
-        # Cálculos de pagos
-        pagos = db.query(models.Pago).filter(models.Pago.credito_id == cred.id).all()
-        total_pagado = sum(p.monto for p in pagos)
-        pendiente = cred.monto_total - total_pagado
-        if pendiente < 0: pendiente = 0
-        
-        # Métricas de tiempo abonado (estimado)
-        # Semanas abonadas = Total Pagado / Pago Semanal
-        semanas_abonadas = 0
-        if cred.pago_semanal > 0:
-            semanas_abonadas = total_pagado / cred.pago_semanal
-            
-        semanas_pendientes = cred.semanas - semanas_abonadas
-        if semanas_pendientes < 0: semanas_pendientes = 0
-        
-        dias_abonados = semanas_abonadas * 7
-        dias_pendientes = cantidad_total_dias - dias_abonados
-        if dias_pendientes < 0: dias_pendientes = 0
-        
-        meses_abonados = semanas_abonadas / 4
-        meses_pendientes = semanas_pendientes / 4
-        
-        # Plan de Pagos String
-        plan_pagos = f"{cred.semanas} semanas ${cred.monto_total:,.2f}"
-        
-        # Construir fila
-        row = {
-            "CTO": cred.id,
-            "Nombre y Apellido": cliente.nombre,
-            "Domicilio part. y laboral": f"{cliente.direccion} / {cliente.lugar_trabajo or 'N/A'}",
-            "D.N.I": cliente.dni,
-            "Fecha Inicio del credito": fecha_inicio,
-            "Fecha Final del credito": fecha_final,
-            "cantidad total de dias": cantidad_total_dias,
-            "Dias Abonados": round(dias_abonados, 2),
-            "Dias Pendientes": round(dias_pendientes, 2),
-            "Plan. Pagos": plan_pagos,
-            "Capital": cred.monto_prestado,
-            "Monto Devolver": cred.monto_total,
-            "Cuota Semanal": cred.pago_semanal,
-            "Acumulado $$$": total_pagado,
-            "Pendiente $$$": pendiente,
-            "Semanas Abonadas": round(semanas_abonadas, 2),
-            "Semanas Pendientes": round(semanas_pendientes, 2),
-            "Mes abonado": round(meses_abonados, 2),
-            "MES PENDIENTE": round(meses_pendientes, 2)
-        }
-        data.append(row)
-    
-    df = pd.DataFrame(data)
-    stream = BytesIO()
-    with pd.ExcelWriter(stream) as writer:
-        df.to_excel(writer, index=False)
-    
-    stream.seek(0)
-    
+def exportar_excel():
+    # Reporte completo de créditos (activos e inactivos): cada lote se envía apenas se calcula (ver app/libro_xlsx.py)
     headers = {
         'Content-Disposition': 'attachment; filename="reporte_creditos_completo.xlsx"'
     }
-    return StreamingResponse(stream, headers=headers)
+    return StreamingResponse(exportacion.stream_reporte(), media_type=exportacion.TIPO_XLSX, headers=headers)
+
+@app.get("/exportar")
+def exportar_tabla(formato: str = "csv", tabla: str = "creditos", desde: str = None, incremental: bool = False, db: Session = Depends(database.get_db)):
+    """
+    Exporta créditos (mismas columnas que el Excel), pagos, clientes o las bajas de los tres en
+    CSV o Parquet (?formato=csv|parquet&tabla=creditos|pagos|clientes|eliminaciones), generados
+    y enviados por lotes.
+    Con 'desde' (AAAA-MM-DD o AAAA-MM-DDTHH:MM:SS) sólo van las filas cambiadas desde entonces.
+    Con 'incremental=true' sólo van las cambiadas desde la exportación incremental anterior de
+    la tabla, y se registra la marca de ésta para la próxima. Si no hay marca (primera vez, o
+    después de reemplazar la cartera con import_data.py) va la tabla completa y X-Cambios-Desde
+    queda vacío: quien sincroniza debe reemplazar la tabla en lugar de aplicar cambios.
+    """
+    if tabla not in exportacion.TABLAS:
+        raise HTTPException(status_code=400, detail=f"Tabla inválida (opciones: {', '.join(exportacion.TABLAS)})")
+    if formato not in exportacion.FORMATOS:
+        raise HTTPException(status_code=400, detail=f"Formato inválido (opciones: {', '.join(exportacion.FORMATOS)})")
+    if formato == "parquet" and not exportacion.parquet_disponible():
+        raise HTTPException(status_code=400, detail="El formato parquet requiere instalar pyarrow")
+
+    if not (desde or incremental):
+        headers = {
+            'Content-Disposition': f'attachment; filename="{tabla}_{date.today().isoformat()}.{formato}"'
+        }
+        return StreamingResponse(exportacion.stream_tabla(tabla, formato), media_type=exportacion.TIPOS_MEDIA[formato], headers=headers)
+
+    if desde:
+        try:
+            desde_obj = datetime.fromisoformat(desde)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Parámetro 'desde' inválido (AAAA-MM-DD o AAAA-MM-DDTHH:MM:SS)")
+    else:
+        desde_obj = exportacion.ultima_marca(db, tabla)
+    hasta = exportacion.hasta_cambios()
+
+    headers = {
+        'Content-Disposition': f'attachment; filename="{tabla}_cambios_{hasta.strftime("%Y%m%d_%H%M%S")}.{formato}"',
+        # Intervalo exportado, para que quien sincroniza sepa qué trae el archivo
+        'X-Cambios-Desde': desde_obj.isoformat() if desde_obj else "",
+        'X-Cambios-Hasta': hasta.isoformat(),
+    }
+    stream = exportacion.stream_tabla(tabla, formato, cambios=(desde_obj, hasta), registrar=incremental)
+    return StreamingResponse(stream, media_type=exportacion.TIPOS_MEDIA[formato], headers=headers)
+
+@app.post("/jobs/{tipo}", status_code=202)
+def encolar_trabajo(tipo: str, credito_id: int = None, fecha: str = None, db: Session = Depends(database.get_db)):
+    """
+    Encola un reporte pesado (reporte_creditos, morosidad?fecha=, estado_cuenta?credito_id=,
+    estados_cuenta y estados_cuenta_zip de todos los créditos activos) y devuelve el id para
+    consultar el progreso en /jobs/{id}.
+    """
+    if tipo not in trabajos.REPORTES:
+        raise HTTPException(status_code=404, detail=f"Reporte inexistente (opciones: {', '.join(trabajos.REPORTES)})")
+
+    if tipo == "estado_cuenta":
+        if credito_id is None or not db.query(models.Credito.id).filter(models.Credito.id == credito_id).first():
+            raise HTTPException(status_code=404, detail="Crédito no encontrado")
+        parametros = {"credito_id": credito_id}
+    elif tipo in ("estados_cuenta", "estados_cuenta_zip"):
+        parametros = {}
+    else:
+        parametros = {"fecha": _parametro_fecha(fecha).isoformat()}
+
+    return trabajos.encolar(db, tipo, parametros).a_dict()
+
+def _trabajo(trabajo_id):
+    trabajo = trabajos.obtener(trabajo_id)
+    if not trabajo:
+        raise HTTPException(status_code=404, detail="Trabajo no encontrado")
+    return trabajo
+
+@app.get("/jobs/{trabajo_id}")
+def estado_trabajo(trabajo_id: str):
+    """Estado y progreso (0 a 100) de un trabajo; al terminar incluye la URL de descarga."""
+    return _trabajo(trabajo_id).a_dict()
+
+@app.get("/jobs/{trabajo_id}/descargar")
+def descargar_trabajo(trabajo_id: str):
+    trabajo = _trabajo(trabajo_id)
+    if trabajo.estado != "terminado":
+        raise HTTPException(status_code=409, detail=f"El trabajo no terminó (estado: {trabajo.estado})")
+    if not os.path.exists(trabajo.archivo):
+        raise HTTPException(status_code=410, detail="El archivo fue reemplazado por una versión más nueva; vuelva a generarlo")
+    return FileResponse(trabajo.archivo, media_type=trabajo.media_type, filename=trabajo.nombre_archivo)
 
 @app.get("/clientes/{cliente_id}", response_class=HTMLResponse)
 def detalle_cliente(cliente_id: int, request: Request, db: Session = Depends(database.get_db)):
@@ -363,153 +402,28 @@ def detalle_cliente(cliente_id: int, request: Request, db: Session = Depends(dat
     # Obtener TODOS los créditos ordenados por fecha (más reciente primero)
     creditos_db = db.query(models.Credito).filter(models.Credito.cliente_id == cliente_id).order_by(models.Credito.id.desc()).all()
     
+    # Estado de todos los créditos del cliente en una sola pasada del motor vectorizado
+    estados = motor_creditos.calcular_estado(
+        motor_creditos.cargar_creditos(db, models.Credito.cliente_id == cliente_id).set_index("id")
+    )
+
+    # Pagos de todos los créditos del cliente en una sola consulta
+    pagos_por_credito = {}
+    pagos_cliente = db.query(models.Pago).join(models.Credito).filter(models.Credito.cliente_id == cliente_id).order_by(models.Pago.fecha.desc()).all()
+    for pago in pagos_cliente:
+        pagos_por_credito.setdefault(pago.credito_id, []).append(pago)
+
     creditos_data = []
     
     # Si no hay créditos, pasamos lista vacía
+    # (El flag 'activo' lo mantienen los pagos/recargos y la conciliación: esta vista sólo lee)
     
     for credito in creditos_db:
-        pagos = db.query(models.Pago).filter(models.Pago.credito_id == credito.id).order_by(models.Pago.fecha.desc()).all()
-        total_pagado = sum(p.monto for p in pagos)
-        
-        # Recargos
-        recargos = credito.recargos or 0.0
-        monto_total_con_recargos = credito.monto_total + recargos
-        
-        # Calcular fecha final estimada (MOVIDO ARRIBA para evitar error)
-        fecha_final = credito.fecha_inicio + timedelta(weeks=credito.semanas)
-
-        # Cálculos de atraso
-        # Lógica de Días Hábiles (Lunes a Viernes)
-        # Usamos pandas para contar días hábiles exactos
-        dias_habiles_transcurridos = 0
-        if date.today() >= credito.fecha_inicio:
-            # bdate_range incluye start y end. Restamos 1 para obtener "transcurridos"
-            # Si hoy == inicio, len=1, transcurridos=0
-            dias_habiles_transcurridos = len(pd.bdate_range(start=credito.fecha_inicio, end=date.today())) - 1
-        
-        monto_esperado = 0
-        proximo_vencimiento_calculado = None
-        
-        # Definir duración del periodo en días hábiles
-        dias_habiles_periodo = 5 # Semanal
-        cuota_periodo = credito.pago_semanal
-        
-        if credito.frecuencia == "Mensual":
-            dias_habiles_periodo = 20
-            cuota_periodo = credito.pago_semanal * 4
-        elif credito.frecuencia == "Quincenal":
-            dias_habiles_periodo = 10
-            cuota_periodo = credito.pago_semanal * 2
-        elif credito.frecuencia == "Unico":
-            # Caso especial: Pago único al final
-            # No hay cuotas periódicas esperadas hasta el vencimiento
-            dias_habiles_periodo = 99999 
-            cuota_periodo = 0
-            
-        # Calcular periodos completos transcurridos
-        periodos = dias_habiles_transcurridos // dias_habiles_periodo
-        if periodos < 0: periodos = 0
-        
-        monto_esperado = periodos * cuota_periodo
-        
-        # Calcular próximo vencimiento (estimado en calendario)
-        # Esto es aproximado para mostrar fecha, el cálculo monetario ya es exacto por hábiles
-        if credito.frecuencia == "Mensual":
-             proximo_vencimiento_calculado = credito.fecha_inicio + timedelta(days=(periodos + 1) * 30)
-        elif credito.frecuencia == "Quincenal":
-             proximo_vencimiento_calculado = credito.fecha_inicio + timedelta(days=(periodos + 1) * 15)
-        elif credito.frecuencia == "Unico":
-             proximo_vencimiento_calculado = fecha_final
-        else:
-             proximo_vencimiento_calculado = credito.fecha_inicio + timedelta(weeks=periodos + 1)
-        
-        # Si ya pasó la fecha final, el monto esperado es el TOTAL (deuda vencida)
-        if date.today() > fecha_final:
-             monto_esperado = monto_total_con_recargos
-        elif monto_esperado > monto_total_con_recargos:
-            monto_esperado = monto_total_con_recargos
-            
-        atraso = monto_esperado - total_pagado
-        restante = monto_total_con_recargos - total_pagado
-        
-        estado = "Activo"
-        if restante <= 0.1: # Margen de error flotante
-            estado = "Finalizado"
-            restante = 0
-            atraso = 0
-            # Actualizar estado en DB si es necesario
-            if credito.activo:
-                credito.activo = False
-                db.commit()
-        else:
-            # Si hay deuda (restante > 0.1), asegurar que el crédito esté Activo
-            if not credito.activo:
-                credito.activo = True
-                db.commit()
-        
-        proximo_vencimiento = None
-        if estado == "Activo":
-            proximo_vencimiento = proximo_vencimiento_calculado
-
-        # Cálculos de Días (Lógica solicitada: Acumulado * Días Hábiles / Cuota)
-        # Definir días hábiles según frecuencia (Coincidente con lógica frontend)
-        dias_habiles_periodo = 5 # Default Semanal
-        if credito.frecuencia == "Quincenal":
-            dias_habiles_periodo = 10
-        elif credito.frecuencia == "Mensual":
-            dias_habiles_periodo = 20
-
-        dias_abonados = 0
-        cantidad_total_dias = 0
-        costo_diario = 0
-        
-        if credito.pago_semanal > 0:
-            # Costo Diario = Cuota / Días Hábiles
-            costo_diario = credito.pago_semanal / dias_habiles_periodo
-
-            # CORRECCIÓN: Para calcular el TOTAL de días hábiles, siempre usamos la base semanal (5 días)
-            # porque 'pago_semanal' es el valor de 1 semana.
-            # Fórmula: (Total / Pago Semanal) * 5 Días Hábiles
-            dias_habiles_base = 5
-            cantidad_total_dias = (monto_total_con_recargos / credito.pago_semanal) * dias_habiles_base
-            
-            # Días Abonados = (Total Pagado / Total Deuda) * Total Días
-            if monto_total_con_recargos > 0:
-                dias_abonados = (total_pagado / monto_total_con_recargos) * cantidad_total_dias
-        else:
-            # Fallback si no hay cuota definida
-            cantidad_total_dias = (fecha_final - credito.fecha_inicio).days
-            if monto_total_con_recargos > 0:
-                dias_abonados = (total_pagado / monto_total_con_recargos) * cantidad_total_dias
-
-        dias_pendientes = cantidad_total_dias - dias_abonados
-        if dias_pendientes < 0: dias_pendientes = 0
-
-        porcentaje = 0
-        if monto_total_con_recargos > 0:
-            porcentaje = int((total_pagado / monto_total_con_recargos) * 100)
-            if porcentaje > 100: porcentaje = 100
-
-        resumen = {
-            "pagado": total_pagado,
-            "restante": restante,
-            "deberia_llevar": monto_esperado,
-            "atraso": max(0, atraso),
-            "porcentaje": porcentaje,
-            "proximo_vencimiento": proximo_vencimiento,
-            "estado": estado,
-            "recargos": recargos,
-            "monto_total_final": monto_total_con_recargos,
-            "fecha_final": fecha_final,
-            "cantidad_total_dias": round(cantidad_total_dias),
-            "dias_abonados": round(dias_abonados),
-            "dias_pendientes": round(dias_pendientes),
-            "costo_diario": costo_diario
-        }
+        resumen = motor_creditos.resumen_credito(estados.loc[credito.id])
         
         creditos_data.append({
             "credito": credito,
-            "pagos": pagos,
+            "pagos": pagos_por_credito.get(credito.id, []),
             "resumen": resumen
         })
 
@@ -540,31 +454,11 @@ def create_credito_adicional(
     frecuencia = frecuencia_pago
     plazo_label = semanas
     
-    config_plan = PLANES_CONFIG.get(frecuencia, {}).get(plazo_label)
-    
-    factor = 0
-    plazo_real = 0
-    
-    if config_plan:
-        factor = config_plan["factor"]
-        monto_total = monto * factor
-        
-        if frecuencia == "Semanal" and "dias" in config_plan:
-            dias_calendario = config_plan["dias"]
-            diario = monto_total / dias_calendario
-            pago_periodo = diario * 5
-            plazo_real = monto_total / pago_periodo
-        else:
-            plazo_real = float(plazo_label)
-            pago_periodo = monto_total / plazo_real
-    else:
-        factor = 1 + (tasa / 100)
-        monto_total = monto * factor
-        try:
-            plazo_real = float(plazo_label)
-        except:
-            plazo_real = 1
-        pago_periodo = monto_total / plazo_real
+    plan = _plan_credito(monto, frecuencia, plazo_label, tasa)
+    factor = plan["factor"]
+    monto_total = plan["monto_total"]
+    plazo_real = plan["semanas"] # Puede dar decimal, ej 14.4
+    pago_periodo = plan["pago_periodo"]
 
     credito = models.Credito(
         cliente_id=cliente_id,
@@ -574,9 +468,12 @@ def create_credito_adicional(
         semanas=plazo_real,
         frecuencia=frecuencia,
         pago_semanal=pago_periodo,
+        saldo=monto_total,
         activo=True
     )
     db.add(credito)
+    cuotas.generar_cuotas(db, credito)
+    metricas.aplicar_delta(db, prestado=monto, monto=monto_total)
     db.commit()
     
     return RedirectResponse(url=f"/clientes/{cliente_id}", status_code=303)
@@ -598,31 +495,18 @@ def update_credito(
     frecuencia = frecuencia_pago
     plazo_label = semanas
     
-    config_plan = PLANES_CONFIG.get(frecuencia, {}).get(plazo_label)
-    
-    factor = 0
-    plazo_real = 0
-    
-    if config_plan:
-        factor = config_plan["factor"]
-        monto_total = monto * factor
-        
-        if frecuencia == "Semanal" and "dias" in config_plan:
-            dias_calendario = config_plan["dias"]
-            diario = monto_total / dias_calendario
-            pago_periodo = diario * 5
-            plazo_real = monto_total / pago_periodo
-        else:
-            plazo_real = float(plazo_label)
-            pago_periodo = monto_total / plazo_real
-    else:
-        factor = 1 + (tasa / 100)
-        monto_total = monto * factor
-        try:
-            plazo_real = float(plazo_label)
-        except:
-            plazo_real = 1
-        pago_periodo = monto_total / plazo_real
+    plan = _plan_credito(monto, frecuencia, plazo_label, tasa)
+    factor = plan["factor"]
+    monto_total = plan["monto_total"]
+    plazo_real = plan["semanas"] # Puede dar decimal, ej 14.4
+    pago_periodo = plan["pago_periodo"]
+
+    # Actualizar métricas con la diferencia respecto a los valores anteriores
+    metricas.aplicar_delta(
+        db,
+        prestado=monto - (credito.monto_prestado or 0.0),
+        monto=monto_total - (credito.monto_total or 0.0)
+    )
 
     # Actualizar objeto crédito
     credito.monto_prestado = monto
@@ -632,14 +516,9 @@ def update_credito(
     credito.frecuencia = frecuencia
     credito.pago_semanal = pago_periodo
     
-    # Validar estado tras cambios (si ya se pagó algo, ver si sigue activo)
-    total_pagado = db.query(func.sum(models.Pago.monto)).filter(models.Pago.credito_id == credito.id).scalar() or 0
-    deuda_total = credito.monto_total + (credito.recargos or 0)
-    
-    if total_pagado >= (deuda_total - 0.1):
-        credito.activo = False
-    else:
-        credito.activo = True
+    # Validar estado tras cambios (si ya se pagó algo, ver si sigue activo) y rehacer el cronograma
+    saldos.actualizar_saldo(db, credito)
+    cuotas.generar_cuotas(db, credito)
 
     db.commit()
     
@@ -650,10 +529,20 @@ def delete_credito(credito_id: int, db: Session = Depends(database.get_db)):
     credito = db.query(models.Credito).filter(models.Credito.id == credito_id).first()
     if credito:
         cliente_id = credito.cliente_id
+        metricas.aplicar_delta(
+            db,
+            prestado=-(credito.monto_prestado or 0.0),
+            cobrado=-(credito.total_pagado or 0.0),
+            monto=-(credito.monto_total or 0.0),
+            recargos=-(credito.recargos or 0.0)
+        )
+        pago_ids = [p for (p,) in db.query(models.Pago.id).filter(models.Pago.credito_id == credito_id)]
         # Eliminar pagos asociados primero (aunque cascade debería hacerlo, es mejor ser explícito si no está configurado)
         db.query(models.Pago).filter(models.Pago.credito_id == credito_id).delete()
+        db.query(models.Cuota).filter(models.Cuota.credito_id == credito_id).delete()
         db.delete(credito)
         db.commit()
+        documentos.invalidar_recibos(pago_ids)
         return RedirectResponse(url=f"/clientes/{cliente_id}", status_code=303)
     return RedirectResponse(url="/")
 
@@ -666,6 +555,8 @@ def agregar_recargo(
     credito = db.query(models.Credito).filter(models.Credito.id == credito_id).first()
     if credito:
         credito.recargos = (credito.recargos or 0.0) + monto_recargo
+        saldos.actualizar_saldo(db, credito)
+        metricas.aplicar_delta(db, recargos=monto_recargo)
         db.commit()
         return RedirectResponse(url=f"/clientes/{credito.cliente_id}", status_code=303)
     return RedirectResponse(url="/")
@@ -699,6 +590,7 @@ def update_cliente(
         cliente.direccion = direccion
         cliente.lugar_trabajo = lugar_trabajo
         db.commit()
+        sugerencias.indice.agregar(cliente.id, nombre, dni)
     return RedirectResponse(url=f"/clientes/{cliente_id}", status_code=303)
 
 @app.post("/clientes/{cliente_id}/foto")
@@ -740,8 +632,26 @@ async def upload_foto_admin(
 def delete_cliente(cliente_id: int, db: Session = Depends(database.get_db)):
     cliente = db.query(models.Cliente).filter(models.Cliente.id == cliente_id).first()
     if cliente:
+        # Descontar de las métricas todo lo que se elimina en cascada (créditos y pagos)
+        prestado, monto, recargos, cobrado = db.query(
+            func.sum(models.Credito.monto_prestado),
+            func.sum(models.Credito.monto_total),
+            func.sum(models.Credito.recargos),
+            func.sum(models.Credito.total_pagado)
+        ).filter(models.Credito.cliente_id == cliente_id).one()
+        metricas.aplicar_delta(
+            db,
+            clientes=-1,
+            prestado=-(prestado or 0.0),
+            cobrado=-(cobrado or 0.0),
+            monto=-(monto or 0.0),
+            recargos=-(recargos or 0.0)
+        )
+        pago_ids = [p for (p,) in db.query(models.Pago.id).join(models.Credito).filter(models.Credito.cliente_id == cliente_id)]
         db.delete(cliente)
         db.commit()
+        sugerencias.indice.quitar(cliente_id)
+        documentos.invalidar_recibos(pago_ids)
     return RedirectResponse(url="/", status_code=303)
 
 @app.post("/pagos/")
@@ -760,6 +670,10 @@ def create_pago(
         fecha=fecha_obj
     )
     db.add(pago)
+    credito = db.query(models.Credito).filter(models.Credito.id == credito_id).first()
+    if credito:
+        saldos.actualizar_saldo(db, credito)
+    metricas.aplicar_delta(db, cobrado=monto)
     db.commit()
     
     return RedirectResponse(url=f"/clientes/{cliente_id}", status_code=303)
@@ -774,70 +688,97 @@ def update_pago(
 ):
     pago = db.query(models.Pago).filter(models.Pago.id == pago_id).first()
     if pago:
+        metricas.aplicar_delta(db, cobrado=monto - (pago.monto or 0.0))
         pago.monto = monto
         pago.fecha = datetime.strptime(fecha, "%Y-%m-%d").date()
         pago.nota = nota
-        db.commit()
         
-        # Recalcular estado del crédito tras la modificación
+        # Recalcular saldos y estado del crédito tras la modificación (misma transacción)
         credito = pago.credito
-        total_pagado = db.query(func.sum(models.Pago.monto)).filter(models.Pago.credito_id == credito.id).scalar() or 0
-        deuda_total = credito.monto_total + (credito.recargos or 0)
-        
-        if total_pagado < (deuda_total - 0.1):
-            if not credito.activo:
-                credito.activo = True
-        else:
-            if credito.activo:
-                credito.activo = False
+        saldos.actualizar_saldo(db, credito)
         db.commit()
+        documentos.invalidar_recibos([pago_id])
 
         return RedirectResponse(url=f"/clientes/{pago.credito.cliente_id}", status_code=303)
     return RedirectResponse(url="/")
 
+def _coincide_etag(request: Request, etag):
+    """Si el navegador ya tiene esta versión (If-None-Match) y alcanza con responder 304."""
+    pedidas = [e.strip().removeprefix("W/") for e in request.headers.get("if-none-match", "").split(",")]
+    return etag in pedidas or "*" in pedidas
+
 @app.get("/pagos/{pago_id}/recibo")
-def descargar_recibo(pago_id: int, db: Session = Depends(database.get_db)):
+def descargar_recibo(pago_id: int, request: Request, db: Session = Depends(database.get_db)):
     pago = db.query(models.Pago).filter(models.Pago.id == pago_id).first()
     if not pago:
         return RedirectResponse(url="/")
     
-    credito = pago.credito
-    cliente = credito.cliente
-    
-    buffer = BytesIO()
-    c = canvas.Canvas(buffer, pagesize=letter)
-    
-    # Diseño del Recibo
-    c.setLineWidth(2)
-    c.rect(0.5 * inch, 6 * inch, 7.5 * inch, 4.5 * inch)
-    
-    c.setFont("Helvetica-Bold", 24)
-    c.drawCentredString(4.25 * inch, 9.8 * inch, "CRÉDITOS JARDÍN")
-    
-    c.setFont("Helvetica-Bold", 16)
-    c.drawCentredString(4.25 * inch, 9.4 * inch, "RECIBO DE PAGO")
-    
-    c.setFont("Helvetica", 12)
-    c.drawString(1 * inch, 8.8 * inch, f"Fecha: {pago.fecha.strftime('%d/%m/%Y')}")
-    c.drawString(5 * inch, 8.8 * inch, f"Recibo N°: {pago.id:06d}")
-    
-    c.line(1 * inch, 8.6 * inch, 7.5 * inch, 8.6 * inch)
-    
-    c.setFont("Helvetica", 14)
-    c.drawString(1 * inch, 8 * inch, f"Recibí de: {cliente.nombre}")
-    c.drawString(1 * inch, 7.5 * inch, f"La cantidad de: ${pago.monto:,.2f}")
-    c.drawString(1 * inch, 7 * inch, f"Concepto: Abono a crédito #{credito.id}")
-    
-    c.setFont("Helvetica-Oblique", 10)
-    c.drawCentredString(4.25 * inch, 6.5 * inch, "Gracias por su pago puntual.")
-    
-    c.save()
-    buffer.seek(0)
-    
+    # El recibo sale de la caché en disco mientras no cambie nada de lo que muestra
+    datos = documentos.datos_recibo(pago)
+    huella = documentos.huella_recibo(datos)
     headers = {
-        'Content-Disposition': f'attachment; filename="recibo_{pago_id}.pdf"'
+        'ETag': f'"{huella}"',
+        'Cache-Control': 'private, no-cache'
     }
-    return StreamingResponse(buffer, media_type='application/pdf', headers=headers)
+    if _coincide_etag(request, headers['ETag']):
+        return Response(status_code=304, headers=headers)
+
+    headers['Content-Disposition'] = f'attachment; filename="recibo_{pago_id}.pdf"'
+    return Response(documentos.recibo_pdf(datos, huella), media_type='application/pdf', headers=headers)
+
+@app.get("/pagos/recibos")
+def recibos_en_lote(desde: str = None, hasta: str = None, pago_id: List[int] = Query(None), formato: str = "pdf", db: Session = Depends(database.get_db)):
+    """
+    Recibos de todos los pagos entre 'desde' y 'hasta' (AAAA-MM-DD; con sólo 'desde', los de ese
+    día) o de los ?pago_id= indicados, en un solo PDF (formato=pdf) o en un ZIP (formato=zip).
+    """
+    if formato not in lotes_pdf.TIPOS_MEDIA:
+        raise HTTPException(status_code=400, detail=f"Formato inválido (opciones: {', '.join(lotes_pdf.TIPOS_MEDIA)})")
+    if not (desde or pago_id):
+        raise HTTPException(status_code=400, detail="Indique un rango de fechas ('desde', 'hasta') o los 'pago_id'")
+    try:
+        desde_obj = date.fromisoformat(desde) if desde else None
+        hasta_obj = date.fromisoformat(hasta) if hasta else desde_obj
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Fechas inválidas (AAAA-MM-DD)")
+
+    consulta = recibos.consulta_recibos(desde_obj, hasta_obj, pago_id)
+    if not recibos.contar_recibos(db, consulta):
+        raise HTTPException(status_code=404, detail="No hay pagos para esos criterios")
+
+    nombre = f"recibos_{desde_obj:%Y%m%d}" if desde_obj else "recibos"
+    if hasta_obj and hasta_obj != desde_obj:
+        nombre += f"_{hasta_obj:%Y%m%d}"
+    headers = {
+        'Content-Disposition': f'attachment; filename="{nombre}.{formato}"'
+    }
+    return StreamingResponse(recibos.stream_recibos(consulta, formato), media_type=lotes_pdf.TIPOS_MEDIA[formato], headers=headers)
+
+@app.get("/creditos/fichas")
+def fichas_en_lote(desde: str = None, hasta: str = None, credito_id: List[int] = Query(None), db: Session = Depends(database.get_db)):
+    """
+    Fichas de pago en un solo PDF para imprimir: las de los créditos que empezaron entre 'desde' y
+    'hasta' (AAAA-MM-DD), las de los ?credito_id= indicados o, sin parámetros, las de esta semana.
+    """
+    try:
+        desde_obj = date.fromisoformat(desde) if desde else None
+        hasta_obj = date.fromisoformat(hasta) if hasta else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Fechas inválidas (AAAA-MM-DD)")
+    if not (desde_obj or hasta_obj or credito_id):
+        hoy = date.today()
+        desde_obj, hasta_obj = hoy - timedelta(days=hoy.weekday()), hoy
+
+    consulta = fichas.consulta_fichas(desde_obj, hasta_obj, credito_id)
+    if not fichas.contar_fichas(db, consulta):
+        raise HTTPException(status_code=404, detail="No hay créditos para esos criterios")
+
+    nombre = f"fichas_{desde_obj:%Y%m%d}" if desde_obj else "fichas"
+    headers = {
+        # En el navegador, para imprimir directamente
+        'Content-Disposition': f'inline; filename="{nombre}.pdf"'
+    }
+    return StreamingResponse(fichas.stream_fichas(consulta), media_type=lotes_pdf.TIPOS_MEDIA["pdf"], headers=headers)
 
 @app.get("/creditos/{credito_id}/ficha_pago", response_class=HTMLResponse)
 def ficha_pago(credito_id: int, request: Request, db: Session = Depends(database.get_db)):
@@ -847,44 +788,11 @@ def ficha_pago(credito_id: int, request: Request, db: Session = Depends(database
     
     cliente = credito.cliente
     
-    # Calcular cantidad de cuotas
-    num_cuotas = 0
-    if credito.frecuencia == "Semanal":
-        num_cuotas = int(credito.semanas)
-    elif credito.frecuencia == "Quincenal":
-        num_cuotas = int(credito.semanas / 2)
-    elif credito.frecuencia == "Mensual":
-        num_cuotas = int(credito.semanas / 4)
-    elif credito.frecuencia == "Unico":
-        num_cuotas = 1
-    
-    # Fallback si es 0
-    if num_cuotas < 1: num_cuotas = 1
-    
-    # Calcular monto por cuota real
-    monto_cuota = credito.pago_semanal
-    if credito.frecuencia == "Quincenal":
-        monto_cuota = credito.pago_semanal * 2
-    elif credito.frecuencia == "Mensual":
-        monto_cuota = credito.pago_semanal * 4
-    
-    # Generar lista de cuotas
+    # Cuotas del plan, repartidas en columnas (mismo cálculo que la ficha en PDF)
+    num_cuotas, monto_cuota = documentos.cuotas_ficha(credito.semanas, credito.frecuencia, credito.pago_semanal)
+    rows_per_col = documentos.filas_ficha(num_cuotas)
     cuotas = list(range(1, num_cuotas + 1))
-    
-    # Dividir en 3 columnas
-    import math
-    num_cols = 3
-    rows_per_col = math.ceil(num_cuotas / num_cols)
-    
-    # Asegurar un mínimo de filas para que se vea bien (ej: 15)
-    if rows_per_col < 15: rows_per_col = 15
-    
-    cuotas_split = []
-    for i in range(num_cols):
-        start = i * rows_per_col
-        end = start + rows_per_col
-        col = cuotas[start:end]
-        cuotas_split.append(col)
+    cuotas_split = [cuotas[i * rows_per_col:(i + 1) * rows_per_col] for i in range(documentos.COLUMNAS_FICHA)]
         
     fecha_final = credito.fecha_inicio + timedelta(weeks=credito.semanas)
 
@@ -906,114 +814,10 @@ def descargar_estado_cuenta(credito_id: int, db: Session = Depends(database.get_
     if not credito:
         return RedirectResponse(url="/")
     
-    cliente = credito.cliente
     pagos = db.query(models.Pago).filter(models.Pago.credito_id == credito.id).order_by(models.Pago.fecha).all()
     
     buffer = BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=letter, rightMargin=40, leftMargin=40, topMargin=40, bottomMargin=40)
-    elements = []
-    styles = getSampleStyleSheet()
-    
-    # Custom Styles
-    styles.add(ParagraphStyle(name='HeaderTitle', parent=styles['Heading1'], alignment=TA_CENTER, fontSize=22, spaceAfter=10, fontName='Helvetica-Bold', textColor=colors.darkgreen))
-    styles.add(ParagraphStyle(name='SubHeader', parent=styles['Normal'], alignment=TA_CENTER, fontSize=12, spaceAfter=20, textColor=colors.gray))
-    styles.add(ParagraphStyle(name='TableLabel', parent=styles['Normal'], fontSize=10, fontName='Helvetica-Bold'))
-    styles.add(ParagraphStyle(name='TableValue', parent=styles['Normal'], fontSize=10))
-    
-    # Header
-    elements.append(Paragraph("CRÉDITOS JARDÍN", styles['HeaderTitle']))
-    elements.append(Paragraph("Estado de Cuenta Detallado", styles['SubHeader']))
-    elements.append(Spacer(1, 12))
-    
-    # Client Info Section
-    data_cliente = [
-        [Paragraph("<b>Cliente:</b>", styles['TableLabel']), Paragraph(cliente.nombre, styles['TableValue']), Paragraph("<b>Crédito #:</b>", styles['TableLabel']), Paragraph(str(credito.id), styles['TableValue'])],
-        [Paragraph("<b>DNI:</b>", styles['TableLabel']), Paragraph(cliente.dni, styles['TableValue']), Paragraph("<b>Fecha Inicio:</b>", styles['TableLabel']), Paragraph(credito.fecha_inicio.strftime('%d/%m/%Y'), styles['TableValue'])],
-        [Paragraph("<b>Dirección:</b>", styles['TableLabel']), Paragraph(cliente.direccion or "N/A", styles['TableValue']), Paragraph("<b>Estado:</b>", styles['TableLabel']), Paragraph("Activo" if credito.activo else "Finalizado", styles['TableValue'])]
-    ]
-    
-    t_cliente = Table(data_cliente, colWidths=[1*inch, 2.5*inch, 1*inch, 2.5*inch])
-    t_cliente.setStyle(TableStyle([
-        ('VALIGN', (0,0), (-1,-1), 'TOP'),
-        ('LEFTPADDING', (0,0), (-1,-1), 0),
-        ('BOTTOMPADDING', (0,0), (-1,-1), 6),
-        ('TEXTCOLOR', (0,0), (-1,-1), colors.black),
-    ]))
-    elements.append(t_cliente)
-    elements.append(Spacer(1, 20))
-    
-    # Financial Summary
-    total_pagado = sum(p.monto for p in pagos)
-    recargos = credito.recargos or 0.0
-    monto_total_final = credito.monto_total + recargos
-    saldo_restante = monto_total_final - total_pagado
-    if saldo_restante < 0: saldo_restante = 0
-    
-    elements.append(Paragraph("Resumen Financiero", styles['Heading3']))
-    
-    data_resumen = [
-        ["Concepto", "Monto"],
-        ["Monto Prestado (Capital)", f"${credito.monto_prestado:,.2f}"],
-        ["Intereses y Cargos Administrativos", f"${(credito.monto_total - credito.monto_prestado):,.2f}"],
-        ["Recargos por Mora", f"${recargos:,.2f}"],
-        ["MONTO TOTAL A PAGAR", f"${monto_total_final:,.2f}"],
-        ["Total Abonado a la Fecha", f"${total_pagado:,.2f}"],
-        ["SALDO PENDIENTE", f"${saldo_restante:,.2f}"]
-    ]
-    
-    t_resumen = Table(data_resumen, colWidths=[5*inch, 2*inch])
-    t_resumen.setStyle(TableStyle([
-        ('BACKGROUND', (0,0), (1,0), colors.darkgreen),
-        ('TEXTCOLOR', (0,0), (1,0), colors.white),
-        ('ALIGN', (0,0), (0,-1), 'LEFT'),
-        ('ALIGN', (1,0), (1,-1), 'RIGHT'),
-        ('FONTNAME', (0,0), (-1,0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0,0), (-1,-1), 10),
-        ('BOTTOMPADDING', (0,0), (-1,-1), 8),
-        ('TOPPADDING', (0,0), (-1,-1), 8),
-        ('GRID', (0,0), (-1,-1), 0.5, colors.lightgrey),
-        ('FONTNAME', (0,-1), (-1,-1), 'Helvetica-Bold'), # Bold last row
-        ('BACKGROUND', (0,-1), (-1,-1), colors.whitesmoke),
-        ('TEXTCOLOR', (0,-1), (-1,-1), colors.darkred),
-    ]))
-    elements.append(t_resumen)
-    elements.append(Spacer(1, 20))
-    
-    # Payments History
-    elements.append(Paragraph("Historial de Pagos", styles['Heading3']))
-    
-    data_pagos = [["Fecha", "Monto Abonado", "Saldo Restante (Estimado)"]]
-    
-    saldo_temp = monto_total_final
-    for pago in pagos:
-        saldo_temp -= pago.monto
-        data_pagos.append([
-            pago.fecha.strftime('%d/%m/%Y'),
-            f"${pago.monto:,.2f}",
-            f"${max(0, saldo_temp):,.2f}"
-        ])
-        
-    if not pagos:
-        data_pagos.append(["-", "Sin pagos registrados", "-"])
-        
-    t_pagos = Table(data_pagos, colWidths=[2.5*inch, 2.5*inch, 2*inch])
-    t_pagos.setStyle(TableStyle([
-        ('BACKGROUND', (0,0), (-1,0), colors.gray),
-        ('TEXTCOLOR', (0,0), (-1,0), colors.white),
-        ('ALIGN', (0,0), (-1,-1), 'CENTER'),
-        ('FONTNAME', (0,0), (-1,0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0,0), (-1,0), 10),
-        ('BOTTOMPADDING', (0,0), (-1,0), 8),
-        ('ROWBACKGROUNDS', (0,1), (-1,-1), [colors.white, colors.whitesmoke]),
-        ('GRID', (0,0), (-1,-1), 0.5, colors.lightgrey),
-    ]))
-    elements.append(t_pagos)
-    
-    # Footer
-    elements.append(Spacer(1, 40))
-    elements.append(Paragraph("Documento generado automáticamente por el sistema Créditos Jardín.", styles['Normal']))
-    
-    doc.build(elements)
+    documentos.escribir_estado_cuenta(buffer, documentos.datos_estado_cuenta(credito, pagos))
     buffer.seek(0)
     
     headers = {
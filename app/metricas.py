@@ -0,0 +1,81 @@
+from sqlalchemy import func, update
+from sqlalchemy.orm import Session
+from . import models
+
+METRICAS_ID = 1
+
+def reconstruir_metricas(db: Session):
+    """
+    Recalcula desde cero la fila de métricas del dashboard a partir de las tablas.
+    Sirve como recuperación si los deltas quedaron desfasados (ej: cambios hechos por fuera de la app).
+    No confirma la transacción: el llamador decide cuándo hacer commit.
+    """
+    metricas = db.get(models.MetricasCartera, METRICAS_ID)
+    if not metricas:
+        metricas = models.MetricasCartera(id=METRICAS_ID)
+        db.add(metricas)
+
+    for campo, valor in _calcular_totales(db).items():
+        setattr(metricas, campo, valor)
+    db.flush()
+    return metricas
+
+def _calcular_totales(db: Session):
+    """Totales del dashboard calculados desde las tablas (sin escribir nada)."""
+    prestado, monto, recargos = db.query(
+        func.sum(models.Credito.monto_prestado),
+        func.sum(models.Credito.monto_total),
+        func.sum(models.Credito.recargos)
+    ).one()
+
+    return {
+        "total_clientes": db.query(func.count(models.Cliente.id)).scalar() or 0,
+        "total_prestado": prestado or 0.0,
+        "total_monto": monto or 0.0,
+        "total_recargos": recargos or 0.0,
+        "total_cobrado": db.query(func.sum(models.Pago.monto)).scalar() or 0.0,
+    }
+
+def asegurar_metricas(db: Session):
+    """Crea la fila de métricas si todavía no existe (al iniciar la aplicación)."""
+    if not db.get(models.MetricasCartera, METRICAS_ID):
+        reconstruir_metricas(db)
+        db.commit()
+
+def aplicar_delta(db: Session, clientes=0, prestado=0.0, cobrado=0.0, monto=0.0, recargos=0.0):
+    """
+    Suma los deltas a la fila de métricas dentro de la transacción actual,
+    así queda confirmado (o revertido) junto con el cambio que lo originó.
+    """
+    tabla = models.MetricasCartera
+    db.execute(
+        update(tabla)
+        .where(tabla.id == METRICAS_ID)
+        .values(
+            total_clientes=tabla.total_clientes + clientes,
+            total_prestado=tabla.total_prestado + (prestado or 0.0),
+            total_cobrado=tabla.total_cobrado + (cobrado or 0.0),
+            total_monto=tabla.total_monto + (monto or 0.0),
+            total_recargos=tabla.total_recargos + (recargos or 0.0)
+        )
+    )
+
+def obtener_metricas(db: Session):
+    """
+    Lectura O(1) de las métricas del dashboard (sólo lectura).
+    Si la fila no existe aún (ver asegurar_metricas), calcula los totales sin guardarlos.
+    """
+    metricas = db.get(models.MetricasCartera, METRICAS_ID)
+    if metricas:
+        totales = {campo: getattr(metricas, campo) for campo in ("total_clientes", "total_prestado", "total_cobrado", "total_monto", "total_recargos")}
+    else:
+        totales = _calcular_totales(db)
+
+    total_a_cobrar = totales["total_monto"] + totales["total_recargos"]
+
+    return {
+        "total_clientes": totales["total_clientes"],
+        "total_prestado": totales["total_prestado"],
+        "total_cobrado": totales["total_cobrado"],
+        "por_cobrar": total_a_cobrar - totales["total_cobrado"]
+    }
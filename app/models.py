@@ -1,9 +1,15 @@
-from sqlalchemy import Column, Integer, String, Float, Date, ForeignKey, Boolean
+from sqlalchemy import Column, Integer, String, Float, Date, DateTime, ForeignKey, Boolean, Index, func, text
 from sqlalchemy.orm import relationship
 from .database import Base
 import datetime
 
-class Cliente(Base):
+class MarcasDeTiempo:
+    # Completadas por SQLAlchemy en cada INSERT y UPDATE (también en los UPDATE masivos);
+    # actualizado_en está indexada para las exportaciones incrementales (ver app/exportacion.py)
+    creado_en = Column(DateTime, default=datetime.datetime.now)
+    actualizado_en = Column(DateTime, default=datetime.datetime.now, onupdate=datetime.datetime.now, index=True)
+
+class Cliente(MarcasDeTiempo, Base):
     __tablename__ = "clientes"
 
     id = Column(Integer, primary_key=True, index=True)
@@ -18,11 +24,17 @@ class Cliente(Base):
     creditos = relationship("Credito", back_populates="cliente", cascade="all, delete-orphan")
     notas = relationship("Nota", back_populates="cliente", cascade="all, delete-orphan")
 
-class Credito(Base):
+    __table_args__ = (
+        # Respaldo de la paginación por cursor (nombre, id) de los listados; sin nombre cuenta
+        # como '' (ver consultas.NOMBRE_ORDEN: con NULL la comparación del cursor nunca es verdadera)
+        Index("ix_clientes_nombre_orden_id", func.coalesce(nombre, text("''")), id),
+    )
+
+class Credito(MarcasDeTiempo, Base):
     __tablename__ = "creditos"
 
     id = Column(Integer, primary_key=True, index=True)
-    cliente_id = Column(Integer, ForeignKey("clientes.id"))
+    cliente_id = Column(Integer, ForeignKey("clientes.id"), index=True)
     monto_prestado = Column(Float)
     tasa_interes = Column(Float) # Porcentaje, ej: 10 para 10%
     monto_total = Column(Float)
@@ -32,22 +44,50 @@ class Credito(Base):
     fecha_inicio = Column(Date, default=datetime.date.today)
     recargos = Column(Float, default=0.0)
     activo = Column(Boolean, default=True)
+    numero_cto = Column(String, nullable=True) # CTO de la planilla; con el DNI, clave de la importación incremental (import_data.py)
+
+    # Saldos desnormalizados, mantenidos por app/saldos.py en cada cambio de pagos o recargos
+    total_pagado = Column(Float, default=0.0)
+    saldo = Column(Float, index=True) # monto_total + recargos - total_pagado
+    ultimo_pago_fecha = Column(Date, nullable=True)
+    cantidad_pagos = Column(Integer, default=0)
 
     cliente = relationship("Cliente", back_populates="creditos")
     pagos = relationship("Pago", back_populates="credito", cascade="all, delete-orphan")
+    cuotas = relationship("Cuota", back_populates="credito", cascade="all, delete-orphan", order_by="Cuota.numero")
 
-class Pago(Base):
+class Pago(MarcasDeTiempo, Base):
     __tablename__ = "pagos"
 
     id = Column(Integer, primary_key=True, index=True)
-    credito_id = Column(Integer, ForeignKey("creditos.id"))
+    credito_id = Column(Integer, ForeignKey("creditos.id"), index=True)
     monto = Column(Float)
     fecha = Column(Date, default=datetime.date.today)
     nota = Column(String, nullable=True)
 
     credito = relationship("Credito", back_populates="pagos")
 
-class Nota(Base):
+class Cuota(Base):
+    __tablename__ = "cuotas"
+
+    # Cronograma materializado de cada crédito (ver app/cuotas.py)
+    id = Column(Integer, primary_key=True, index=True)
+    credito_id = Column(Integer, ForeignKey("creditos.id"), index=True)
+    numero = Column(Integer)
+    fecha_vencimiento = Column(Date)
+    monto = Column(Float)
+    monto_pagado = Column(Float, default=0.0) # Pagos imputados en orden (FIFO)
+
+    credito = relationship("Credito", back_populates="cuotas")
+
+    __table_args__ = (
+        # "Qué vence entre tal y tal fecha" en toda la cartera, por rango
+        Index("ix_cuotas_vencimiento_credito", "fecha_vencimiento", "credito_id"),
+        # Sólo cuotas impagas: la hoja de cobranza recorre las vencidas sin tocar las ya pagadas
+        Index("ix_cuotas_impagas", "fecha_vencimiento", "credito_id", sqlite_where=text("monto_pagado < monto")),
+    )
+
+class Nota(MarcasDeTiempo, Base):
     __tablename__ = "notas"
 
     id = Column(Integer, primary_key=True, index=True)
@@ -57,6 +97,39 @@ class Nota(Base):
 
     cliente = relationship("Cliente", back_populates="notas")
 
+class MarcaExportacion(Base):
+    __tablename__ = "marcas_exportacion"
+
+    # Hasta dónde llegó cada exportación incremental de una tabla: la siguiente sigue desde 'hasta'
+    id = Column(Integer, primary_key=True, index=True)
+    tabla = Column(String, index=True)
+    formato = Column(String)
+    desde = Column(DateTime, nullable=True) # None: la primera exportación, completa
+    hasta = Column(DateTime)
+    filas = Column(Integer)
+    fecha = Column(DateTime, default=datetime.datetime.now)
+
+class Eliminacion(Base):
+    __tablename__ = "eliminaciones"
+
+    # Bajas de clientes, créditos y pagos para las exportaciones incrementales: una fila borrada
+    # no deja actualizado_en. Las registran triggers de SQLite (ver app/exportacion.py)
+    id = Column(Integer, primary_key=True, index=True)
+    tabla = Column(String)
+    fila_id = Column(Integer)
+    eliminado_en = Column(DateTime, default=datetime.datetime.now, index=True)
+
+class MetricasCartera(Base):
+    __tablename__ = "portfolio_metrics"
+
+    # Fila única (id=1) con los totales del dashboard, mantenida por deltas (ver app/metricas.py)
+    id = Column(Integer, primary_key=True)
+    total_clientes = Column(Integer, default=0)
+    total_prestado = Column(Float, default=0.0)
+    total_cobrado = Column(Float, default=0.0)
+    total_monto = Column(Float, default=0.0) # Suma de monto_total (sin recargos)
+    total_recargos = Column(Float, default=0.0)
+
 # Actualizar relación en Cliente (monkey-patching o editar arriba si fuera posible, 
 # pero para este flujo editaremos la clase Cliente arriba también si es necesario, 
 # o simplemente definimos la relación inversa aquí si SQLAlchemy lo permite, 
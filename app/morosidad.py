@@ -0,0 +1,132 @@
+"""
+Reporte de morosidad por antigüedad del atraso (aging).
+
+Clasifica TODOS los créditos activos en tramos según los días hábiles de atraso de su
+cuota impaga más antigua (ver 'dias_atraso' en app/motor_creditos.py) y totaliza por
+tramo la cantidad de créditos, el saldo pendiente, el monto atrasado y los recargos.
+Una consulta trae la cartera y el motor vectorizado calcula el atraso de todos a la vez.
+"""
+from datetime import date
+import numpy as np
+import pandas as pd
+from sqlalchemy.orm import Session
+from . import models, motor_creditos, libro_xlsx
+
+# Filas del detalle por tramo escrito en el Excel
+TAMANO_LOTE_EXCEL = 5000
+
+# (clave, etiqueta, días hábiles de atraso desde, hasta inclusive)
+TRAMOS = [
+    ("al_dia", "Al día", 0, 0),
+    ("1_7", "1 a 7 días", 1, 7),
+    ("8_30", "8 a 30 días", 8, 30),
+    ("31_90", "31 a 90 días", 31, 90),
+    ("mas_90", "Más de 90 días", 91, None),
+]
+
+def detalle_morosidad(db: Session, fecha=None):
+    """Un renglón por crédito activo con sus días de atraso y el tramo que le corresponde."""
+    fecha = fecha or date.today()
+    creditos = motor_creditos.cargar_creditos(db, models.Credito.activo == True)
+    estados = motor_creditos.calcular_estado(creditos, hoy=fecha)
+
+    limites = [-1] + [hasta for _, _, _, hasta in TRAMOS[:-1]] + [np.inf]
+    tramo = pd.cut(estados["dias_atraso"], bins=limites, labels=[clave for clave, _, _, _ in TRAMOS])
+
+    return pd.DataFrame({
+        "credito_id": creditos["id"],
+        "cliente_id": creditos["cliente_id"],
+        "nombre": creditos["cliente_nombre"],
+        "dni": creditos["cliente_dni"],
+        "telefono": creditos["cliente_telefono"],
+        "frecuencia": creditos["frecuencia"],
+        "dias_atraso": estados["dias_atraso"],
+        "vencimiento_impago": pd.Series(estados["vencimiento_impago"]).dt.date,
+        "atraso": estados["atraso"],
+        "saldo": estados["restante"],
+        "recargos": estados["recargos"],
+        "ultimo_pago_fecha": creditos["ultimo_pago_fecha"],
+        "tramo": tramo,
+    })
+
+def resumen_morosidad(detalle: pd.DataFrame):
+    """Totales por tramo (incluye los tramos vacíos, en el orden de TRAMOS)."""
+    totales = detalle.groupby("tramo", observed=False).agg(
+        cantidad=("credito_id", "size"),
+        saldo=("saldo", "sum"),
+        atraso=("atraso", "sum"),
+        recargos=("recargos", "sum"),
+    )
+    saldo_total = float(totales["saldo"].sum())
+
+    tramos = []
+    for clave, etiqueta, desde, hasta in TRAMOS:
+        fila = totales.loc[clave]
+        tramos.append({
+            "tramo": clave,
+            "etiqueta": etiqueta,
+            "desde": desde,
+            "hasta": hasta,
+            "cantidad": int(fila["cantidad"]),
+            "saldo": float(fila["saldo"]),
+            "atraso": float(fila["atraso"]),
+            "recargos": float(fila["recargos"]),
+            "porcentaje_saldo": round(float(fila["saldo"]) / saldo_total * 100, 2) if saldo_total else 0.0,
+        })
+    return tramos
+
+def reporte_morosidad(db: Session, fecha=None):
+    """Reporte por tramos listo para JSON o para la plantilla."""
+    fecha = fecha or date.today()
+    tramos = resumen_morosidad(detalle_morosidad(db, fecha))
+    return {
+        "fecha": fecha,
+        "cantidad": sum(t["cantidad"] for t in tramos),
+        "saldo": float(sum(t["saldo"] for t in tramos)),
+        "atraso": float(sum(t["atraso"] for t in tramos)),
+        "recargos": float(sum(t["recargos"] for t in tramos)),
+        "tramos": tramos,
+    }
+
+def excel_morosidad(db: Session, fecha=None):
+    """
+    Libro Excel con una hoja de resumen por tramo y otra con el detalle por crédito, como bytes
+    a medida que se escriben (libro_xlsx.partes_xlsx, el mismo escritor de /exportar_excel).
+    Los datos se calculan acá: el generador que devuelve ya no usa 'db'.
+    """
+    fecha = fecha or date.today()
+    detalle = detalle_morosidad(db, fecha)
+    tramos = resumen_morosidad(detalle)
+    etiquetas = {clave: etiqueta for clave, etiqueta, _, _ in TRAMOS}
+
+    resumen = pd.DataFrame({
+        "Tramo": [t["etiqueta"] for t in tramos],
+        "Créditos": [t["cantidad"] for t in tramos],
+        "Saldo Pendiente $$$": [t["saldo"] for t in tramos],
+        "Atraso $$$": [t["atraso"] for t in tramos],
+        "Recargos $$$": [t["recargos"] for t in tramos],
+        "% del Saldo": [t["porcentaje_saldo"] for t in tramos],
+    })
+
+    detalle = detalle.sort_values(["dias_atraso", "saldo"], ascending=False, kind="stable")
+    hoja_detalle = pd.DataFrame({
+        "CTO": detalle["credito_id"],
+        "Nombre y Apellido": detalle["nombre"],
+        "D.N.I": detalle["dni"],
+        "Teléfono": detalle["telefono"],
+        "Frecuencia": detalle["frecuencia"],
+        "Tramo": detalle["tramo"].map(etiquetas).astype(object),
+        "Días Hábiles de Atraso": detalle["dias_atraso"],
+        "Cuota Impaga Desde": detalle["vencimiento_impago"],
+        "Atraso $$$": detalle["atraso"],
+        "Saldo Pendiente $$$": detalle["saldo"],
+        "Recargos $$$": detalle["recargos"],
+        "Último Pago": detalle["ultimo_pago_fecha"],
+    })
+
+    # El detalle va por tramos de filas, como los lotes del reporte completo
+    lotes = (hoja_detalle.iloc[inicio:inicio + TAMANO_LOTE_EXCEL] for inicio in range(0, len(hoja_detalle), TAMANO_LOTE_EXCEL))
+    return libro_xlsx.partes_xlsx([
+        ("Resumen", list(resumen.columns), [resumen]),
+        ("Detalle", list(hoja_detalle.columns), lotes),
+    ])
@@ -0,0 +1,229 @@
+"""
+Motor vectorizado de estado de créditos.
+
+Calcula para muchos créditos a la vez (toda la cartera si hace falta) los mismos
+valores que antes se calculaban crédito por crédito en 'detalle_cliente':
+monto esperado, atraso, restante, porcentaje, días abonados/pendientes,
+próximo vencimiento, etc. Trabaja sobre arrays de NumPy en una sola pasada.
+"""
+from datetime import date
+import numpy as np
+import pandas as pd
+from sqlalchemy.orm import Session
+from . import models, calendario
+
+# Margen de error flotante para considerar un crédito saldado
+MARGEN_SALDADO = 0.1
+
+COLUMNAS_ENTRADA = [
+    "id", "cliente_id", "fecha_inicio", "semanas", "frecuencia", "pago_semanal",
+    "monto_prestado", "monto_total", "recargos", "activo", "total_pagado", "ultimo_pago_fecha",
+    "cliente_nombre", "cliente_dni", "cliente_direccion", "cliente_lugar_trabajo", "cliente_telefono",
+]
+
+def cargar_creditos(db: Session, filtro=None, limite=None):
+    """
+    Trae los créditos (con datos de su cliente y el total pagado guardado en el crédito)
+    en UNA sola consulta y los devuelve como DataFrame listo para el motor.
+    Con 'limite' trae sólo los primeros por id (para recorrer la cartera por lotes).
+    """
+    query = db.query(
+        models.Credito.id,
+        models.Credito.cliente_id,
+        models.Credito.fecha_inicio,
+        models.Credito.semanas,
+        models.Credito.frecuencia,
+        models.Credito.pago_semanal,
+        models.Credito.monto_prestado,
+        models.Credito.monto_total,
+        models.Credito.recargos,
+        models.Credito.activo,
+        models.Credito.total_pagado,
+        models.Credito.ultimo_pago_fecha,
+        models.Cliente.nombre,
+        models.Cliente.dni,
+        models.Cliente.direccion,
+        models.Cliente.lugar_trabajo,
+        models.Cliente.telefono,
+    ).join(models.Cliente, models.Cliente.id == models.Credito.cliente_id)
+    if filtro is not None:
+        query = query.filter(filtro)
+
+    query = query.order_by(models.Credito.id)
+    if limite is not None:
+        query = query.limit(limite)
+
+    filas = db.execute(query.statement).all()
+    return pd.DataFrame(filas, columns=COLUMNAS_ENTRADA)
+
+def _a_fechas(serie, por_defecto):
+    """Convierte una columna de fechas (date/None) a datetime64[D]."""
+    valores = pd.to_datetime(pd.Series(serie, dtype=object), errors="coerce")
+    valores = valores.fillna(pd.Timestamp(por_defecto))
+    return valores.to_numpy().astype("datetime64[D]")
+
+def _a_float(serie):
+    return pd.to_numeric(pd.Series(serie), errors="coerce").fillna(0.0).to_numpy(dtype=float)
+
+def _dias_de_semanas(semanas):
+    """
+    Días enteros que suma 'fecha + timedelta(weeks=semanas)' (la parte fraccionaria del día se pierde).
+    Se redondea a microsegundos igual que timedelta para no diferir en los bordes.
+    """
+    microsegundos = np.round(semanas * 7 * 86400 * 1e6)
+    return np.floor(microsegundos / (86400 * 1e6)).astype("int64")
+
+def calcular_estado(creditos: pd.DataFrame, hoy=None, cal=None):
+    """
+    Calcula el resumen de estado de cada crédito en una pasada vectorizada.
+    'creditos' debe tener las columnas de cargar_creditos (al menos fecha_inicio, semanas,
+    frecuencia, pago_semanal, monto_total, recargos y total_pagado).
+    'cal' es el calendario de días hábiles (por defecto el de la aplicación, con feriados).
+    Devuelve un DataFrame con el mismo índice.
+    """
+    hoy = hoy or date.today()
+    cal = cal or calendario.calendario()
+    hoy64 = np.datetime64(hoy, "D")
+    n = len(creditos)
+
+    inicio = _a_fechas(creditos["fecha_inicio"], hoy)
+    semanas = _a_float(creditos["semanas"])
+    frecuencia = pd.Series(creditos["frecuencia"], dtype=object).fillna("Semanal").to_numpy()
+    pago = _a_float(creditos["pago_semanal"])
+    monto_total = _a_float(creditos["monto_total"])
+    recargos = _a_float(creditos["recargos"])
+    pagado = _a_float(creditos["total_pagado"])
+
+    es_mensual = frecuencia == "Mensual"
+    es_quincenal = frecuencia == "Quincenal"
+    es_unico = frecuencia == "Unico"
+
+    monto_total_final = monto_total + recargos
+    fecha_final = inicio + _dias_de_semanas(semanas).astype("timedelta64[D]")
+
+    # Días hábiles (Lunes a Viernes, sin feriados) transcurridos desde el inicio, sin contar el día de inicio
+    ya_inicio = hoy64 >= inicio
+    transcurridos = np.zeros(n, dtype="int64")
+    transcurridos[ya_inicio] = cal.dias_habiles_entre(inicio[ya_inicio], hoy64 + 1) - 1
+
+    # Duración del periodo en días hábiles y cuota por periodo
+    dias_habiles_periodo = np.select([es_mensual, es_quincenal, es_unico], [20, 10, 99999], 5)
+    cuota_periodo = np.select([es_mensual, es_quincenal, es_unico], [pago * 4, pago * 2, 0.0], pago)
+
+    periodos = np.maximum(transcurridos // dias_habiles_periodo, 0)
+    monto_esperado = periodos * cuota_periodo
+
+    # Próximo vencimiento: el día hábil en que se cumple el siguiente periodo
+    proximo_vencimiento = fecha_final.copy()
+    periodico = ~es_unico
+    proximo_vencimiento[periodico] = cal.fecha_habil(
+        inicio[periodico], (periodos[periodico] + 1) * dias_habiles_periodo[periodico]
+    )
+
+    # Si ya pasó la fecha final, el monto esperado es el TOTAL (deuda vencida)
+    monto_esperado = np.where(hoy64 > fecha_final, monto_total_final, np.minimum(monto_esperado, monto_total_final))
+
+    atraso = monto_esperado - pagado
+    restante = monto_total_final - pagado
+
+    finalizado = restante <= MARGEN_SALDADO
+    restante = np.where(finalizado, 0.0, restante)
+    atraso = np.where(finalizado, 0.0, atraso)
+    estado = np.where(finalizado, "Finalizado", "Activo")
+
+    # Vencimiento de la cuota impaga más antigua: la siguiente a las que cubre lo pagado
+    # (nunca después de la fecha final, igual que en la tabla de cuotas)
+    vencimiento_impago = fecha_final.copy()
+    cuota_segura = np.where(cuota_periodo > 0, cuota_periodo, 1.0)
+    cubiertas = np.floor(np.maximum(pagado, 0) / cuota_segura + 1e-9)
+    # Tope: más allá de la fecha final la cuota vence en la fecha final
+    habiles_hasta_final = cal.dias_habiles_entre(inicio, fecha_final + 1)
+    dias_cuota = np.clip((cubiertas + 1) * dias_habiles_periodo, 1, np.maximum(habiles_hasta_final + 1, 1)).astype("int64")
+    con_periodo = periodico & (cuota_periodo > 0)
+    vencimiento_impago[con_periodo] = np.minimum(
+        cal.fecha_habil(inicio[con_periodo], dias_cuota[con_periodo]), fecha_final[con_periodo]
+    )
+
+    # Días hábiles de atraso: desde el día siguiente a ese vencimiento hasta hoy inclusive
+    en_mora = (atraso > MARGEN_SALDADO) & (vencimiento_impago < hoy64)
+    dias_atraso = np.zeros(n, dtype="int64")
+    dias_atraso[en_mora] = cal.dias_habiles_entre(vencimiento_impago[en_mora] + 1, hoy64 + 1)
+
+    # Cálculos de días (Acumulado * Días Hábiles / Cuota)
+    dias_habiles_dia = np.select([es_quincenal, es_mensual], [10, 20], 5)
+    con_cuota = pago > 0
+    pago_seguro = np.where(con_cuota, pago, 1.0)
+    costo_diario = np.where(con_cuota, pago / dias_habiles_dia, 0.0)
+
+    # El total de días hábiles siempre usa la base semanal (5 días), porque 'pago_semanal' es el valor de 1 semana
+    dias_calendario = (fecha_final - inicio).astype("int64")
+    cantidad_total_dias = np.where(con_cuota, (monto_total_final / pago_seguro) * 5, dias_calendario)
+
+    con_deuda = monto_total_final > 0
+    total_seguro = np.where(con_deuda, monto_total_final, 1.0)
+    proporcion_pagada = np.where(con_deuda, pagado / total_seguro, 0.0)
+    dias_abonados = proporcion_pagada * cantidad_total_dias
+    dias_pendientes = np.maximum(cantidad_total_dias - dias_abonados, 0)
+
+    porcentaje = np.minimum(np.trunc(proporcion_pagada * 100), 100).astype("int64")
+
+    # Métricas del reporte Excel (base semanal, sin recargos)
+    semanas_abonadas = np.where(con_cuota, pagado / pago_seguro, 0.0)
+    semanas_pendientes = np.maximum(semanas - semanas_abonadas, 0)
+    dias_abonados_calendario = semanas_abonadas * 7
+
+    return pd.DataFrame({
+        "pagado": pagado,
+        "restante": restante,
+        "deberia_llevar": monto_esperado,
+        "atraso": np.maximum(atraso, 0),
+        "cuota_periodo": cuota_periodo,
+        "porcentaje": porcentaje,
+        "proximo_vencimiento": proximo_vencimiento,
+        "vencimiento_impago": vencimiento_impago,
+        "dias_atraso": dias_atraso,
+        "estado": estado,
+        "recargos": recargos,
+        "monto_total_final": monto_total_final,
+        "fecha_inicio": inicio,
+        "fecha_final": fecha_final,
+        "cantidad_total_dias": cantidad_total_dias,
+        "dias_abonados": dias_abonados,
+        "dias_pendientes": dias_pendientes,
+        "costo_diario": costo_diario,
+        "dias_calendario": dias_calendario,
+        "pendiente_sin_recargos": np.maximum(monto_total - pagado, 0),
+        "semanas_abonadas": semanas_abonadas,
+        "semanas_pendientes": semanas_pendientes,
+        "dias_calendario_abonados": dias_abonados_calendario,
+        "dias_calendario_pendientes": np.maximum(dias_calendario - dias_abonados_calendario, 0),
+        "meses_abonados": semanas_abonadas / 4,
+        "meses_pendientes": semanas_pendientes / 4,
+    }, index=creditos.index)
+
+def redondear(valores, decimales=2):
+    """Redondeo con round() de Python (np.round difiere en algunos casos límite, ej: 2.745)."""
+    return [round(float(v), decimales) for v in valores]
+
+def _a_date(valor):
+    return pd.Timestamp(valor).date()
+
+def resumen_credito(fila):
+    """Convierte una fila del resultado de calcular_estado al dict 'resumen' que usan las plantillas."""
+    activo = fila["estado"] == "Activo"
+    return {
+        "pagado": float(fila["pagado"]),
+        "restante": float(fila["restante"]),
+        "deberia_llevar": float(fila["deberia_llevar"]),
+        "atraso": float(fila["atraso"]),
+        "porcentaje": int(fila["porcentaje"]),
+        "proximo_vencimiento": _a_date(fila["proximo_vencimiento"]) if activo else None,
+        "estado": fila["estado"],
+        "recargos": float(fila["recargos"]),
+        "monto_total_final": float(fila["monto_total_final"]),
+        "fecha_final": _a_date(fila["fecha_final"]),
+        "cantidad_total_dias": round(float(fila["cantidad_total_dias"])),
+        "dias_abonados": round(float(fila["dias_abonados"])),
+        "dias_pendientes": round(float(fila["dias_pendientes"])),
+        "costo_diario": float(fila["costo_diario"]),
+    }
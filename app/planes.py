@@ -0,0 +1,152 @@
+"""
+Planes de crédito y cotizador.
+
+Única definición de los planes (factor, días y plazo por frecuencia) y de sus cuentas:
+monto total, cuota por periodo, costo diario y plazo real en semanas. La usan el alta y la
+edición de créditos y la API /api/planes/cotizar, que cotiza muchos montos a la vez sobre
+una tabla precalculada con todos los planes.
+"""
+import numpy as np
+from .cuotas import DIAS_HABILES_PERIODO
+
+# Planes por frecuencia: plazo (como lo elige el usuario) -> factor y, en Semanal, días corridos
+PLANES_CONFIG = {
+    "Semanal": {
+        "11": {"dias": 55, "factor": 1.92},
+        "14.2": {"dias": 72, "factor": 2.16},
+        "22": {"dias": 110, "factor": 2.64},
+        "32": {"dias": 160, "factor": 2.88},
+        "40": {"dias": 210, "factor": 3.12},
+        "48": {"dias": 240, "factor": 3.375},
+    },
+    "Quincenal": {
+        "6": {"factor": 1.92},
+        "7": {"factor": 2.16},
+        "11": {"factor": 2.64},
+        "16": {"factor": 2.88},
+        "20": {"factor": 3.12},
+        "24": {"factor": 3.375},
+    },
+    "Mensual": {
+        "4": {"factor": 2.16},
+        "6": {"factor": 2.64},
+        "8": {"factor": 2.88},
+        "10": {"factor": 3.12},
+        "12": {"factor": 3.375},
+    }
+}
+
+FRECUENCIAS = tuple(PLANES_CONFIG)
+
+# Plazo manual más largo que se acepta al dar de alta o editar un crédito (10 años)
+PLAZO_MAXIMO_SEMANAS = 520
+
+def _tabla_planes():
+    """Una fila por plan, como arrays paralelos (se arma una sola vez al importar)."""
+    filas = [
+        (frecuencia, plazo, config["factor"], config.get("dias", np.nan) if frecuencia == "Semanal" else np.nan)
+        for frecuencia, planes in PLANES_CONFIG.items()
+        for plazo, config in planes.items()
+    ]
+    frecuencia, plazo, factor, dias = zip(*filas)
+    return {
+        "frecuencia": np.array(frecuencia, dtype=object),
+        "plazo": np.array(plazo, dtype=object),
+        "plazo_valor": np.array([float(p) for p in plazo]),
+        "factor": np.array(factor, dtype=float),
+        "dias": np.array(dias, dtype=float),
+        "dias_habiles_periodo": np.array([DIAS_HABILES_PERIODO[f] for f in frecuencia], dtype=float),
+    }
+
+TABLA_PLANES = _tabla_planes()
+
+def _calcular(monto, factor, dias, plazo_valor, dias_habiles_periodo):
+    """
+    Cuentas de un plan sobre arrays: (monto_total, cuota, diario, semanas).
+    Semanal con días: la cuota es 5 días hábiles del costo diario (total / días corridos)
+    y el plazo real sale de total / cuota (puede dar decimal, ej. 14.4).
+    El resto: la cuota es total / plazo y el diario, la cuota repartida en los días hábiles del periodo.
+    """
+    monto_total = monto * factor
+    por_dias = ~np.isnan(dias)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        diario_semanal = monto_total / dias
+        cuota = np.where(por_dias, diario_semanal * 5, monto_total / plazo_valor)
+        diario = np.where(por_dias, diario_semanal, cuota / dias_habiles_periodo)
+        # Sin monto no hay cuota: el plazo real es el del plan (días / 5)
+        semanas = np.where(por_dias, np.where(cuota > 0, monto_total / cuota, dias / 5), plazo_valor)
+    return monto_total, cuota, diario, semanas
+
+def calcular_plan(monto, frecuencia, plazo, tasa=0):
+    """
+    Valores a guardar en el crédito para el plan elegido:
+    {'factor', 'monto_total', 'semanas' (plazo real), 'pago_periodo'}.
+    Si el plazo no es un plan de la tabla, se usa la tasa manual (% sobre el monto); un plazo
+    manual fuera de rango (0, nan o más de PLAZO_MAXIMO_SEMANAS) da ValueError.
+    """
+    config_plan = PLANES_CONFIG.get(frecuencia, {}).get(plazo)
+
+    if config_plan:
+        dias = config_plan["dias"] if frecuencia == "Semanal" and "dias" in config_plan else np.nan
+        monto_total, cuota, _, semanas = _calcular(
+            np.float64(monto), config_plan["factor"], dias, float(plazo), DIAS_HABILES_PERIODO[frecuencia]
+        )
+        return {
+            "factor": config_plan["factor"],
+            "monto_total": float(monto_total),
+            "semanas": float(semanas),
+            "pago_periodo": float(cuota),
+        }
+
+    # Fallback manual
+    factor = 1 + (tasa / 100)
+    monto_total = monto * factor
+    try:
+        plazo_real = float(plazo)
+    except (TypeError, ValueError):
+        plazo_real = 1
+    if not 0 < plazo_real <= PLAZO_MAXIMO_SEMANAS:
+        raise ValueError(f"Plazo inválido: {plazo} (mayor que 0 y de hasta {PLAZO_MAXIMO_SEMANAS} semanas)")
+    return {
+        "factor": factor,
+        "monto_total": monto_total,
+        "semanas": plazo_real,
+        "pago_periodo": monto_total / plazo_real,
+    }
+
+def cotizar(montos, frecuencias=None):
+    """
+    Cotiza todos los planes de las frecuencias pedidas para cada monto, en una sola pasada.
+    Devuelve una lista de {'monto', 'frecuencia', 'planes': [...]} en el orden recibido.
+    """
+    frecuencias = [f for f in (frecuencias or FRECUENCIAS) if f in PLANES_CONFIG]
+    montos = np.asarray(montos, dtype=float)
+
+    # Producto monto x plan sobre la tabla precalculada
+    indices = np.flatnonzero(np.isin(TABLA_PLANES["frecuencia"], frecuencias))
+    fila_monto = np.repeat(np.arange(len(montos)), len(indices))
+    fila_plan = np.tile(indices, len(montos))
+    columna = {clave: valores[fila_plan] for clave, valores in TABLA_PLANES.items()}
+
+    total, cuota, diario, semanas = _calcular(
+        montos[fila_monto], columna["factor"], columna["dias"], columna["plazo_valor"], columna["dias_habiles_periodo"]
+    )
+
+    cotizaciones = {}
+    for i, frecuencia, plazo, factor, dias, t, c, d, s in zip(
+        fila_monto.tolist(), columna["frecuencia"], columna["plazo"], columna["factor"].tolist(),
+        columna["dias"].tolist(), total.tolist(), cuota.tolist(), diario.tolist(), semanas.tolist()
+    ):
+        clave = (i, frecuencia)
+        if clave not in cotizaciones:
+            cotizaciones[clave] = {"monto": float(montos[i]), "frecuencia": frecuencia, "planes": []}
+        cotizaciones[clave]["planes"].append({
+            "plazo": plazo,
+            "factor": factor,
+            "dias": None if np.isnan(dias) else int(dias),
+            "total": t,
+            "cuota": c,
+            "diario": d,
+            "semanas": s,
+        })
+    return list(cotizaciones.values())
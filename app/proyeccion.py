@@ -0,0 +1,149 @@
+"""
+Proyección de cobranza (flujo de fondos esperado) por semana o por mes.
+
+Dos escenarios sobre toda la cartera activa:
+- Optimista: cada cuota impaga se cobra en su vencimiento (lo ya vencido, en el primer periodo).
+  Sale de la tabla de cuotas con una sola consulta agrupada por fecha de vencimiento.
+- Histórico: cada crédito sigue pagando al ritmo que viene pagando (lo pagado sobre lo que
+  debería llevar, aplicado a su cuota por día hábil) hasta cancelar su saldo; si pagó por
+  adelantado, retoma cuando el cronograma lo alcanza.
+  Se calcula con arrays sobre todos los créditos a la vez, sin recorrerlos uno por uno.
+"""
+from datetime import date
+import numpy as np
+import pandas as pd
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+from . import models, motor_creditos, calendario
+from .cuotas import DIAS_HABILES_PERIODO
+
+AGRUPACIONES = ("semanal", "mensual")
+MAXIMO_PERIODOS = 104
+
+def limites_periodos(fecha, agrupar="semanal", periodos=12):
+    """
+    Inicio de cada periodo más el fin del último: el primero empieza en 'fecha' y los
+    siguientes en cada lunes (semanal) o en cada primero de mes (mensual).
+    """
+    frecuencia = "W-MON" if agrupar == "semanal" else "MS"
+    siguientes = pd.date_range(pd.Timestamp(fecha) + pd.Timedelta(days=1), periods=periodos, freq=frecuencia)
+    return np.concatenate([[np.datetime64(fecha, "D")], siguientes.to_numpy().astype("datetime64[D]")])
+
+def _cobro_optimista(db: Session, limites, estados):
+    """
+    Saldo impago de las cuotas de créditos activos, sumado por periodo de vencimiento,
+    más los recargos pendientes de 'estados' (el estado de la cartera activa).
+    """
+    cuota = models.Cuota
+    activos = select(models.Credito.id).where(models.Credito.activo == True)
+    # Misma condición que el índice parcial ix_cuotas_impagas
+    por_fecha = db.query(cuota.fecha_vencimiento, func.sum(cuota.monto - cuota.monto_pagado)).filter(
+        cuota.monto_pagado < cuota.monto,
+        cuota.credito_id.in_(activos),
+    ).group_by(cuota.fecha_vencimiento).all()
+
+    # Los recargos no generan cuotas: se esperan en la fecha final del crédito (se pagan al final)
+    recargos_pendientes = np.minimum(estados["recargos"], estados["restante"]).to_numpy()
+
+    fechas = np.concatenate([
+        np.array([f for f, _ in por_fecha], dtype="datetime64[D]"),
+        estados["fecha_final"].to_numpy().astype("datetime64[D]"),
+    ])
+    montos = np.concatenate([np.array([m or 0.0 for _, m in por_fecha], dtype=float), recargos_pendientes])
+
+    # Lo vencido antes del primer periodo se espera en el primero; lo posterior al último queda afuera
+    periodo = np.maximum(np.searchsorted(limites, fechas, side="right") - 1, 0)
+    dentro = fechas < limites[-1]
+    return np.bincount(periodo[dentro], weights=montos[dentro], minlength=len(limites) - 1)[:len(limites) - 1]
+
+def _ritmo_historico(creditos, estados, cal):
+    """
+    Cobro esperado por día hábil de cada crédito según su comportamiento: la cuota por día hábil
+    multiplicada por el cumplimiento (lo pagado sobre lo que debería llevar, entre 0 y 1).
+    Los créditos que todavía no debían nada toman el cumplimiento promedio de la cartera.
+    Devuelve (ritmo, días hábiles de adelanto, cumplimiento de la cartera): el crédito que pagó
+    por adelantado no vuelve a pagar hasta que el cronograma lo alcanza.
+    """
+    frecuencia = pd.Series(creditos["frecuencia"], dtype=object).fillna("Semanal").to_numpy()
+    dias_periodo = pd.Series(frecuencia).map(DIAS_HABILES_PERIODO).to_numpy(dtype=float)
+
+    # Pago único o sin cuota: el total repartido en los días hábiles del crédito
+    inicio = estados["fecha_inicio"].to_numpy().astype("datetime64[D]")
+    final = estados["fecha_final"].to_numpy().astype("datetime64[D]")
+    habiles_credito = np.maximum(cal.dias_habiles_entre(inicio, np.maximum(final, inicio)), 1)
+    cuota = estados["cuota_periodo"].to_numpy()
+    por_dia = np.where(
+        (cuota > 0) & ~np.isnan(dias_periodo),
+        cuota / np.nan_to_num(dias_periodo, nan=1.0),
+        estados["monto_total_final"].to_numpy() / habiles_credito,
+    )
+
+    esperado = estados["deberia_llevar"].to_numpy()
+    pagado = estados["pagado"].to_numpy()
+    con_historia = esperado > motor_creditos.MARGEN_SALDADO
+    promedio = min(pagado[con_historia].sum() / esperado[con_historia].sum(), 1.0) if con_historia.any() else 1.0
+    cumplimiento = np.where(con_historia, np.clip(pagado / np.where(con_historia, esperado, 1.0), 0.0, 1.0), promedio)
+
+    adelantado = np.maximum(pagado - esperado, 0.0)
+    adelanto = np.where(por_dia > 0, adelantado / np.where(por_dia > 0, por_dia, 1.0), 0.0)
+    return por_dia * cumplimiento, adelanto, promedio
+
+def _suma_rampas(desde, pesos, dias):
+    """sum(peso * max(d - desde, 0)) para cada d de 'dias', con los 'desde' ordenados y sumas acumuladas."""
+    orden = np.argsort(desde, kind="stable")
+    desde, pesos = desde[orden], pesos[orden]
+    peso_acumulado = np.concatenate([[0.0], np.cumsum(pesos)])
+    ponderado_acumulado = np.concatenate([[0.0], np.cumsum(pesos * desde)])
+    anteriores = np.searchsorted(desde, dias, side="right")
+    return dias * peso_acumulado[anteriores] - ponderado_acumulado[anteriores]
+
+def _cobro_historico(ritmo, adelanto, saldo, dias):
+    """
+    Cobro de la cartera por periodo. Cada crédito cobra 0 hasta 'adelanto', después 'ritmo'
+    por día hábil hasta cancelar el saldo: min(ritmo * max(d - adelanto, 0), saldo).
+    Es una rampa que sube en 'adelanto' y se aplana al cancelar, así que el acumulado de
+    toda la cartera es la diferencia de dos sumas de rampas (sin recorrer créditos).
+    """
+    paga = (ritmo > 0) & (saldo > 0)
+    ritmo, adelanto, saldo = ritmo[paga], adelanto[paga], saldo[paga]
+    cancela = adelanto + saldo / ritmo
+    acumulado = _suma_rampas(adelanto, ritmo, dias) - _suma_rampas(cancela, ritmo, dias)
+    return np.diff(acumulado)
+
+def proyectar_cobranza(db: Session, fecha=None, agrupar="semanal", periodos=12):
+    """Cobranza esperada por periodo en los dos escenarios, lista para JSON o para la plantilla."""
+    fecha = fecha or date.today()
+    cal = calendario.calendario()
+    limites = limites_periodos(fecha, agrupar, periodos)
+
+    creditos = motor_creditos.cargar_creditos(db, models.Credito.activo == True)
+    estados = motor_creditos.calcular_estado(creditos, hoy=fecha, cal=cal)
+    saldo = estados["restante"].to_numpy()
+
+    ritmo, adelanto, cumplimiento_cartera = _ritmo_historico(creditos, estados, cal)
+    # Días hábiles desde 'fecha' hasta el inicio de cada periodo (y el fin del último)
+    dias = cal.dias_habiles_entre(np.full(len(limites), np.datetime64(fecha, "D")), limites).astype(float)
+
+    optimista = _cobro_optimista(db, limites, estados)
+    historico = _cobro_historico(ritmo, adelanto, saldo, dias)
+
+    filas = [
+        {
+            "desde": pd.Timestamp(desde).date(),
+            "hasta": (pd.Timestamp(hasta) - pd.Timedelta(days=1)).date(),
+            "dias_habiles": int(dias[i + 1] - dias[i]),
+            "optimista": float(opt),
+            "historico": float(his),
+        }
+        for i, (desde, hasta, opt, his) in enumerate(zip(limites[:-1], limites[1:], optimista, historico))
+    ]
+    return {
+        "fecha": fecha,
+        "agrupar": agrupar,
+        "cantidad_creditos": int(len(creditos)),
+        "saldo_cartera": float(saldo.sum()),
+        "cumplimiento_cartera": round(float(cumplimiento_cartera) * 100, 2),
+        "total_optimista": float(optimista.sum()),
+        "total_historico": float(historico.sum()),
+        "periodos": filas,
+    }
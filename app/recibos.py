@@ -0,0 +1,77 @@
+"""
+Recibos en lote: todos los de un rango de fechas o de una lista de pagos, en un solo PDF o en un ZIP.
+
+Se dibujan en tandas de TANDA en el pool de app/lotes_pdf.py y se envían en orden a medida
+que terminan. Los recibos que ya están en la caché de documentos.py no se vuelven a dibujar, y
+los nuevos quedan guardados en ella para la reimpresión individual.
+"""
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+from . import models, database, documentos, exportacion, lotes_pdf
+
+TANDA = 25
+
+def consulta_recibos(desde=None, hasta=None, pago_ids=None):
+    """Consulta Core con lo que muestra cada recibo (el id del pago primero, para recorrerla por lotes)."""
+    consulta = (
+        select(models.Pago.id, models.Pago.fecha, models.Cliente.nombre, models.Pago.monto, models.Pago.credito_id)
+        .join(models.Credito, models.Pago.credito_id == models.Credito.id)
+        .join(models.Cliente, models.Credito.cliente_id == models.Cliente.id)
+    )
+    if pago_ids:
+        consulta = consulta.where(models.Pago.id.in_(pago_ids))
+    if desde:
+        consulta = consulta.where(models.Pago.fecha >= desde)
+    if hasta:
+        consulta = consulta.where(models.Pago.fecha <= hasta)
+    return consulta
+
+def contar_recibos(db: Session, consulta):
+    return db.execute(select(func.count()).select_from(consulta.subquery())).scalar()
+
+def _datos(fila):
+    pago_id, fecha, cliente, monto, credito_id = fila
+    # Igual que documentos.datos_recibo: misma huella, misma entrada de la caché
+    return {
+        "pago_id": pago_id,
+        "fecha": fecha.strftime('%d/%m/%Y'),
+        "cliente": cliente,
+        "monto": monto,
+        "credito_id": credito_id,
+    }
+
+def _tandas(db: Session, consulta):
+    """
+    Tandas de hasta TANDA recibos en orden de id, como (tanda, datos a dibujar o None): cada
+    tanda es [(datos, huella, pdf de la caché o None)].
+    """
+    for lote in exportacion.lotes_consulta(db, consulta, models.Pago.id):
+        for inicio in range(0, len(lote), TANDA):
+            tanda = []
+            for fila in lote[inicio:inicio + TANDA]:
+                datos = _datos(fila)
+                huella = documentos.huella_recibo(datos)
+                tanda.append((datos, huella, documentos.cache_recibos.leer(documentos.clave_recibo(datos, huella))))
+            faltan = [datos for datos, _, pdf in tanda if pdf is None]
+            yield tanda, faltan or None
+
+def _recibos(tandas):
+    """(nombre, pdf) de cada recibo, en orden: los de la caché tal cual, los demás dibujados en el pool."""
+    for tanda, nuevos in lotes_pdf.en_orden(documentos.renderizar_recibos, tandas):
+        nuevos = iter(nuevos or ())
+        for datos, huella, pdf in tanda:
+            if pdf is None:
+                pdf = next(nuevos)
+                documentos.cache_recibos.guardar(documentos.clave_recibo(datos, huella), pdf)
+            yield f"recibo_{datos['pago_id']}.pdf", pdf
+
+def stream_recibos(consulta, formato, sesion=database.SessionLocal):
+    """
+    Generador con los bytes del PDF unido (formato 'pdf') o del ZIP de recibos ('zip') para un
+    StreamingResponse. Abre su propia sesión, como exportacion.stream_reporte.
+    """
+    db = sesion()
+    try:
+        yield from lotes_pdf.en_bloques(lotes_pdf.PARTES[formato](_recibos(_tandas(db, consulta))))
+    finally:
+        db.close()
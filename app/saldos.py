@@ -0,0 +1,81 @@
+"""
+Saldos desnormalizados de cada crédito (total_pagado, cantidad_pagos, ultimo_pago_fecha, saldo).
+
+Se actualizan dentro de la misma transacción que el pago o recargo que los modifica,
+así las pantallas y reportes leen columnas en lugar de sumar todos los pagos cada vez.
+"""
+from sqlalchemy import func, select, update, or_
+from sqlalchemy.orm import Session
+from . import models, cuotas
+from .motor_creditos import MARGEN_SALDADO
+
+# Diferencia tolerada al comparar montos guardados contra los recalculados
+TOLERANCIA = 0.005
+
+def actualizar_saldo(db: Session, credito: models.Credito):
+    """
+    Recalcula los saldos de UN crédito desde sus pagos (consulta por índice credito_id),
+    su estado activo/finalizado y lo imputado a cada cuota. No confirma la transacción: se llama antes del commit del cambio que lo originó.
+    """
+    db.flush()  # Que los pagos agregados/modificados en esta sesión entren en la suma
+    total, cantidad, ultimo = db.query(
+        func.coalesce(func.sum(models.Pago.monto), 0.0),
+        func.count(models.Pago.id),
+        func.max(models.Pago.fecha)
+    ).filter(models.Pago.credito_id == credito.id).one()
+
+    credito.total_pagado = total
+    credito.cantidad_pagos = cantidad
+    credito.ultimo_pago_fecha = ultimo
+    credito.saldo = (credito.monto_total or 0.0) + (credito.recargos or 0.0) - total
+    credito.activo = credito.saldo > MARGEN_SALDADO
+    cuotas.imputar_pagos(db, {credito.id: total})
+
+def _calculados():
+    """Subconsultas correlacionadas con los valores reales de cada crédito según sus pagos."""
+    pagos = models.Pago
+
+    def agregado(expresion):
+        return select(expresion).where(pagos.credito_id == models.Credito.id).scalar_subquery()
+
+    total = agregado(func.coalesce(func.sum(pagos.monto), 0.0))
+    return {
+        "total_pagado": total,
+        "cantidad_pagos": agregado(func.count(pagos.id)),
+        "ultimo_pago_fecha": agregado(func.max(pagos.fecha)),
+        "saldo": func.coalesce(models.Credito.monto_total, 0.0) + func.coalesce(models.Credito.recargos, 0.0) - total,
+    }
+
+def reconstruir_saldos(db: Session, credito_ids=None):
+    """
+    Recalcula los saldos de TODOS los créditos (o sólo los de 'credito_ids') con un único UPDATE.
+    No confirma la transacción.
+    """
+    sentencia = update(models.Credito).values(**_calculados())
+    if credito_ids is not None:
+        sentencia = sentencia.where(models.Credito.id.in_(credito_ids))
+    db.execute(sentencia.execution_options(synchronize_session=False))
+    db.expire_all()
+
+def verificar_saldos(db: Session):
+    """Devuelve los créditos cuyos saldos guardados no coinciden con sus pagos: [(id, guardado, real), ...]."""
+    credito = models.Credito
+    reales = _calculados()
+    guardados = {campo: getattr(credito, campo) for campo in reales}
+
+    filas = db.query(credito.id, *guardados.values(), *reales.values()).filter(or_(
+        credito.total_pagado.is_(None),
+        credito.saldo.is_(None),
+        func.abs(credito.total_pagado - reales["total_pagado"]) > TOLERANCIA,
+        func.abs(credito.saldo - reales["saldo"]) > TOLERANCIA,
+        credito.cantidad_pagos.is_distinct_from(reales["cantidad_pagos"]),
+        credito.ultimo_pago_fecha.is_distinct_from(reales["ultimo_pago_fecha"]),
+    )).order_by(credito.id).all()
+
+    campos = list(reales)
+    diferencias = []
+    for fila in filas:
+        guardado = dict(zip(campos, fila[1:1 + len(campos)]))
+        real = dict(zip(campos, fila[1 + len(campos):]))
+        diferencias.append((fila[0], guardado, real))
+    return diferencias
@@ -0,0 +1,72 @@
+// Scroll infinito de las carteras de clientes (paginación por cursor vía /api/clientes).
+// Cada listado pone su fila modelo en un <template> dentro del <tbody>: las celdas a completar
+// llevan data-campo ("foto", "estado", "enlace" o el nombre de un campo del cliente, con
+// data-prefijo / data-vacio opcionales) y el resto de la fila queda como está en la plantilla.
+function scrollInfinitoClientes(plantilla, columnas, siguiente) {
+    const tbody = plantilla.parentElement;
+    let siguienteCursor = siguiente;
+    let cargando = false;
+
+    if (!siguienteCursor) return;
+
+    function badgeEstado(estado) {
+        const span = document.createElement("span");
+        if (estado === "Activo") {
+            span.className = "badge bg-success bg-opacity-10 text-success";
+        } else if (estado === "Finalizado") {
+            span.className = "badge bg-secondary bg-opacity-10 text-secondary";
+        } else {
+            span.className = "badge bg-warning bg-opacity-10 text-warning";
+            estado = "Sin Crédito";
+        }
+        span.textContent = estado;
+        return span;
+    }
+
+    function filaCliente(cliente) {
+        const tr = plantilla.content.firstElementChild.cloneNode(true);
+        tr.querySelectorAll("[data-campo]").forEach(el => {
+            const campo = el.dataset.campo;
+            if (campo === "foto") {
+                // El avatar generado se pide del mismo tamaño que la imagen de la plantilla
+                el.src = cliente.foto_perfil ? cliente.foto_perfil : "https://ui-avatars.com/api/?name=" + encodeURIComponent(cliente.nombre || "") + "&background=random&size=" + el.getAttribute("width");
+            } else if (campo === "estado") {
+                el.appendChild(badgeEstado(cliente.estado));
+            } else if (campo === "enlace") {
+                el.href = "/clientes/" + cliente.id;
+            } else {
+                const valor = cliente[campo];
+                el.textContent = (el.dataset.prefijo || "") + (valor === null || valor === undefined || valor === "" ? (el.dataset.vacio || "") : valor);
+            }
+        });
+        return tr;
+    }
+
+    const centinela = document.createElement("tr");
+    centinela.innerHTML = `<td class="text-center text-muted small py-3"><i class="fas fa-spinner fa-spin me-1"></i> Cargando más clientes...</td>`;
+    centinela.firstElementChild.colSpan = columnas;
+    tbody.appendChild(centinela);
+
+    function cargarMas() {
+        if (cargando || !siguienteCursor) return;
+        cargando = true;
+
+        fetch("/api/clientes?limit=50&after=" + encodeURIComponent(siguienteCursor))
+            .then(resp => resp.json())
+            .then(data => {
+                data.clientes.forEach(cliente => tbody.insertBefore(filaCliente(cliente), centinela));
+                siguienteCursor = data.siguiente;
+                if (!siguienteCursor) {
+                    observer.disconnect();
+                    centinela.remove();
+                }
+            })
+            .catch(err => console.log("Error cargando clientes: ", err))
+            .finally(() => { cargando = false; });
+    }
+
+    const observer = new IntersectionObserver(entries => {
+        if (entries.some(e => e.isIntersecting)) cargarMas();
+    }, { rootMargin: "200px" });
+    observer.observe(centinela);
+}
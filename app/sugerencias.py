@@ -0,0 +1,104 @@
+import bisect
+import re
+import threading
+import unicodedata
+from sqlalchemy.orm import Session
+from . import models
+
+LIMITE_SUGERENCIAS = 8
+
+def normalizar(texto):
+    """Minúsculas, sin acentos y con espacios simples: 'Martínez  José' -> 'martinez jose'."""
+    texto = unicodedata.normalize("NFKD", str(texto or ""))
+    texto = "".join(ch for ch in texto if not unicodedata.combining(ch))
+    return " ".join(texto.lower().split())
+
+class IndicePrefijos:
+    """
+    Índice en memoria para el autocompletado de clientes.
+    Guarda una lista ordenada de claves normalizadas (nombre completo, nombre a partir
+    de cada palabra y DNI) y busca por prefijo con bisect, sin ir a la base de datos.
+    """
+
+    def __init__(self):
+        self._claves = []    # Lista ordenada de (clave, cliente_id)
+        self._por_id = {}    # cliente_id -> (nombre, dni, claves)
+        self._lock = threading.Lock()
+        self.cargado = False
+
+    def _claves_de(self, nombre, dni):
+        claves = set()
+        palabras = normalizar(nombre).split()
+        # "juan carlos perez" -> "juan carlos perez", "carlos perez", "perez"
+        for i in range(len(palabras)):
+            claves.add(" ".join(palabras[i:]))
+        dni_norm = normalizar(dni)
+        if dni_norm:
+            claves.add(dni_norm)
+            solo_digitos = re.sub(r"\D", "", dni_norm)
+            if solo_digitos:
+                claves.add(solo_digitos)
+        return claves
+
+    def _agregar(self, cliente_id, nombre, dni):
+        claves = self._claves_de(nombre, dni)
+        for clave in claves:
+            bisect.insort(self._claves, (clave, cliente_id))
+        self._por_id[cliente_id] = (nombre, dni, claves)
+
+    def _quitar(self, cliente_id):
+        datos = self._por_id.pop(cliente_id, None)
+        if not datos:
+            return
+        for clave in datos[2]:
+            i = bisect.bisect_left(self._claves, (clave, cliente_id))
+            if i < len(self._claves) and self._claves[i] == (clave, cliente_id):
+                del self._claves[i]
+
+    def cargar(self, db: Session):
+        """Construye el índice completo desde la tabla de clientes."""
+        filas = db.query(models.Cliente.id, models.Cliente.nombre, models.Cliente.dni).all()
+        claves = []
+        por_id = {}
+        for cliente_id, nombre, dni in filas:
+            claves_cliente = self._claves_de(nombre, dni)
+            claves.extend((clave, cliente_id) for clave in claves_cliente)
+            por_id[cliente_id] = (nombre, dni, claves_cliente)
+        claves.sort()
+
+        with self._lock:
+            self._claves = claves
+            self._por_id = por_id
+            self.cargado = True
+
+    def agregar(self, cliente_id, nombre, dni):
+        with self._lock:
+            self._quitar(cliente_id)
+            self._agregar(cliente_id, nombre, dni)
+
+    def quitar(self, cliente_id):
+        with self._lock:
+            self._quitar(cliente_id)
+
+    def buscar(self, texto, limite=LIMITE_SUGERENCIAS):
+        """Hasta 'limite' clientes cuyo nombre (o alguna palabra de él) o DNI empieza con 'texto'."""
+        prefijo = normalizar(texto)
+        if not prefijo:
+            return []
+
+        resultado = []
+        vistos = set()
+        with self._lock:
+            i = bisect.bisect_left(self._claves, (prefijo,))
+            while i < len(self._claves) and len(resultado) < limite:
+                clave, cliente_id = self._claves[i]
+                if not clave.startswith(prefijo):
+                    break
+                if cliente_id not in vistos:
+                    vistos.add(cliente_id)
+                    nombre, dni, _ = self._por_id[cliente_id]
+                    resultado.append({"id": cliente_id, "nombre": nombre, "dni": dni})
+                i += 1
+        return resultado
+
+indice = IndicePrefijos()
@@ -0,0 +1,227 @@
+"""
+Trabajos en segundo plano para los reportes pesados (Excel de la cartera, morosidad, estados de cuenta).
+
+Un pedido encola el trabajo y recibe su id; el reporte se genera en un pool de hilos mientras
+la página consulta el progreso (/jobs/{id}) y al terminar descarga el archivo. Los hilos
+alcanzan: lo que se busca es no ocupar al servidor con el pedido, y cada trabajo abre su propia
+sesión de la base. Los estados de cuenta de toda la cartera, además, se dibujan en el pool de
+procesos de app/lotes_pdf.py.
+
+Los archivos terminados quedan en disco con una clave que incluye la versión de los datos y la
+fecha: si se vuelve a pedir el mismo reporte y nada cambió, se entrega ese archivo sin generarlo
+de nuevo. Al generar una versión nueva de un reporte se borra la anterior.
+"""
+import hashlib
+import json
+import os
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from . import models, database, exportacion, morosidad, documentos, estados_cuenta, lotes_pdf
+
+# Fuera del paquete congelado, como 'uploads'
+CARPETA_REPORTES = "reportes"
+HILOS = 2
+# Trabajos que se recuerdan en memoria; de los más viejos sólo queda el archivo en caché
+MAXIMO_TRABAJOS = 200
+
+# Tablas cuyos cambios invalidan los reportes guardados
+TABLAS_VERSION = (models.Cliente, models.Credito, models.Pago)
+
+def version_datos(db: Session):
+    """
+    Versión de los datos: cambia con cada alta, modificación o baja de clientes, créditos o
+    pagos (cantidad de filas y último actualizado_en de cada tabla, ambos por índice).
+    """
+    partes = []
+    for modelo in TABLAS_VERSION:
+        cantidad, ultima = db.query(func.count(modelo.id), func.max(modelo.actualizado_en)).one()
+        partes.append(f"{cantidad}:{ultima}")
+    return hashlib.sha1("|".join(partes).encode()).hexdigest()[:16]
+
+def _reporte_creditos(db: Session, destino, parametros, progreso):
+    with open(destino, "wb") as archivo:
+        exportacion.escribir_reporte(db, archivo, date.fromisoformat(parametros["fecha"]), progreso=progreso)
+
+def _morosidad(db: Session, destino, parametros, progreso):
+    partes = morosidad.excel_morosidad(db, date.fromisoformat(parametros["fecha"]))
+    with open(destino, "wb") as archivo:
+        archivo.writelines(partes)
+
+def _estado_cuenta(db: Session, destino, parametros, progreso):
+    credito = db.query(models.Credito).filter(models.Credito.id == parametros["credito_id"]).first()
+    if not credito:
+        raise ValueError(f"El crédito #{parametros['credito_id']} ya no existe")
+    pagos = db.query(models.Pago).filter(models.Pago.credito_id == credito.id).order_by(models.Pago.fecha).all()
+    with open(destino, "wb") as archivo:
+        documentos.escribir_estado_cuenta(archivo, documentos.datos_estado_cuenta(credito, pagos))
+
+def _estados_cuenta(formato):
+    def generar(db: Session, destino, parametros, progreso):
+        with open(destino, "wb") as archivo:
+            estados_cuenta.escribir_estados_cuenta(db, archivo, formato, progreso=progreso)
+    return generar
+
+# Tipo de trabajo -> cómo se genera y cómo se entrega
+REPORTES = {
+    "reporte_creditos": {
+        "generar": _reporte_creditos,
+        "extension": "xlsx",
+        "media_type": exportacion.TIPO_XLSX,
+        "nombre": lambda p: "reporte_creditos_completo.xlsx",
+    },
+    "morosidad": {
+        "generar": _morosidad,
+        "extension": "xlsx",
+        "media_type": exportacion.TIPO_XLSX,
+        "nombre": lambda p: f"morosidad_{p['fecha']}.xlsx",
+    },
+    "estado_cuenta": {
+        "generar": _estado_cuenta,
+        "extension": "pdf",
+        "media_type": "application/pdf",
+        "nombre": lambda p: f"estado_cuenta_{p['credito_id']}.pdf",
+    },
+    # Todos los créditos activos, en un solo PDF o en un ZIP con uno por crédito
+    "estados_cuenta": {
+        "generar": _estados_cuenta("pdf"),
+        "extension": "pdf",
+        "media_type": lotes_pdf.TIPOS_MEDIA["pdf"],
+        "nombre": lambda p: f"estados_cuenta_{date.today().isoformat()}.pdf",
+    },
+    "estados_cuenta_zip": {
+        "generar": _estados_cuenta("zip"),
+        "extension": "zip",
+        "media_type": lotes_pdf.TIPOS_MEDIA["zip"],
+        "nombre": lambda p: f"estados_cuenta_{date.today().isoformat()}.zip",
+    },
+}
+
+class Trabajo:
+    """Estado de un trabajo encolado (pendiente, en_curso, terminado o error)."""
+
+    def __init__(self, tipo, parametros, prefijo, clave):
+        self.id = uuid.uuid4().hex
+        self.tipo = tipo
+        self.parametros = parametros
+        self.prefijo = prefijo  # Mismo reporte con los mismos parámetros, cualquier versión
+        self.clave = clave      # Prefijo + versión de los datos + fecha
+        self.estado = "pendiente"
+        self.progreso = 0.0
+        self.error = None
+        self.desde_cache = False
+        self.creado = datetime.now()
+        self.terminado = None
+
+    @property
+    def archivo(self):
+        return os.path.join(CARPETA_REPORTES, f"{self.clave}.{REPORTES[self.tipo]['extension']}")
+
+    @property
+    def nombre_archivo(self):
+        return REPORTES[self.tipo]["nombre"](self.parametros)
+
+    @property
+    def media_type(self):
+        return REPORTES[self.tipo]["media_type"]
+
+    def a_dict(self):
+        return {
+            "id": self.id,
+            "tipo": self.tipo,
+            "parametros": self.parametros,
+            "estado": self.estado,
+            "progreso": round(self.progreso * 100, 1),
+            "error": self.error,
+            "desde_cache": self.desde_cache,
+            "creado": self.creado.isoformat(),
+            "terminado": self.terminado.isoformat() if self.terminado else None,
+            "descarga": f"/jobs/{self.id}/descargar" if self.estado == "terminado" else None,
+        }
+
+_trabajos = {}
+_candado = threading.Lock()
+_pool = ThreadPoolExecutor(max_workers=HILOS, thread_name_prefix="trabajo")
+
+def _claves(db: Session, tipo, parametros):
+    parametros_json = json.dumps(parametros, sort_keys=True)
+    prefijo = f"{tipo}_{hashlib.sha1(parametros_json.encode()).hexdigest()[:12]}"
+    return prefijo, f"{prefijo}_{version_datos(db)}_{date.today():%Y%m%d}"
+
+def _olvidar_viejos():
+    """Descarta de memoria los trabajos más viejos ya resueltos, por encima de MAXIMO_TRABAJOS."""
+    resueltos = [t for t in _trabajos.values() if t.estado in ("terminado", "error")]
+    for trabajo in sorted(resueltos, key=lambda t: t.creado)[:max(len(_trabajos) - MAXIMO_TRABAJOS, 0)]:
+        del _trabajos[trabajo.id]
+
+def _borrar_versiones_anteriores(trabajo):
+    for nombre in os.listdir(CARPETA_REPORTES):
+        anterior = nombre.startswith(trabajo.prefijo + "_") and not nombre.startswith(trabajo.clave + ".")
+        # Los '.parcial' son de otro trabajo que todavía está escribiendo
+        if anterior and not nombre.endswith(".parcial"):
+            try:
+                os.remove(os.path.join(CARPETA_REPORTES, nombre))
+            except OSError:
+                pass  # En uso (Windows) o ya borrado: se limpia con la próxima versión
+
+def _ejecutar(trabajo):
+    trabajo.estado = "en_curso"
+    parcial = f"{trabajo.archivo}.{trabajo.id}.parcial"
+
+    def progreso(fraccion):
+        trabajo.progreso = fraccion
+
+    db = database.SessionLocal()
+    try:
+        REPORTES[trabajo.tipo]["generar"](db, parcial, trabajo.parametros, progreso)
+        # Se publica completo o no se publica: nadie ve un archivo a medio escribir
+        os.replace(parcial, trabajo.archivo)
+        _borrar_versiones_anteriores(trabajo)
+        trabajo.progreso = 1.0
+        trabajo.terminado = datetime.now()
+        trabajo.estado = "terminado"
+    except Exception as e:
+        trabajo.error = str(e)
+        trabajo.terminado = datetime.now()
+        trabajo.estado = "error"
+        print(f"⚠️ Error en el trabajo {trabajo.tipo} {trabajo.id}: {e}")
+        if os.path.exists(parcial):
+            os.remove(parcial)
+    finally:
+        db.close()
+
+def encolar(db: Session, tipo, parametros):
+    """
+    Encola un reporte de REPORTES y devuelve su Trabajo. Si el archivo de esa versión de los
+    datos ya está en disco, el trabajo nace terminado; si el mismo reporte ya se está generando,
+    devuelve ese trabajo en lugar de generarlo dos veces.
+    """
+    os.makedirs(CARPETA_REPORTES, exist_ok=True)
+    prefijo, clave = _claves(db, tipo, parametros)
+    with _candado:
+        for trabajo in _trabajos.values():
+            if trabajo.clave == clave and trabajo.estado in ("pendiente", "en_curso"):
+                return trabajo
+
+        trabajo = Trabajo(tipo, parametros, prefijo, clave)
+        _olvidar_viejos()
+        _trabajos[trabajo.id] = trabajo
+        if os.path.exists(trabajo.archivo):
+            trabajo.estado = "terminado"
+            trabajo.progreso = 1.0
+            trabajo.desde_cache = True
+            trabajo.terminado = datetime.now()
+            return trabajo
+
+    _pool.submit(_ejecutar, trabajo)
+    return trabajo
+
+def obtener(trabajo_id):
+    return _trabajos.get(trabajo_id)
+
+def detener():
+    """Cancela los trabajos pendientes al cerrar la aplicación (los que están corriendo terminan)."""
+    _pool.shutdown(wait=False, cancel_futures=True)
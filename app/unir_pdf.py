@@ -0,0 +1,157 @@
+"""
+Unión de los PDFs que genera la aplicación (reportlab) en un solo documento, escrito a medida
+que llegan: el PDF unido se puede ir enviando mientras se generan los siguientes.
+
+La unión tiene dos pasos:
+- fragmento(pdfs), que corre en el pool de procesos de app/lotes_pdf.py: lee los PDFs con pypdf
+  (tabla xref clásica o comprimida, streams de objetos, atributos heredados del árbol de páginas)
+  y serializa con pypdf sus páginas y todo lo que alcanzan por referencias (contenido, recursos,
+  fuentes, imágenes), numerado desde 0. Los streams se copian tal cual, sin decodificarlos; el
+  catálogo, el árbol de páginas y el /Info de cada PDF quedan afuera.
+- UnionPDF, en el proceso del servidor: escribe los fragmentos uno tras otro sumándole a cada
+  número de objeto lo ya escrito (sólo junta bytes, no vuelve a leer ningún PDF) y al final el
+  árbol de páginas único, el catálogo y la tabla xref.
+"""
+from collections import deque
+from io import BytesIO
+from pypdf import PdfReader
+from pypdf.generic import ArrayObject, DictionaryObject, IndirectObject, NameObject, NullObject
+
+# Objetos fijos del documento unido (se escriben al final)
+ARBOL_PAGINAS = 1
+CATALOGO = 2
+
+class _Partes:
+    """Destino de write_to_stream de pypdf que separa los bytes de las referencias a renumerar."""
+
+    def __init__(self):
+        self.partes = []
+        self._bytes = []
+
+    def write(self, datos):
+        self._bytes.append(bytes(datos))
+        return len(datos)
+
+    def referencia(self, numero):
+        self.cerrar()
+        self.partes.append(numero)
+
+    def cerrar(self):
+        if self._bytes:
+            self.partes.append(b"".join(self._bytes))
+            self._bytes = []
+        return self.partes
+
+class _ReferenciaLocal(IndirectObject):
+    """Referencia a un objeto del fragmento: se escribe como su número local, que UnionPDF desplaza."""
+
+    def write_to_stream(self, stream, encryption_key=None):
+        stream.referencia(self.idnum)
+
+def fragmento(pdfs):
+    """
+    Páginas de 'pdfs' (PDFs completos, en orden) como fragmento para UnionPDF.agregar:
+    (objetos, paginas). Cada objeto es su lista de partes: bytes, o el número local (desde 0)
+    del objeto al que hace referencia; 'paginas' son los números locales de las páginas en orden.
+    Corre en los procesos de app/lotes_pdf.py: recibe y devuelve sólo datos simples.
+    """
+    objetos = []
+    paginas = []
+    for pdf in pdfs:
+        lector = PdfReader(BytesIO(pdf))
+        numeros = {}  # (número, generación) en 'pdf' -> número local
+        pendientes = deque()  # (número local, objeto) todavía sin serializar
+        propias = set()
+
+        def numerar(objeto):
+            numero = len(objetos)
+            objetos.append(None)
+            pendientes.append((numero, objeto))
+            return numero
+
+        # Las páginas primero, en orden: las referencias a ellas (anotaciones, destinos) ya tienen número.
+        # Se toman de lector.pages, que les copia lo heredado del árbol de páginas que se descarta
+        for pagina in lector.pages:
+            referencia = pagina.indirect_reference
+            pagina.pop(NameObject("/Parent"), None)
+            numero = numerar(pagina)
+            numeros[(referencia.idnum, referencia.generation)] = numero
+            propias.add(numero)
+            paginas.append(numero)
+
+        def renumerar(valor):
+            """'valor' con sus referencias pasadas a números locales; lo que aparece por primera vez queda pendiente."""
+            if isinstance(valor, IndirectObject):
+                clave = (valor.idnum, valor.generation)
+                if clave not in numeros:
+                    objeto = valor.get_object()
+                    # Una referencia a un objeto que no existe vale null (así la lee cualquier lector)
+                    numeros[clave] = numerar(NullObject() if objeto is None else objeto)
+                return _ReferenciaLocal(numeros[clave], 0, None)
+            # El lector se descarta al terminar: los objetos se modifican en el lugar
+            if isinstance(valor, DictionaryObject):  # También streams y páginas
+                for clave, dato in list(valor.items()):
+                    valor[clave] = renumerar(dato)
+            elif isinstance(valor, ArrayObject):
+                for indice, dato in enumerate(valor):
+                    valor[indice] = renumerar(dato)
+            return valor
+
+        while pendientes:
+            numero, objeto = pendientes.popleft()
+            objeto = renumerar(objeto)
+            if numero in propias:
+                # Número absoluto: el árbol de páginas del documento unido no se desplaza
+                objeto[NameObject("/Parent")] = IndirectObject(ARBOL_PAGINAS, 0, None)
+            partes = _Partes()
+            objeto.write_to_stream(partes)
+            objetos[numero] = partes.cerrar()
+    return objetos, paginas
+
+class UnionPDF:
+    """Arma un PDF con las páginas de varios fragmentos; cada método devuelve los bytes a enviar."""
+
+    def __init__(self):
+        self.posicion = 0
+        self.posiciones = {}  # Número de objeto en el documento unido -> posición en la salida
+        self.paginas = []
+        self.siguiente = CATALOGO + 1
+
+    def _emitir(self, datos):
+        self.posicion += len(datos)
+        return datos
+
+    def inicio(self):
+        return self._emitir(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+
+    def agregar(self, fragmento_pdf):
+        """Agrega un fragmento (ver fragmento) al documento."""
+        objetos, paginas = fragmento_pdf
+        base = self.siguiente
+        self.siguiente += len(objetos)
+        self.paginas.extend(base + pagina for pagina in paginas)
+
+        salida = []
+        for local, partes in enumerate(objetos):
+            cuerpo = b"".join(parte if isinstance(parte, bytes) else b"%d 0 R" % (base + parte) for parte in partes)
+            self.posiciones[base + local] = self.posicion
+            salida.append(self._emitir(b"%d 0 obj\n%s\nendobj\n" % (base + local, cuerpo)))
+        return b"".join(salida)
+
+    def fin(self):
+        """Árbol de páginas, catálogo, tabla xref y trailer."""
+        hijas = b" ".join(b"%d 0 R" % pagina for pagina in self.paginas)
+        partes = []
+        for numero, cuerpo in (
+            (ARBOL_PAGINAS, b"<< /Type /Pages /Count %d /Kids [ %s ] >>" % (len(self.paginas), hijas)),
+            (CATALOGO, b"<< /Type /Catalog /Pages %d 0 R >>" % ARBOL_PAGINAS),
+        ):
+            self.posiciones[numero] = self.posicion
+            partes.append(self._emitir(b"%d 0 obj\n%s\nendobj\n" % (numero, cuerpo)))
+
+        inicio_xref = self.posicion
+        tabla = [b"xref\n0 %d\n" % self.siguiente, b"0000000000 65535 f \n"]
+        tabla.extend(b"%010d 00000 n \n" % self.posiciones[numero] for numero in range(1, self.siguiente))
+        tabla.append(b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (self.siguiente, CATALOGO, inicio_xref))
+        partes.append(self._emitir(b"".join(tabla)))
+        return b"".join(partes)
@@ -0,0 +1,152 @@
+"""
+Benchmark de la exportación a Excel (/exportar_excel) sobre una cartera sintética.
+
+Genera una base SQLite temporal con N créditos (100.000 por defecto) y mide cada modo en su
+propio proceso, para que la memoria pico de uno no se mezcle con la del otro:
+- streaming: app/exportacion.py (lotes por id + XML de la hoja comprimido y enviado por lote)
+- anterior:  toda la cartera en un DataFrame y pandas.ExcelWriter a un BytesIO
+Informa tiempo total, tiempo hasta el primer bloque y memoria pico de cada modo.
+
+Uso: python benchmark_exportacion.py [--creditos 100000] [--sin-anterior]
+"""
+import argparse
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from io import BytesIO
+
+def memoria_pico_mb():
+    """Memoria pico del proceso (RSS) en MB; None si el sistema no la informa (Windows)."""
+    # En Linux ru_maxrss arrastra la memoria del proceso padre antes del exec: VmHWM es la propia
+    try:
+        with open("/proc/self/status") as status:
+            for linea in status:
+                if linea.startswith("VmHWM:"):
+                    return int(linea.split()[1]) / 1024
+    except OSError:
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux informa KB; macOS, bytes
+    return pico / (1024 * 1024) if sys.platform == "darwin" else pico / 1024
+
+def crear_cartera(ruta, cantidad, semilla=1):
+    from sqlalchemy import create_engine, insert
+    from app import models, planes
+
+    engine = create_engine(f"sqlite:///{ruta}")
+    models.Base.metadata.create_all(bind=engine)
+    rnd = random.Random(semilla)
+    nombres = ["GOMEZ", "PEREZ", "RODRIGUEZ", "FERNANDEZ", "LOPEZ", "MARTINEZ", "SOSA", "DIAZ"]
+    calles = ["CALAMUCHITA", "BARRIO CABILDO", "AV. SABATTINI", "RUTA 20", "OBISPO SALGUERO"]
+
+    clientes, creditos = [], []
+    for i in range(1, cantidad + 1):
+        clientes.append({
+            "id": i,
+            "nombre": f"{rnd.choice(nombres)} {rnd.choice(nombres)} {i}",
+            "direccion": f"{rnd.choice(calles)} {rnd.randint(1, 9000)}",
+            "lugar_trabajo": rnd.choice([None, "COMERCIO", "MUNICIPALIDAD"]),
+            "telefono": str(3510000000 + i),
+            "dni": str(20000000 + i),
+        })
+        frecuencia = rnd.choice(list(planes.PLANES_CONFIG))
+        plazo = rnd.choice(list(planes.PLANES_CONFIG[frecuencia]))
+        monto = rnd.choice([50000, 100000, 150000, 300000])
+        plan = planes.calcular_plan(monto, frecuencia, plazo)
+        pagado = round(rnd.uniform(0, plan["monto_total"]), 2)
+        creditos.append({
+            "id": i,
+            "cliente_id": i,
+            "monto_prestado": monto,
+            "tasa_interes": plan["factor"],
+            "monto_total": plan["monto_total"],
+            "semanas": plan["semanas"],
+            "frecuencia": frecuencia,
+            "pago_semanal": plan["pago_periodo"],
+            "fecha_inicio": date(2024, 1, 1) + timedelta(days=rnd.randint(0, 700)),
+            "recargos": 0.0,
+            "activo": True,
+            "total_pagado": pagado,
+            "saldo": plan["monto_total"] - pagado,
+            "cantidad_pagos": 0,
+        })
+
+    with engine.begin() as conexion:
+        conexion.execute(insert(models.Cliente), clientes)
+        conexion.execute(insert(models.Credito), creditos)
+    engine.dispose()
+
+def medir(modo, ruta):
+    """Corre un modo sobre la base 'ruta' e imprime 'segundos primer_bloque memoria bytes'."""
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    sesion = sessionmaker(bind=create_engine(f"sqlite:///{ruta}"))
+
+    inicio = time.perf_counter()
+    primer_bloque = None
+    total = 0
+    if modo == "streaming":
+        from app import exportacion
+        for bloque in exportacion.stream_reporte(sesion):
+            if primer_bloque is None:
+                primer_bloque = time.perf_counter() - inicio
+            total += len(bloque)
+    else:
+        import pandas as pd
+        from app import motor_creditos, exportacion
+        db = sesion()
+        creditos = motor_creditos.cargar_creditos(db)
+        estados = motor_creditos.calcular_estado(creditos)
+        df = exportacion.hoja_reporte(creditos, estados)
+        stream = BytesIO()
+        with pd.ExcelWriter(stream) as writer:
+            df.to_excel(writer, index=False)
+        db.close()
+        primer_bloque = time.perf_counter() - inicio
+        total = len(stream.getvalue())
+    segundos = time.perf_counter() - inicio
+    memoria = memoria_pico_mb()
+    print(f"{segundos:.2f} {primer_bloque:.2f} {memoria if memoria is not None else -1:.0f} {total}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--creditos", type=int, default=100000)
+    parser.add_argument("--sin-anterior", action="store_true", help="no medir la exportación anterior (en memoria)")
+    parser.add_argument("--medir", choices=["streaming", "anterior"], help=argparse.SUPPRESS)
+    parser.add_argument("--base", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.medir:
+        medir(args.medir, args.base)
+        sys.exit(0)
+
+    carpeta = tempfile.mkdtemp(prefix="benchmark_exportacion_")
+    try:
+        ruta = os.path.join(carpeta, "cartera.db")
+        inicio = time.perf_counter()
+        crear_cartera(ruta, args.creditos)
+        print(f"Cartera sintética: {args.creditos} créditos ({time.perf_counter() - inicio:.1f} s)")
+
+        modos = ["streaming"] if args.sin_anterior else ["streaming", "anterior"]
+        for modo in modos:
+            salida = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--medir", modo, "--base", ruta],
+                capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__)),
+            )
+            if salida.returncode != 0:
+                print(f"  ❌ {modo}: {salida.stderr.strip()[-500:]}")
+                continue
+            segundos, primer_bloque, memoria, tamano = salida.stdout.split()[-4:]
+            memoria = f"{memoria} MB" if memoria != "-1" else "n/d"
+            print(f"{modo:>10}: total {segundos} s | primer bloque {primer_bloque} s | memoria pico {memoria} | {int(tamano) / 1e6:.1f} MB")
+    finally:
+        shutil.rmtree(carpeta, ignore_errors=True)
@@ -0,0 +1,303 @@
+"""
+Benchmark de la importación de la planilla (import_data.py) sobre datos_clientes.xlsx agrandada.
+
+Repite las filas de la planilla N veces (100 por defecto), cada copia con nombres y DNIs
+propios para que sean clientes distintos, y mide cada importador en su propio proceso sobre
+una base SQLite temporal:
+- registros: import_data.importar_registros con los registros de app/lector_excel.py (clientes
+  resueltos en memoria, inserciones masivas en una transacción)
+- anterior:  fila por fila con iterrows sobre pd.read_excel, una consulta por cliente y commit
+  por cliente y crédito
+Al final compara las dos bases (clientes, créditos, pagos y cuotas) para confirmar que el
+resultado es el mismo. Acá la lectura del Excel no se mide.
+
+Con --lectura, en cambio, escribe la planilla agrandada a un .xlsx y compara la lectura:
+pd.read_excel (la grilla entera en memoria) contra app/lector_excel.py (por streaming), con el
+tiempo y el pico de memoria de cada proceso.
+
+Uso: python benchmark_importacion.py [--veces 100] [--sin-anterior] [--lectura]
+"""
+import argparse
+import datetime
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+PLANILLA = "datos_clientes.xlsx"
+
+def _copia(nombre, dni, k):
+    """Nombre y DNI de la copia k (la 0 es la original)."""
+    if k and isinstance(nombre, str):
+        nombre = f"{nombre} #{k:03d}"
+    if k and dni is not None:
+        dni = f"{dni}-{k}"
+    return nombre, dni
+
+def planilla_agrandada(veces):
+    """La planilla repetida 'veces' como DataFrame (para la importación anterior)."""
+    import pandas as pd
+
+    original = pd.read_excel(PLANILLA)
+    original.columns = [str(c).strip() for c in original.columns]
+    copias = []
+    for k in range(veces):
+        copia = original.copy()
+        if k:
+            copia["Nombre y Apellido"] = copia["Nombre y Apellido"].map(lambda n: _copia(n, None, k)[0])
+            copia["D.N.I"] = copia["D.N.I"].map(lambda d: _copia(None, d, k)[1] if pd.notna(d) else d)
+        copias.append(copia)
+    return pd.concat(copias, ignore_index=True)
+
+def filas_agrandadas(veces):
+    """Las filas de la planilla repetidas 'veces', numeradas como en planilla_agrandada."""
+    from app import lector_excel
+
+    original = list(lector_excel.filas(PLANILLA))
+    for k in range(veces):
+        for numero, fila in original:
+            fila = dict(fila)
+            fila["Nombre y Apellido"], fila["D.N.I"] = _copia(fila["Nombre y Apellido"], fila["D.N.I"], k)
+            yield numero + k * len(original), fila
+
+def importar_anterior(db, df):
+    """La importación fila por fila que reemplazó importar_dataframe (para comparar)."""
+    import pandas as pd
+    from import_data import Cliente, Credito, Pago, clean_money, parse_date, extract_phone, parse_plan_details, is_payment_column
+    from app.metricas import reconstruir_metricas
+    from app.saldos import reconstruir_saldos
+    from app.conciliacion import reconciliar_activos
+    from app.cuotas import reconstruir_cuotas
+
+    db.query(Pago).delete()
+    db.query(Credito).delete()
+    db.query(Cliente).delete()
+    db.commit()
+
+    if 'CTO.' in df.columns:
+        df['CTO_Clean'] = pd.to_numeric(df['CTO.'], errors='coerce').fillna(0)
+        df = df.sort_values(by=['Nombre y Apellido', 'CTO_Clean'])
+
+    for index, row in df.iterrows():
+        try:
+            nombre = str(row.get('Nombre y Apellido', '')).strip()
+            dni = str(row.get('D.N.I', '')).strip()
+            domicilio = str(row.get('Domicilio part. y laboral', '')).strip()
+            if pd.isna(row.get('Pendiente $$$')):
+                continue
+            telefono = extract_phone(domicilio)
+            if not nombre or nombre.lower() == 'nan':
+                continue
+            if not dni or dni.lower() == 'nan':
+                dni = f"S/D-{index}"
+
+            cliente_existente = db.query(Cliente).filter(Cliente.dni == dni).first()
+            if cliente_existente:
+                nombre_existente = cliente_existente.nombre.lower()
+                nombre_nuevo = nombre.lower()
+                if nombre_nuevo not in nombre_existente and nombre_existente not in nombre_nuevo:
+                    dni = f"{dni}-{index}"
+                    cliente = None
+                else:
+                    cliente = cliente_existente
+            else:
+                cliente = db.query(Cliente).filter(Cliente.nombre == nombre).first()
+
+            if not cliente:
+                cliente = Cliente(nombre=nombre, dni=dni, direccion=domicilio, telefono=telefono, fecha_registro=datetime.date.today())
+                db.add(cliente)
+                db.commit()
+                db.refresh(cliente)
+            elif cliente.telefono == "Sin registrar" and telefono != "Sin registrar":
+                cliente.telefono = telefono
+                db.commit()
+
+            try:
+                monto_prestado = clean_money(row.get('Capital', 0))
+                monto_devolver_excel = clean_money(row.get('Monto Devolver', 0))
+                fecha_inicio = parse_date(row.get('Fecha Inicio del credito')) or datetime.date.today()
+                fecha_final_excel = parse_date(row.get('Fecha Final del credito'))
+                semanas, monto_total, frecuencia = parse_plan_details(str(row.get('Plan. Pagos', '')), monto_devolver_excel)
+                if frecuencia == "Unico":
+                    if fecha_final_excel and fecha_final_excel > fecha_inicio:
+                        semanas = (fecha_final_excel - fecha_inicio).days / 7.0
+                    else:
+                        semanas = 4.0
+                if monto_total == 0:
+                    monto_total = monto_prestado
+                pago_semanal = monto_total / semanas if semanas > 0 else 0
+                cto_num = str(row.get('CTO.', ''))
+
+                credito = Credito(
+                    cliente_id=cliente.id, monto_prestado=monto_prestado, tasa_interes=0, monto_total=monto_total,
+                    semanas=semanas, frecuencia=frecuencia, pago_semanal=pago_semanal, fecha_inicio=fecha_inicio, activo=True,
+                )
+                db.add(credito)
+                db.commit()
+                db.refresh(credito)
+
+                payment_cols = [c for c in df.columns if is_payment_column(c)]
+                for col_fecha in payment_cols:
+                    monto_pago = clean_money(row.get(col_fecha))
+                    if monto_pago > 0:
+                        fecha_pago = parse_date(col_fecha)
+                        if fecha_pago:
+                            db.add(Pago(credito_id=credito.id, monto=monto_pago, fecha=fecha_pago, nota=f"Imp. Excel (CTO {cto_num})"))
+                db.commit()
+            except Exception:
+                db.rollback()
+        except Exception:
+            db.rollback()
+
+    reconstruir_saldos(db)
+    reconciliar_activos(db)
+    reconstruir_cuotas(db)
+    reconstruir_metricas(db)
+    db.commit()
+
+def medir(modo, ruta, veces):
+    """Importa la planilla agrandada con 'modo' en la base 'ruta' e imprime 'segundos filas'."""
+    import contextlib
+    import io
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    import import_data
+    from app import models
+
+    from app import lector_excel
+
+    engine = create_engine(f"sqlite:///{ruta}")
+    models.Base.metadata.create_all(bind=engine)
+    if modo == "registros":
+        datos = list(lector_excel.registros(filas_agrandadas(veces)))
+    else:
+        datos = planilla_agrandada(veces)
+    db = sessionmaker(bind=engine)()
+
+    inicio = time.perf_counter()
+    # Los avisos por fila (discrepancias, filas salteadas) no interesan acá
+    with contextlib.redirect_stdout(io.StringIO()):
+        if modo == "registros":
+            import_data.importar_registros(db, datos)
+        else:
+            importar_anterior(db, datos)
+    segundos = time.perf_counter() - inicio
+    db.close()
+    print(f"{segundos:.2f} {len(datos)}")
+
+def escribir_agrandada(ruta, veces):
+    """Escribe la planilla agrandada como .xlsx (openpyxl en modo write_only, también por streaming)."""
+    import openpyxl
+    from app import lector_excel
+
+    libro = openpyxl.Workbook(write_only=True)
+    hoja = libro.create_sheet()
+    encabezados = None
+    for _, fila in filas_agrandadas(veces):
+        if encabezados is None:
+            encabezados = list(fila)
+            hoja.append(encabezados)
+        hoja.append([fila[c] for c in encabezados])
+    libro.save(ruta)
+
+def medir_lectura(modo, ruta):
+    """Lee 'ruta' con 'modo' e imprime 'segundos filas pico_MB' (pico de memoria de todo el proceso)."""
+    import resource
+
+    inicio = time.perf_counter()
+    if modo == "pandas":
+        import pandas as pd
+        filas = len(pd.read_excel(ruta))
+    else:
+        from app import lector_excel
+        filas = sum(1 for _ in lector_excel.leer(ruta))
+    segundos = time.perf_counter() - inicio
+    # ru_maxrss está en KB en Linux
+    print(f"{segundos:.2f} {filas} {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.0f}")
+
+# Contenido de cada tabla sin ids: las filas de créditos, pagos y cuotas se identifican por su
+# cliente (nombre y DNI) y su crédito (fecha de inicio y montos). Los ids pueden cambiar: la
+# importación anterior ordenaba por el nombre tal cual venía (" ALFARO" antes que "ABACA")
+_CREDITO = "cl.nombre, cl.dni, cr.fecha_inicio, cr.monto_prestado, cr.monto_total"
+CONTENIDO = {
+    "clientes": "SELECT nombre, dni, direccion, telefono, lugar_trabajo, foto_perfil, fecha_registro FROM clientes cl",
+    "creditos": f"SELECT {_CREDITO}, cr.tasa_interes, cr.semanas, cr.frecuencia, cr.pago_semanal, cr.recargos, cr.activo, "
+                "cr.total_pagado, cr.saldo, cr.ultimo_pago_fecha, cr.cantidad_pagos "
+                "FROM creditos cr JOIN clientes cl ON cl.id = cr.cliente_id",
+    "pagos": f"SELECT {_CREDITO}, p.fecha, p.monto FROM pagos p "
+             "JOIN creditos cr ON cr.id = p.credito_id JOIN clientes cl ON cl.id = cr.cliente_id",
+    "cuotas": f"SELECT {_CREDITO}, cu.numero, cu.fecha_vencimiento, cu.monto, cu.monto_pagado FROM cuotas cu "
+              "JOIN creditos cr ON cr.id = cu.credito_id JOIN clientes cl ON cl.id = cr.cliente_id",
+}
+
+def comparar(rutas):
+    """
+    True si todas las bases tienen los mismos clientes, créditos, pagos y cuotas (ver CONTENIDO;
+    sin las notas de los pagos: la anterior escribía el CTO como lo leía pandas, '2762.0').
+    """
+    import sqlite3
+    from collections import Counter
+
+    contenidos = []
+    for ruta in rutas:
+        conexion = sqlite3.connect(ruta)
+        contenidos.append({tabla: Counter(conexion.execute(consulta).fetchall()) for tabla, consulta in CONTENIDO.items()})
+        conexion.close()
+    return all(c == contenidos[0] for c in contenidos[1:])
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--veces", type=int, default=100)
+    parser.add_argument("--sin-anterior", action="store_true", help="no medir la importación anterior (fila por fila)")
+    parser.add_argument("--lectura", action="store_true", help="comparar la lectura del .xlsx (pandas contra streaming)")
+    parser.add_argument("--medir", choices=["registros", "anterior", "pandas", "streaming"], help=argparse.SUPPRESS)
+    parser.add_argument("--base", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.medir in ("pandas", "streaming"):
+        medir_lectura(args.medir, args.base)
+        sys.exit(0)
+    if args.medir:
+        medir(args.medir, args.base, args.veces)
+        sys.exit(0)
+
+    carpeta = tempfile.mkdtemp(prefix="benchmark_importacion_")
+    if args.lectura:
+        try:
+            ruta = os.path.join(carpeta, "planilla.xlsx")
+            escribir_agrandada(ruta, args.veces)
+            for modo in ("pandas", "streaming"):
+                salida = subprocess.run(
+                    [sys.executable, os.path.abspath(__file__), "--medir", modo, "--base", ruta],
+                    capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__)),
+                )
+                if salida.returncode != 0:
+                    print(f"  ❌ {modo}: {salida.stderr.strip()[-500:]}")
+                    continue
+                segundos, filas, pico = salida.stdout.split()[-3:]
+                print(f"{modo:>10}: {segundos} s, pico {pico} MB para {filas} filas ({args.veces}x {PLANILLA})")
+        finally:
+            shutil.rmtree(carpeta, ignore_errors=True)
+        sys.exit(0)
+
+    try:
+        modos = ["registros"] if args.sin_anterior else ["registros", "anterior"]
+        rutas = []
+        for modo in modos:
+            ruta = os.path.join(carpeta, f"{modo}.db")
+            salida = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--medir", modo, "--base", ruta, "--veces", str(args.veces)],
+                capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__)),
+            )
+            if salida.returncode != 0:
+                print(f"  ❌ {modo}: {salida.stderr.strip()[-500:]}")
+                continue
+            segundos, filas = salida.stdout.split()[-2:]
+            print(f"{modo:>12}: {segundos} s para {filas} filas ({args.veces}x {PLANILLA})")
+            rutas.append(ruta)
+        if len(rutas) > 1:
+            print("Mismo resultado en las dos bases:", "sí" if comparar(rutas) else "NO")
+    finally:
+        shutil.rmtree(carpeta, ignore_errors=True)
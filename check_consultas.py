@@ -0,0 +1,73 @@
+"""
+Verifica que las páginas de listado de clientes ejecuten una cantidad FIJA de consultas,
+sin importar cuántos clientes haya (evita que vuelva el problema N+1).
+
+Uso: python check_consultas.py
+"""
+import os
+import sys
+import tempfile
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from starlette.requests import Request
+from app import models, busqueda
+from app.main import read_root, buscar_cliente, lista_clientes
+
+def crear_base(cantidad_clientes, ruta):
+    engine = create_engine(f"sqlite:///{ruta}")
+    models.Base.metadata.create_all(bind=engine)
+    busqueda.asegurar_indice_busqueda(engine)
+    Session = sessionmaker(bind=engine)
+    db = Session()
+    for i in range(cantidad_clientes):
+        cliente = models.Cliente(nombre=f"Cliente {i:05d}", dni=str(20000000 + i), direccion="-", telefono="-")
+        db.add(cliente)
+        db.flush()
+        db.add(models.Credito(cliente_id=cliente.id, monto_prestado=1000, tasa_interes=1.92, monto_total=1920,
+                              semanas=11, frecuencia="Semanal", pago_semanal=174.5, activo=(i % 2 == 0)))
+    db.commit()
+    return engine, db
+
+def contar_consultas(engine, funcion):
+    contador = {"total": 0}
+
+    def _contar(conn, cursor, statement, parameters, context, executemany):
+        contador["total"] += 1
+
+    event.listen(engine, "before_cursor_execute", _contar)
+    try:
+        funcion()
+    finally:
+        event.remove(engine, "before_cursor_execute", _contar)
+    return contador["total"]
+
+def request_falso(path):
+    return Request({"type": "http", "method": "GET", "path": path, "headers": [], "query_string": b""})
+
+def medir(cantidad_clientes):
+    with tempfile.TemporaryDirectory() as tmp:
+        engine, db = crear_base(cantidad_clientes, os.path.join(tmp, "check.db"))
+        try:
+            return {
+                "/": contar_consultas(engine, lambda: read_root(request_falso("/"), db)),
+                "/buscar": contar_consultas(engine, lambda: buscar_cliente("Cliente", request_falso("/buscar"), db)),
+                "/lista_clientes": contar_consultas(engine, lambda: lista_clientes(request_falso("/lista_clientes"), db)),
+            }
+        finally:
+            db.close()
+            engine.dispose()
+
+if __name__ == "__main__":
+    pocos = medir(5)
+    muchos = medir(500)
+
+    ok = True
+    for pagina in pocos:
+        print(f"{pagina}: {pocos[pagina]} consultas con 5 clientes, {muchos[pagina]} con 500 clientes")
+        if pocos[pagina] != muchos[pagina]:
+            ok = False
+
+    if not ok:
+        print("❌ La cantidad de consultas depende de la cantidad de clientes (N+1).")
+        sys.exit(1)
+    print("✅ Cantidad de consultas constante.")
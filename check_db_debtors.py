@@ -8,21 +8,14 @@ SessionLocal = sessionmaker(bind=engine)
 db = SessionLocal()
 
 print("--- Top Debtors in DB ---")
-creditos = db.query(Credito).all()
-data = []
-for c in creditos:
-    pagado = sum([p.monto for p in c.pagos])
-    restante = c.monto_total - pagado
-    data.append({
-        'id': c.id,
-        'cliente': c.cliente.nombre,
-        'dni': c.cliente.dni,
-        'total': c.monto_total,
-        'restante': restante
-    })
+# Saldo guardado en cada crédito: ordena por el índice ix_creditos_saldo sin sumar pagos
+top = (
+    db.query(Credito.id, Cliente.nombre, Cliente.dni, Credito.monto_total, Credito.saldo)
+    .join(Cliente, Cliente.id == Credito.cliente_id)
+    .order_by(Credito.saldo.desc())
+    .limit(10)
+    .all()
+)
 
-# Sort by restante descending
-data.sort(key=lambda x: x['restante'], reverse=True)
-
-for d in data[:10]:
-    print(f"Cliente: {d['cliente']} (DNI: {d['dni']}) | Deuda: ${d['restante']:,.2f} | Total Orig: ${d['total']:,.2f}")
+for d in top:
+    print(f"Cliente: {d.nombre} (DNI: {d.dni}) | Deuda: ${d.saldo:,.2f} | Total Orig: ${d.monto_total:,.2f}")
@@ -0,0 +1,77 @@
+"""
+Verifica la importación incremental de import_data.py (--actualizar) contra una planilla con las
+filas corridas: importa datos_clientes.xlsx entera en una base SQLite temporal y después la
+actualiza con la misma planilla con filas vacías agregadas arriba y los datos en orden inverso.
+Los datos son los mismos, así que no tiene que haber ningún cambio: los DNI provisorios (S/D-<fila>)
+de los clientes sin DNI cambian con la fila y no pueden usarse para reconocerlos.
+
+Uso: python check_importacion.py
+"""
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import openpyxl
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import sessionmaker
+from app.models import Base, Cliente, Credito, Pago
+import import_data
+
+PLANILLA = "datos_clientes.xlsx"
+FILAS_VACIAS = 3
+
+def planilla_corrida(destino):
+    """Copia de la planilla con FILAS_VACIAS filas vacías bajo el encabezado y las filas de datos invertidas."""
+    original = openpyxl.load_workbook(PLANILLA, read_only=True, data_only=True)
+    try:
+        filas = list(original.worksheets[0].iter_rows(values_only=True))
+    finally:
+        original.close()
+    libro = openpyxl.Workbook(write_only=True)
+    hoja = libro.create_sheet()
+    hoja.append(filas[0])
+    for _ in range(FILAS_VACIAS):
+        hoja.append([])
+    for fila in reversed(filas[1:]):
+        hoja.append(fila)
+    libro.save(destino)
+
+def contar(db):
+    return {modelo.__tablename__: db.scalar(select(func.count()).select_from(modelo)) for modelo in (Cliente, Credito, Pago)}
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as carpeta:
+        engine = create_engine(f"sqlite:///{os.path.join(carpeta, 'creditos.db')}")
+        Base.metadata.create_all(bind=engine)
+        Sesion = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+        corrida = os.path.join(carpeta, "corrida.xlsx")
+        planilla_corrida(corrida)
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            registros = list(import_data.lector_excel.leer(PLANILLA))
+            registros_corridos = list(import_data.lector_excel.leer(corrida))
+        sin_dni = sum(1 for registro in registros if registro["cliente"]["nombre"] and not registro["cliente"]["dni"])
+
+        with Sesion() as db:
+            with contextlib.redirect_stdout(io.StringIO()):
+                import_data.importar_registros(db, registros)
+            antes = contar(db)
+            nombres = dict(db.execute(select(Cliente.id, Cliente.nombre)).all())
+            with contextlib.redirect_stdout(io.StringIO()):
+                resumen = import_data.actualizar_registros(db, registros_corridos)
+            despues = contar(db)
+            renombrados = sum(1 for id_, nombre in db.execute(select(Cliente.id, Cliente.nombre)) if nombres.get(id_) != nombre)
+        engine.dispose()
+
+    print(f"{len(registros)} filas ({sin_dni} sin DNI), corridas {FILAS_VACIAS} filas y en orden inverso")
+    print(f"Resumen de la actualización: {resumen}")
+    errores = [f"{concepto}: {cantidad}" for concepto, cantidad in resumen.items() if concepto != "creditos_omitidos" and cantidad]
+    errores += [f"{tabla}: {antes[tabla]} -> {despues[tabla]} filas" for tabla in antes if antes[tabla] != despues[tabla]]
+    if renombrados:
+        errores.append(f"{renombrados} clientes renombrados")
+    for error in errores:
+        print(f"  ❌ {error}")
+    if errores:
+        sys.exit(1)
+    print("✅ La planilla con las filas corridas no cambia nada en la base.")
@@ -0,0 +1,251 @@
+"""
+Verifica que el motor vectorizado (app/motor_creditos.py) dé los mismos resultados que
+el cálculo escalar original de 'detalle_cliente', crédito por crédito.
+La referencia cuenta días hábiles con pandas (sin el calendario precalculado),
+excluyendo los mismos feriados.
+
+Compara sobre los créditos reales de la base y sobre una cartera sintética aleatoria,
+para varias fechas de "hoy".
+
+Uso: python check_motor_creditos.py
+"""
+import random
+import sys
+from datetime import date, timedelta
+import numpy as np
+import pandas as pd
+from sqlalchemy.orm import sessionmaker
+from app.database import engine
+from app.models import Base
+from app import motor_creditos, calendario, cuotas
+
+FERIADOS = calendario.cargar_feriados()
+DIA_HABIL = pd.offsets.CustomBusinessDay(holidays=FERIADOS)
+
+def resumen_escalar(credito, total_pagado, hoy):
+    """Cálculo original de 'detalle_cliente' para un crédito (referencia)."""
+    recargos = credito["recargos"] or 0.0
+    monto_total_con_recargos = credito["monto_total"] + recargos
+    fecha_final = credito["fecha_inicio"] + timedelta(weeks=credito["semanas"])
+
+    dias_habiles_transcurridos = 0
+    if hoy >= credito["fecha_inicio"]:
+        dias_habiles_transcurridos = len(pd.bdate_range(start=credito["fecha_inicio"], end=hoy, freq="C", holidays=FERIADOS)) - 1
+
+    dias_habiles_periodo = 5
+    cuota_periodo = credito["pago_semanal"]
+    if credito["frecuencia"] == "Mensual":
+        dias_habiles_periodo = 20
+        cuota_periodo = credito["pago_semanal"] * 4
+    elif credito["frecuencia"] == "Quincenal":
+        dias_habiles_periodo = 10
+        cuota_periodo = credito["pago_semanal"] * 2
+    elif credito["frecuencia"] == "Unico":
+        dias_habiles_periodo = 99999
+        cuota_periodo = 0
+
+    periodos = dias_habiles_transcurridos // dias_habiles_periodo
+    if periodos < 0: periodos = 0
+    monto_esperado = periodos * cuota_periodo
+
+    if credito["frecuencia"] == "Unico":
+        proximo = fecha_final
+    else:
+        proximo = (pd.Timestamp(credito["fecha_inicio"]) + (periodos + 1) * dias_habiles_periodo * DIA_HABIL).date()
+
+    if hoy > fecha_final:
+        monto_esperado = monto_total_con_recargos
+    elif monto_esperado > monto_total_con_recargos:
+        monto_esperado = monto_total_con_recargos
+
+    atraso = monto_esperado - total_pagado
+    restante = monto_total_con_recargos - total_pagado
+    estado = "Activo"
+    if restante <= 0.1:
+        estado = "Finalizado"
+        restante = 0
+        atraso = 0
+
+    dias_habiles_periodo = 5
+    if credito["frecuencia"] == "Quincenal":
+        dias_habiles_periodo = 10
+    elif credito["frecuencia"] == "Mensual":
+        dias_habiles_periodo = 20
+
+    dias_abonados = 0
+    costo_diario = 0
+    if credito["pago_semanal"] > 0:
+        costo_diario = credito["pago_semanal"] / dias_habiles_periodo
+        cantidad_total_dias = (monto_total_con_recargos / credito["pago_semanal"]) * 5
+        if monto_total_con_recargos > 0:
+            dias_abonados = (total_pagado / monto_total_con_recargos) * cantidad_total_dias
+    else:
+        cantidad_total_dias = (fecha_final - credito["fecha_inicio"]).days
+        if monto_total_con_recargos > 0:
+            dias_abonados = (total_pagado / monto_total_con_recargos) * cantidad_total_dias
+
+    dias_pendientes = cantidad_total_dias - dias_abonados
+    if dias_pendientes < 0: dias_pendientes = 0
+
+    porcentaje = 0
+    if monto_total_con_recargos > 0:
+        porcentaje = int((total_pagado / monto_total_con_recargos) * 100)
+        if porcentaje > 100: porcentaje = 100
+
+    return {
+        "pagado": total_pagado,
+        "restante": restante,
+        "deberia_llevar": monto_esperado,
+        "atraso": max(0, atraso),
+        "porcentaje": porcentaje,
+        "proximo_vencimiento": proximo if estado == "Activo" else None,
+        "estado": estado,
+        "recargos": recargos,
+        "monto_total_final": monto_total_con_recargos,
+        "fecha_final": fecha_final,
+        "cantidad_total_dias": round(cantidad_total_dias),
+        "dias_abonados": round(dias_abonados),
+        "dias_pendientes": round(dias_pendientes),
+        "costo_diario": costo_diario,
+    }
+
+def cartera_sintetica(cantidad, semilla=1):
+    rnd = random.Random(semilla)
+    filas = []
+    for i in range(cantidad):
+        frecuencia = rnd.choice(["Semanal", "Quincenal", "Mensual", "Unico"])
+        semanas = rnd.choice([11, 14.4, 14.2, 22, 32, 40, 48, 12, 4.5, 16]) if rnd.random() > 0.05 else rnd.uniform(0.1, 60)
+        monto_total = round(rnd.uniform(10000, 900000), 2)
+        pago = monto_total / semanas if rnd.random() > 0.05 else 0.0
+        filas.append({
+            "id": i + 1,
+            "fecha_inicio": date(2022, 1, 1) + timedelta(days=rnd.randint(0, 1500)),
+            "semanas": semanas,
+            "frecuencia": frecuencia,
+            "pago_semanal": pago,
+            "monto_total": monto_total,
+            "recargos": rnd.choice([0.0, 0.0, 5000.0]),
+            "total_pagado": rnd.choice([0.0, monto_total, rnd.uniform(0, monto_total * 1.1)]),
+        })
+    return pd.DataFrame(filas)
+
+def cartera_plazo_largo(semanas=5000.0):
+    """
+    Créditos con un plazo manual de décadas (los que aceptaba POST /creditos/ con semanas='5000',
+    o importados así): terminan después del rango precalculado del calendario.
+    """
+    monto_total = 120000.0
+    filas = []
+    for frecuencia in ["Semanal", "Quincenal", "Mensual", "Unico"]:
+        for total_pagado in [0.0, 3000.0, monto_total]:
+            filas.append({
+                "id": len(filas) + 1,
+                "fecha_inicio": date(2024, 3, 4),
+                "semanas": semanas,
+                "frecuencia": frecuencia,
+                "pago_semanal": monto_total / semanas,
+                "monto_total": monto_total,
+                "recargos": 0.0,
+                "total_pagado": total_pagado,
+            })
+    return pd.DataFrame(filas)
+
+def iguales(a, b):
+    if isinstance(a, float) or isinstance(b, float):
+        return abs(a - b) <= 1e-6 * max(1.0, abs(a), abs(b))
+    return a == b
+
+def comparar_calendario(cantidad, semilla=2, primera=date(2022, 1, 1), dias=1800):
+    """
+    Compara el calendario precalculado contra np.busday_count / CustomBusinessDay, con fechas
+    desde 'primera' hasta 'dias' después (pueden caer fuera del rango precalculado).
+    """
+    cal = calendario.calendario()
+    rnd = random.Random(semilla)
+    desde = [primera + timedelta(days=rnd.randint(0, dias)) for _ in range(cantidad)]
+    hasta = [d + timedelta(days=rnd.randint(0, 400)) for d in desde]
+    n = [rnd.randint(1, 300) for _ in range(cantidad)]
+
+    errores = 0
+    entre = cal.dias_habiles_entre(desde, hasta)
+    fechas = cal.fecha_habil(desde, n)
+    for i in range(cantidad):
+        esperado_entre = int(np.busday_count(desde[i], hasta[i], holidays=FERIADOS))
+        esperado_fecha = (pd.Timestamp(desde[i]) + n[i] * DIA_HABIL).date()
+        if entre[i] != esperado_entre or pd.Timestamp(fechas[i]).date() != esperado_fecha:
+            errores += 1
+            if errores <= 10:
+                print(f"  ❌ Calendario {desde[i]} -> {hasta[i]} / +{n[i]}: "
+                      f"{entre[i]} vs {esperado_entre}, {fechas[i]} vs {esperado_fecha}")
+    # También con fechas sueltas (no arrays)
+    if cal.dias_habiles_entre(desde[0], hasta[0]) != entre[0]:
+        errores += 1
+    return errores
+
+def comparar(creditos, hoy):
+    estados = motor_creditos.calcular_estado(creditos, hoy=hoy)
+    errores = 0
+    for idx, credito in creditos.iterrows():
+        esperado = resumen_escalar(credito, credito["total_pagado"], hoy)
+        obtenido = motor_creditos.resumen_credito(estados.loc[idx])
+        for campo, valor in esperado.items():
+            if not iguales(valor, obtenido[campo]):
+                errores += 1
+                if errores <= 10:
+                    print(f"  ❌ Crédito {credito['id']} ({hoy}) {campo}: escalar={valor!r} motor={obtenido[campo]!r}")
+    return errores
+
+def dias_atraso_escalar(credito, hoy, atraso):
+    """Días hábiles desde el vencimiento de la cuota impaga más antigua del cronograma (referencia)."""
+    fecha_final = credito["fecha_inicio"] + timedelta(weeks=credito["semanas"])
+    if atraso <= motor_creditos.MARGEN_SALDADO:
+        return 0
+    cronograma = cuotas.calcular_cuotas(credito["fecha_inicio"], credito["semanas"], credito["frecuencia"],
+                                        credito["pago_semanal"], credito["monto_total"])
+    pagados = cuotas._imputar(np.array([monto for _, _, monto in cronograma]), max(credito["total_pagado"], 0))
+    # Sin cuotas impagas (sólo quedan recargos): vence en la fecha final
+    vence = next((fecha for (_, fecha, monto), pagado in zip(cronograma, pagados) if pagado < monto - 1e-6), fecha_final)
+    if vence >= hoy:
+        return 0
+    return int(np.busday_count(vence + timedelta(days=1), hoy + timedelta(days=1), holidays=FERIADOS))
+
+def comparar_atraso(creditos, hoy):
+    """Compara 'dias_atraso' del motor contra el cronograma de cuotas crédito por crédito."""
+    estados = motor_creditos.calcular_estado(creditos, hoy=hoy)
+    errores = 0
+    for idx, credito in creditos.iterrows():
+        esperado = dias_atraso_escalar(credito, hoy, estados.at[idx, "atraso"])
+        obtenido = int(estados.at[idx, "dias_atraso"])
+        if esperado != obtenido:
+            errores += 1
+            if errores <= 10:
+                print(f"  ❌ Crédito {credito['id']} ({hoy}) dias_atraso: cronograma={esperado} motor={obtenido}")
+    return errores
+
+if __name__ == "__main__":
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    reales = motor_creditos.cargar_creditos(db)
+    db.close()
+
+    sinteticos = cartera_sintetica(1000)
+    total_errores = comparar_calendario(5000)
+    print(f"calendario (5000 fechas): {total_errores} diferencias")
+    errores = comparar_calendario(2000, semilla=3, primera=date(1985, 1, 1), dias=(date(2070, 1, 1) - date(1985, 1, 1)).days)
+    print(f"calendario (2000 fechas de 1985 a 2070, también fuera de {calendario.INICIO_CALENDARIO} a {calendario.FIN_CALENDARIO}): {errores} diferencias")
+    total_errores += errores
+    for hoy in [date.today(), date(2023, 6, 17), date(2024, 2, 29), date(2025, 12, 31)]:
+        for nombre, cartera in [("base de datos", reales), ("sintética", sinteticos)]:
+            errores = comparar(cartera, hoy) + comparar_atraso(cartera, hoy)
+            print(f"{nombre} ({len(cartera)} créditos, hoy={hoy}): {errores} diferencias")
+            total_errores += errores
+
+    largos = cartera_plazo_largo()
+    for hoy in [date(2026, 10, 16), date(2070, 1, 2), date(2120, 6, 1)]:
+        errores = comparar(largos, hoy) + comparar_atraso(largos, hoy)
+        print(f"plazo de 5000 semanas ({len(largos)} créditos, hoy={hoy}): {errores} diferencias")
+        total_errores += errores
+
+    if total_errores:
+        sys.exit(1)
+    print("✅ El motor vectorizado y el calendario coinciden con el cálculo escalar.")
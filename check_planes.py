@@ -0,0 +1,64 @@
+"""
+Verifica que el cotizador de planes (app/planes.py) dé exactamente lo mismo que las cuentas
+originales del alta de créditos, plan por plan, y que la cotización vectorizada coincida
+con el cálculo de un solo plan.
+
+Uso: python check_planes.py
+"""
+import random
+import sys
+from app import planes
+
+def plan_original(monto, frecuencia, plazo_label, tasa=0):
+    """Cuentas originales de create_cliente / create_credito_adicional / update_credito (referencia)."""
+    config_plan = planes.PLANES_CONFIG.get(frecuencia, {}).get(plazo_label)
+    if config_plan:
+        factor = config_plan["factor"]
+        monto_total = monto * factor
+        if frecuencia == "Semanal" and "dias" in config_plan:
+            diario = monto_total / config_plan["dias"]
+            pago_periodo = diario * 5
+            plazo_real = monto_total / pago_periodo
+        else:
+            plazo_real = float(plazo_label)
+            pago_periodo = monto_total / plazo_real
+    else:
+        factor = 1 + (tasa / 100)
+        monto_total = monto * factor
+        try:
+            plazo_real = float(plazo_label)
+        except:
+            plazo_real = 1
+        pago_periodo = monto_total / plazo_real
+    return {"factor": factor, "monto_total": monto_total, "semanas": plazo_real, "pago_periodo": pago_periodo}
+
+if __name__ == "__main__":
+    rnd = random.Random(1)
+    montos = [rnd.choice([rnd.uniform(1, 2_000_000), round(rnd.uniform(1000, 500000), -3)]) for _ in range(300)]
+    errores = 0
+
+    # Plan por plan, y también plazos fuera de la tabla (tasa manual)
+    for monto in montos:
+        for frecuencia, plazos in planes.PLANES_CONFIG.items():
+            for plazo in list(plazos) + ["9", "abc"]:
+                esperado = plan_original(monto, frecuencia, plazo, tasa=35)
+                obtenido = planes.calcular_plan(monto, frecuencia, plazo, tasa=35)
+                if esperado != obtenido:
+                    errores += 1
+                    if errores <= 10:
+                        print(f"  ❌ {monto} {frecuencia} {plazo}: original={esperado} cotizador={obtenido}")
+
+    # Cotización vectorizada contra el cálculo de un solo plan
+    for cotizacion in planes.cotizar(montos):
+        for plan in cotizacion["planes"]:
+            esperado = plan_original(cotizacion["monto"], cotizacion["frecuencia"], plan["plazo"])
+            obtenido = {"factor": plan["factor"], "monto_total": plan["total"], "semanas": plan["semanas"], "pago_periodo": plan["cuota"]}
+            if esperado != obtenido:
+                errores += 1
+                if errores <= 10:
+                    print(f"  ❌ cotizar {cotizacion['monto']} {cotizacion['frecuencia']} {plan['plazo']}: {esperado} vs {obtenido}")
+
+    print(f"{len(montos)} montos: {errores} diferencias")
+    if errores:
+        sys.exit(1)
+    print("✅ El cotizador coincide con las cuentas originales de los planes.")
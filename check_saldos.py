@@ -0,0 +1,36 @@
+"""
+Verifica que los saldos guardados en cada crédito (total_pagado, saldo, cantidad_pagos,
+ultimo_pago_fecha) coincidan con la suma real de sus pagos.
+
+Uso: python check_saldos.py            (sólo informa)
+     python check_saldos.py --reparar  (recalcula todos los saldos desde los pagos y los reimputa a las cuotas)
+"""
+import sys
+from sqlalchemy.orm import sessionmaker
+from app.database import engine
+from app.models import Base
+from app.saldos import verificar_saldos, reconstruir_saldos
+from app.cuotas import imputar_pagos
+
+if __name__ == "__main__":
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    try:
+        diferencias = verificar_saldos(db)
+        for credito_id, guardado, real in diferencias[:20]:
+            print(f"  ❌ Crédito {credito_id}: guardado={guardado} real={real}")
+        if len(diferencias) > 20:
+            print(f"  ... y {len(diferencias) - 20} más")
+
+        if not diferencias:
+            print("✅ Los saldos de todos los créditos coinciden con sus pagos.")
+        elif "--reparar" in sys.argv:
+            reconstruir_saldos(db)
+            imputar_pagos(db)
+            db.commit()
+            print(f"🔧 {len(diferencias)} créditos con diferencias. Saldos recalculados desde los pagos.")
+        else:
+            print(f"{len(diferencias)} créditos con diferencias. Ejecutar con --reparar para corregirlos.")
+            sys.exit(1)
+    finally:
+        db.close()
@@ -1,102 +1,29 @@
-import pandas as pd
-import re
 from sqlalchemy import create_engine, text
 from sqlalchemy.orm import sessionmaker
 from app.models import Base, Cliente, Credito, Pago
 from app.database import SQLALCHEMY_DATABASE_URL as DATABASE_URL
-
-# Re-use the clean_money function exactly as it is in import_data.py
-def clean_money(val):
-    """Extrae un valor monetario de una cadena sucia, evitando concatenar números de texto."""
-    if pd.isna(val):
-        return 0.0
-    
-    if isinstance(val, (int, float)):
-        return float(val)
-    
-    s = str(val).strip()
-    
-    if '*' in s:
-        parts = s.split('*')
-        try:
-            p1 = clean_money(parts[0])
-            p2 = clean_money(parts[1])
-            if p1 > 0 and p2 > 0:
-                return p1 * p2
-        except:
-            pass
-
-    if '$' in s:
-        s = s.split('$')[1]
-    
-    try:
-        clean_s = s.replace('$', '').replace(' ', '')
-        return float(clean_s)
-    except:
-        pass
-
-    matches = re.findall(r'[\d]+[.,\d]*', s)
-    
-    if not matches:
-        return 0.0
-    
-    candidates = []
-    for m in matches:
-        try:
-            clean_m = m
-            if '.' in m and ',' in m:
-                if m.rfind('.') > m.rfind(','): 
-                    clean_m = m.replace(',', '')
-                else: 
-                    clean_m = m.replace('.', '').replace(',', '.')
-            elif '.' in m:
-                parts = m.split('.')
-                if len(parts) > 1 and len(parts[-1]) == 3:
-                    clean_m = m.replace('.', '')
-                else:
-                    clean_m = m 
-            elif ',' in m:
-                parts = m.split(',')
-                if len(parts) > 1 and len(parts[-1]) == 3:
-                    clean_m = m.replace(',', '')
-                else:
-                    clean_m = m.replace(',', '.')
-            
-            val_float = float(clean_m)
-            candidates.append(val_float)
-        except:
-            continue
-            
-    if not candidates:
-        return 0.0
-        
-    return max(candidates)
+# Mismas reglas que import_data.py (clean_money), leyendo la planilla por streaming
+from app import lector_excel
 
 def check_totals():
     file_path = "datos_clientes.xlsx"
     print(f"📂 Analizando Excel: {file_path}")
     
     try:
-        df = pd.read_excel(file_path)
-        
-        # Identify columns
-        col_pendiente = "Pendiente $$$"
-        col_acumulado = "Acumulado $$$"
-        col_devolver = "Monto Devolver"
-        
         total_pendiente_excel = 0
         total_acumulado_excel = 0
         total_devolver_excel = 0
         
         print("\n--- Sumando Excel (Fila por Fila) ---")
-        for index, row in df.iterrows():
+        for registro in lector_excel.leer(file_path):
+            credito = registro["credito"]
             # Apply same filter as import_data.py
-            if pd.isna(row.get(col_pendiente)):
+            if credito["pendiente"] is None:
                 continue
                 
-            p = clean_money(row.get(col_pendiente, 0))
-            a = clean_money(row.get(col_acumulado, 0))
-            d = clean_money(row.get(col_devolver, 0))
+            p = credito["pendiente"]
+            a = credito["acumulado"]
+            d = credito["monto_devolver"]
             
             total_pendiente_excel += p
             total_acumulado_excel += a
@@ -104,7 +31,7 @@ def check_totals():
             
             # Debug high values to see if any single row is skewing the result
             if p > 5000000: # > 5 million
-                print(f"⚠️ Fila {index} ({row.get('Nombre y Apellido')}) tiene Pendiente ALTO: {p:,.2f}")
+                print(f"⚠️ Fila {registro['fila']} ({registro['cliente']['nombre']}) tiene Pendiente ALTO: {p:,.2f}")
 
         print(f"\n📊 TOTALES EXCEL (Calculados con clean_money):")
         print(f"   Pendiente: ${total_pendiente_excel:,.2f}")
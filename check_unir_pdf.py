@@ -0,0 +1,78 @@
+"""
+Verifica la unión de PDFs de app/unir_pdf.py leyendo el resultado con un lector real (pypdf en
+modo estricto): cantidad y orden de las páginas, y que el texto de cada una llegue intacto,
+también cuando un texto parece una referencia ("7 0 R") y con PDFs de varias páginas. Si está
+instalado pymupdf, también une PDFs guardados con xref comprimida y streams de objetos.
+
+Uso: python check_unir_pdf.py
+"""
+import importlib.util
+import sys
+from io import BytesIO
+from pypdf import PdfReader
+from app import documentos
+from app.unir_pdf import UnionPDF, fragmento
+
+def recibo(pago_id, cliente):
+    salida = BytesIO()
+    documentos.escribir_recibo(salida, {"pago_id": pago_id, "fecha": "01/10/2026", "cliente": cliente, "monto": 1500.0, "credito_id": 7})
+    return salida.getvalue()
+
+def estado_cuenta(credito_id, pagos):
+    salida = BytesIO()
+    documentos.escribir_estado_cuenta(salida, {
+        "cliente": {"nombre": f"Cliente del crédito {credito_id}", "dni": "30111222", "direccion": "Calle 1"},
+        "credito": {
+            "id": credito_id, "fecha_inicio": "01/01/2026", "activo": True, "monto_prestado": 100000.0,
+            "monto_total": 150000.0, "recargos": 0.0, "total_pagado": 1000.0 * pagos, "saldo": 150000.0 - 1000.0 * pagos,
+        },
+        "pagos": [("01/02/2026", 1000.0)] * pagos,
+    })
+    return salida.getvalue()
+
+def comprimido(pdf):
+    """El mismo PDF guardado por pymupdf con xref comprimida y los objetos en streams de objetos."""
+    import pymupdf
+    with pymupdf.open(stream=pdf, filetype="pdf") as documento:
+        return documento.tobytes(garbage=1, use_objstms=1, deflate=True)
+
+def unir(pdfs, por_fragmento=3):
+    """Como lotes_pdf.partes_pdf pero sin el pool: de a 'por_fragmento' PDFs por fragmento."""
+    union = UnionPDF()
+    tandas = [pdfs[i:i + por_fragmento] for i in range(0, len(pdfs), por_fragmento)]
+    return union.inicio() + b"".join(union.agregar(fragmento(tanda)) for tanda in tandas) + union.fin()
+
+def paginas(pdf):
+    return [pagina.extract_text() for pagina in PdfReader(BytesIO(pdf), strict=True).pages]
+
+if __name__ == "__main__":
+    # Nombres que el renumerado por texto de un unidor ingenuo rompería
+    nombres = ["Juan Pérez", "Obj 7 0 R (sic)", "Ana 12 0 R y 3 0 R", "Martínez, José"]
+    pdfs = [recibo(i + 1, nombre) for i, nombre in enumerate(nombres)] + [estado_cuenta(9, 120), recibo(5, "Último")]
+    if importlib.util.find_spec("pymupdf") is not None:
+        pdfs += [comprimido(recibo(6, "Comprimido 4 0 R")), comprimido(estado_cuenta(10, 80))]
+    else:
+        print("⚠️ pymupdf no está instalado: no se prueba la xref comprimida.")
+
+    esperadas = [texto for pdf in pdfs for texto in paginas(pdf)]
+    unido = unir(pdfs)
+    errores = 0
+    try:
+        obtenidas = paginas(unido)
+    except Exception as e:
+        print(f"  ❌ pypdf no pudo leer el PDF unido: {e}")
+        sys.exit(1)
+
+    if len(obtenidas) != len(esperadas):
+        errores += 1
+        print(f"  ❌ {len(obtenidas)} páginas en el PDF unido, se esperaban {len(esperadas)}")
+    for numero, (esperada, obtenida) in enumerate(zip(esperadas, obtenidas), start=1):
+        if esperada != obtenida:
+            errores += 1
+            if errores <= 10:
+                print(f"  ❌ página {numero}: {obtenida[:80]!r} en lugar de {esperada[:80]!r}")
+
+    print(f"{len(pdfs)} PDFs, {len(esperadas)} páginas: {errores} diferencias")
+    if errores:
+        sys.exit(1)
+    print("✅ El PDF unido tiene todas las páginas, en orden y con su texto intacto.")
@@ -3,6 +3,7 @@ from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 from app.models import Base, Cliente, Credito, Pago
 from app.database import SQLALCHEMY_DATABASE_URL as DATABASE_URL
+from app import lector_excel
 import datetime
 import re
 import os
@@ -94,18 +95,18 @@ def parse_plan_details(plan_str, monto_devolver_excel):
 def debug_import():
     file_path = "datos_clientes.xlsx"
     print(f"Leyendo archivo: {file_path}...")
-    df = pd.read_excel(file_path)
-    df.columns = [str(c).strip() for c in df.columns]
-    
-    mask = df.apply(lambda row: row.astype(str).str.contains('Collado', case=False).any(), axis=1)
-    collado_rows = df[mask]
+    # Por streaming: sólo se guardan las filas que mencionan a Collado
+    collado_rows = [
+        (numero, row) for numero, row in lector_excel.filas(file_path)
+        if any('collado' in str(valor).lower() for valor in row.values() if valor is not None)
+    ]
     
     print(f"Found {len(collado_rows)} rows for Collado.")
     
-    for index, row in collado_rows.iterrows():
-        print(f"\n--- Processing Row {index+2} ---")
-        nombre = str(row.get('Nombre y Apellido', '')).strip()
-        dni = str(row.get('D.N.I', '')).strip()
+    for numero, row in collado_rows:
+        print(f"\n--- Processing Row {numero} ---")
+        nombre = str(row.get('Nombre y Apellido') or '').strip()
+        dni = str(row.get('D.N.I') or '').strip()
         pendiente_check = row.get('Pendiente $$$')
         
         print(f"Nombre: {nombre}")
@@ -116,7 +117,7 @@ def debug_import():
             print("Saltando fila - Columna 'Pendiente $$$' vacia.")
             continue
             
-        if not nombre or nombre.lower() == 'nan':
+        if not nombre:
             print("Saltando fila - Nombre vacio.")
             continue
             
@@ -124,7 +125,7 @@ def debug_import():
         
         # Check Plan Parsing
         monto_devolver_excel = clean_money(row.get('Monto Devolver', 0))
-        plan_str = str(row.get('Plan. Pagos', ''))
+        plan_str = str(row.get('Plan. Pagos') or '')
         print(f"Plan String: {plan_str}")
         print(f"Monto Devolver Excel: {monto_devolver_excel}")
         
@@ -1,122 +1,26 @@
 import pandas as pd
-from sqlalchemy import create_engine, text
+from sqlalchemy import create_engine, insert, update, select, text
 from sqlalchemy.orm import sessionmaker
 from app.models import Base, Cliente, Credito, Pago
 from app.database import SQLALCHEMY_DATABASE_URL as DATABASE_URL
+from app.metricas import reconstruir_metricas
+from app.saldos import reconstruir_saldos
+from app.conciliacion import reconciliar_activos
+from app.cuotas import reconstruir_cuotas
+from app.exportacion import reiniciar_incrementales
+from app import lector_excel
+# Interpretación de celdas compartida con el lector de la planilla (y con los scripts de control)
+from app.lector_excel import parse_date, clean_money, is_payment_column, normalizar_cto
+import argparse
 import datetime
+import functools
+import math
 import re
 import os
 
 # Configuración de la Base de Datos
 engine = create_engine(DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-db = SessionLocal()
-
-def parse_date(date_val):
-    """Intenta parsear una fecha de varios formatos."""
-    if pd.isna(date_val) or str(date_val).strip().lower() == 'nat':
-        return None
-    
-    if isinstance(date_val, datetime.datetime):
-        return date_val.date()
-    
-    date_str = str(date_val).strip()
-    
-    # Formatos comunes: DD.MM.YY, DD/MM/YYYY, YYYY-MM-DD
-    formats = [
-        "%d.%m.%y", "%d.%m.%Y", 
-        "%d/%m/%y", "%d/%m/%Y", 
-        "%Y-%m-%d"
-    ]
-    
-    for fmt in formats:
-        try:
-            return datetime.datetime.strptime(date_str, fmt).date()
-        except ValueError:
-            continue
-    
-    return None
-
-def clean_money(val):
-    """Extrae un valor monetario de una cadena sucia, evitando concatenar números de texto."""
-    if pd.isna(val):
-        return 0.0
-    
-    # Si ya es número, devolverlo directamente
-    if isinstance(val, (int, float)):
-        return float(val)
-    
-    s = str(val).strip()
-    
-    # Caso especial: Multiplicación explícita (ej: 110*19200)
-    if '*' in s:
-        parts = s.split('*')
-        try:
-            # Limpiar cada parte individualmente
-            p1 = clean_money(parts[0])
-            p2 = clean_money(parts[1])
-            if p1 > 0 and p2 > 0:
-                return p1 * p2
-        except:
-            pass
-
-    # Si hay signo $, tomar lo que sigue
-    if '$' in s:
-        s = s.split('$')[1]
-    
-    # Intentar conversión directa primero (maneja "540000.0" correctamente)
-    try:
-        # Eliminar espacios y símbolos de moneda comunes antes de intentar
-        clean_s = s.replace('$', '').replace(' ', '')
-        return float(clean_s)
-    except:
-        pass
-
-    # Estrategia: Buscar todas las secuencias numéricas posibles
-    matches = re.findall(r'[\d]+[.,\d]*', s)
-    
-    if not matches:
-        return 0.0
-    
-    candidates = []
-    for m in matches:
-        try:
-            # Heurística para detectar separadores
-            # Si tiene punto y coma, el último es el decimal
-            clean_m = m
-            if '.' in m and ',' in m:
-                if m.rfind('.') > m.rfind(','): # Estilo US: 1,000.00
-                    clean_m = m.replace(',', '')
-                else: # Estilo AR/EU: 1.000,00
-                    clean_m = m.replace('.', '').replace(',', '.')
-            elif '.' in m:
-                # Solo puntos. 
-                # Si el punto está seguido de 3 dígitos exactos, asumimos miles (ej: 100.000)
-                # Si no, asumimos decimal (ej: 540000.0 o 10.5)
-                parts = m.split('.')
-                if len(parts) > 1 and len(parts[-1]) == 3:
-                    clean_m = m.replace('.', '')
-                else:
-                    clean_m = m # Dejar el punto como decimal
-            elif ',' in m:
-                # Solo comas.
-                # Si la coma está seguida de 3 dígitos, asumimos miles (ej: 100,000)
-                # Si no, asumimos decimal (ej: 10,5)
-                parts = m.split(',')
-                if len(parts) > 1 and len(parts[-1]) == 3:
-                    clean_m = m.replace(',', '')
-                else:
-                    clean_m = m.replace(',', '.')
-            
-            val_float = float(clean_m)
-            candidates.append(val_float)
-        except:
-            continue
-            
-    if not candidates:
-        return 0.0
-        
-    return max(candidates)
 
 def extract_phone(domicilio_str):
     """Intenta extraer un número de teléfono del campo domicilio."""
@@ -225,194 +129,365 @@ def parse_plan_details(plan_str, monto_devolver_excel):
 
     return semanas, total, frecuencia
 
-def is_payment_column(col_name):
-    return re.match(r'^\d{1,2}\.\d{1,2}\.\d{2,4}$', str(col_name)) is not None
+def _orden(registro):
+    # Ordenar por nombre y CTO para respetar el orden 1, 2, 3, 4 (las filas sin nombre al final)
+    nombre, cto = registro["cliente"]["nombre"], registro["credito"]["cto"]
+    try:
+        numero = float(cto) if cto is not None else 0.0
+    except ValueError:
+        numero = 0.0
+    return (nombre is None, nombre or "", numero)
 
-def import_excel(file_path):
-    if not os.path.exists(file_path):
-        print(f"❌ Error: No se encontró el archivo '{file_path}'")
-        return
+def _armar_filas(registros):
+    """
+    Clientes, créditos y pagos a insertar a partir de los registros de app/lector_excel.py, con
+    ids provisionales. Los clientes se resuelven contra mapas en memoria por DNI y por nombre en
+    lugar de consultar la base en cada fila. Se guardan sólo estas filas, nunca la grilla de la planilla.
+    """
+    hoy = datetime.date.today()
+    telefono_de = functools.lru_cache(maxsize=lector_excel.MEMORIA)(extract_phone)
+
+    clientes, creditos, pagos = [], [], []
+    por_dni, por_nombre = {}, {}
+
+    for registro in sorted(registros, key=_orden):
+        fila = registro["fila"]
+        nombre = registro["cliente"]["nombre"]
+        dni = registro["cliente"]["dni"]
+        domicilio = registro["cliente"]["domicilio"]
+        datos = registro["credito"]
+
+        # VALIDACIÓN EXTRA: Si 'Pendiente $$$' está vacía, es probable que sea una fila de totales o basura
+        if datos["pendiente"] is None:
+            print(f"⚠️ Saltando fila {fila} ({nombre}) - Columna 'Pendiente $$$' vacía (posible total o basura).")
+            continue
+
+        if not nombre:
+            continue
+
+        if not dni:
+            dni = f"S/D-{fila - 2}" # Generar DNI temporal si falta
+
+        # Buscar o Crear Cliente (mismo criterio de duplicados de DNI con diferente nombre)
+        cliente = por_dni.get(dni)
+        if cliente:
+            nombre_existente = cliente["nombre"].lower()
+            nombre_nuevo = nombre.lower()
+            if nombre_nuevo not in nombre_existente and nombre_existente not in nombre_nuevo:
+                print(f"⚠️ CONFLICTO DNI DETECTADO: DNI {dni} pertenece a '{cliente['nombre']}', pero ahora viene '{nombre}'.")
+                print(f"   -> Generando DNI alternativo para '{nombre}' para permitir importación.")
+                dni = f"{dni}-{fila - 2}" # DNI único para evitar crash
+                cliente = None # Forzar creación de nuevo cliente
+        else:
+            # Si no existe por DNI, buscar por nombre (por si cambió el DNI)
+            cliente = por_nombre.get(nombre)
+
+        telefono = telefono_de(domicilio)
+        if not cliente:
+            if dni in por_dni:
+                # El DNI alternativo coincide con el de otro cliente: la fila no se puede importar
+                print(f"❌ Error general en fila {fila}: el DNI {dni} ya pertenece a '{por_dni[dni]['nombre']}'")
+                continue
+            cliente = {
+                "id": len(clientes) + 1,
+                "nombre": nombre,
+                "dni": dni,
+                # Sin domicilio queda 'nan', como lo guardaron siempre las importaciones anteriores
+                "direccion": domicilio if domicilio is not None else "nan",
+                "telefono": telefono,
+                "fecha_registro": hoy,
+            }
+            clientes.append(cliente)
+            por_dni[dni] = cliente
+            por_nombre.setdefault(nombre, cliente)
+        elif cliente["telefono"] == "Sin registrar" and telefono != "Sin registrar":
+            # Actualizar teléfono si no tenía
+            cliente["telefono"] = telefono
+
+        # Crédito
+        try:
+            monto_prestado = datos["capital"]
+            fecha_inicio = datos["fecha_inicio"] or hoy
+            fecha_final_excel = datos["fecha_final"]
+
+            # Calcular Semanas y Total usando lógica de Días Hábiles
+            semanas, monto_total, frecuencia = parse_plan_details(datos["plan"], datos["monto_devolver"])
+            
+            # Si es "Unico" (1 pago), calcular semanas reales basadas en fechas
+            if frecuencia == "Unico":
+                if fecha_final_excel and fecha_final_excel > fecha_inicio:
+                    dias_totales = (fecha_final_excel - fecha_inicio).days
+                    semanas = dias_totales / 7.0
+                else:
+                    semanas = 4.0 # Default 1 mes si no hay fecha final
+            
+            # Si el total calculado es 0, usar el prestado
+            if monto_total == 0:
+                monto_total = monto_prestado
+
+            # Cuota Semanal Equivalente
+            pago_semanal = monto_total / semanas if semanas > 0 else 0
+
+            credito_id = len(creditos) + 1
+            creditos.append({
+                "id": credito_id,
+                "cliente_id": cliente["id"],
+                "monto_prestado": monto_prestado,
+                "tasa_interes": 0,
+                "monto_total": monto_total,
+                "semanas": semanas,
+                "frecuencia": frecuencia,
+                "pago_semanal": pago_semanal,
+                "fecha_inicio": fecha_inicio,
+                "activo": True,
+                "numero_cto": datos["cto"],
+            })
+            # Pagos: sólo las celdas con monto, en el orden de las columnas de fecha
+            nota = f"Imp. Excel (CTO {datos['cto'] if datos['cto'] is not None else 'nan'})"
+            pagos.extend(
+                {"credito_id": credito_id, "monto": monto, "fecha": fecha, "nota": nota}
+                for fecha, monto in registro["pagos"]
+            )
+        except Exception as e:
+            print(f"⚠️ Error procesando crédito para {nombre}: {e}")
+
+    return clientes, creditos, pagos
+
+def importar_registros(db, registros):
+    """
+    Reemplaza clientes, créditos y pagos por los de la planilla ('registros' de app/lector_excel.py)
+    en una sola transacción: si algo falla, la base queda como estaba.
+    Devuelve (clientes, créditos, pagos) importados.
+    """
+    clientes, creditos, pagos = _armar_filas(registros)
 
-    # --- LIMPIEZA DE BASE DE DATOS ---
-    print("🧹 Limpiando base de datos antigua...")
     try:
+        print("🧹 Limpiando base de datos antigua...")
         db.query(Pago).delete()
         db.query(Credito).delete()
         db.query(Cliente).delete()
+        # Los ids cambian: la próxima exportación incremental de cada tabla tiene que ser completa
+        reiniciar_incrementales(db)
+
+        # Inserciones masivas (executemany), con los ids ya asignados
+        for modelo, filas in ((Cliente, clientes), (Credito, creditos), (Pago, pagos)):
+            if filas:
+                db.execute(insert(modelo), filas)
+
+        # Recalcular saldos, estado activo y cuotas de cada crédito y métricas del dashboard tras la carga masiva
+        reconstruir_saldos(db)
+        reconciliar_activos(db)
+        reconstruir_cuotas(db)
+        reconstruir_metricas(db)
         db.commit()
-        print("✅ Base de datos vaciada correctamente.")
-    except Exception as e:
-        print(f"⚠️ Error limpiando BD: {e}")
+    except Exception:
         db.rollback()
+        raise
+    return len(clientes), len(creditos), len(pagos)
 
-    print(f"📂 Leyendo archivo: {file_path}...")
-    try:
-        df = pd.read_excel(file_path)
-    except Exception as e:
-        print(f"❌ Error al leer Excel: {e}")
-        return
+# Lo que manda la planilla en cada cliente y crédito ya importado: si cambió, se actualiza
+CAMPOS_CLIENTE = ("nombre", "direccion", "telefono")
+CAMPOS_CREDITO = ("monto_prestado", "monto_total", "semanas", "frecuencia", "pago_semanal", "fecha_inicio")
+# Créditos por sentencia al recalcular saldos y cuotas de los tocados (límite de parámetros de SQLite)
+TANDA_RECALCULO = 1000
 
-    df.columns = [str(c).strip() for c in df.columns]
-    
-    count_clientes = 0
-    count_creditos = 0
-    count_pagos = 0
+def _distinto(actual, nuevo):
+    if isinstance(nuevo, float) and isinstance(actual, (int, float)):
+        return not math.isclose(actual, nuevo, rel_tol=1e-9, abs_tol=1e-6)
+    return actual != nuevo
 
-    # Ordenar por CTO si existe para respetar el orden 1, 2, 3, 4
-    if 'CTO.' in df.columns:
-        try:
-            df['CTO_Clean'] = pd.to_numeric(df['CTO.'], errors='coerce').fillna(0)
-            df = df.sort_values(by=['Nombre y Apellido', 'CTO_Clean'])
-        except:
-            pass
+def _insertar(db, modelo, filas):
+    """Inserta 'filas' (sin sus ids provisionales) y devuelve los ids que les dio la base, en el mismo orden."""
+    if not filas:
+        return []
+    return db.scalars(
+        insert(modelo).returning(modelo.id, sort_by_parameter_order=True),
+        [{campo: valor for campo, valor in fila.items() if campo != "id"} for fila in filas],
+    ).all()
 
-    for index, row in df.iterrows():
-        try:
-            # 1. Cliente
-            nombre = str(row.get('Nombre y Apellido', '')).strip()
-            dni = str(row.get('D.N.I', '')).strip()
-            domicilio_raw = str(row.get('Domicilio part. y laboral', '')).strip()
-            
-            # VALIDACIÓN EXTRA: Si 'Pendiente $$$' es NaN, es probable que sea una fila de totales o basura
-            pendiente_check = row.get('Pendiente $$$')
-            if pd.isna(pendiente_check):
-                print(f"⚠️ Saltando fila {index+2} ({nombre}) - Columna 'Pendiente $$$' vacía (posible total o basura).")
-                continue
+def _dni_provisorio(dni):
+    """DNI generado al importar una fila sin DNI (S/D-<fila>): sale del número de fila, no identifica al cliente."""
+    return dni is None or dni.startswith("S/D-")
 
-            # Extraer teléfono del domicilio
-            telefono = extract_phone(domicilio_raw)
-            # Limpiar domicilio quitando el teléfono si es posible (opcional, por ahora lo dejamos completo)
-            domicilio = domicilio_raw
+def actualizar_registros(db, registros):
+    """
+    Importación incremental: compara la planilla ('registros' de app/lector_excel.py) con la base
+    y aplica sólo lo que cambió, en una sola transacción. Los clientes se buscan por DNI (y si no,
+    por nombre, como en la importación completa; los que no tienen DNI en la planilla, sólo por
+    nombre: el provisorio S/D- cambia si se mueven las filas) y los créditos por cliente + CTO
+    (los importados antes de guardar el CTO, por fecha de inicio y montos); un pago es nuevo si
+    su crédito no tiene ninguno en esa fecha. Lo cargado desde la aplicación (créditos sin CTO, notas, fotos,
+    pagos agregados o editados) no se toca, y lo que ya no está en la planilla no se borra.
+    Devuelve el resumen de cambios {concepto: cantidad}.
+    """
+    clientes, creditos, pagos = _armar_filas(registros)
+    resumen = dict.fromkeys((
+        "clientes_nuevos", "clientes_actualizados", "creditos_nuevos", "creditos_actualizados",
+        "pagos_nuevos", "creditos_omitidos",
+    ), 0)
 
-            if not nombre or nombre.lower() == 'nan':
-                continue
-            
-            if not dni or dni.lower() == 'nan':
-                dni = f"S/D-{index}" # Generar DNI temporal si falta
+    # Créditos ya importados por (cliente, CTO): también deciden entre clientes del mismo nombre
+    por_clave = {(c["cliente_id"], c["numero_cto"]): c for c in db.execute(
+        select(Credito.id, Credito.cliente_id, Credito.numero_cto, *(getattr(Credito, campo) for campo in CAMPOS_CREDITO))
+        .where(Credito.numero_cto.is_not(None))
+    ).mappings()}
+    ctos = {}
+    for credito in creditos:
+        ctos.setdefault(credito["cliente_id"], []).append(credito["numero_cto"])
 
-            # Buscar o Crear Cliente
-            # Lógica mejorada para detectar duplicados de DNI con diferente nombre
-            cliente_existente = db.query(Cliente).filter(Cliente.dni == dni).first()
-            
-            if cliente_existente:
-                # Si el DNI existe, verificar si el nombre coincide (fuzzy match simple)
-                # Si los nombres son muy diferentes, es un conflicto de DNI (dos personas con mismo DNI en Excel)
-                nombre_existente = cliente_existente.nombre.lower()
-                nombre_nuevo = nombre.lower()
-                
-                # Verificar si es la misma persona (ej: "Juan Perez" vs "Juan A. Perez")
-                # Si NO es la misma persona, generamos un DNI alternativo para el nuevo
-                if nombre_nuevo not in nombre_existente and nombre_existente not in nombre_nuevo:
-                    print(f"⚠️ CONFLICTO DNI DETECTADO: DNI {dni} pertenece a '{cliente_existente.nombre}', pero ahora viene '{nombre}'.")
-                    print(f"   -> Generando DNI alternativo para '{nombre}' para permitir importación.")
-                    dni = f"{dni}-{index}" # DNI único para evitar crash
-                    cliente = None # Forzar creación de nuevo cliente
-                else:
-                    cliente = cliente_existente
-            else:
-                # Si no existe por DNI, buscar por nombre (por si cambió el DNI)
-                cliente = db.query(Cliente).filter(Cliente.nombre == nombre).first()
-                
-            if not cliente:
-                cliente = Cliente(
-                    nombre=nombre,
-                    dni=dni,
-                    direccion=domicilio,
-                    telefono=telefono,
-                    fecha_registro=datetime.date.today()
-                )
-                db.add(cliente)
-                db.commit()
-                db.refresh(cliente)
-                count_clientes += 1
-            else:
-                # Actualizar teléfono si no tenía
-                if cliente.telefono == "Sin registrar" and telefono != "Sin registrar":
-                    cliente.telefono = telefono
-                    db.commit()
-            
-            # 2. Crédito
-            try:
-                monto_prestado = clean_money(row.get('Capital', 0))
-                monto_devolver_excel = clean_money(row.get('Monto Devolver', 0))
-                fecha_inicio = parse_date(row.get('Fecha Inicio del credito'))
-                if not fecha_inicio:
-                    fecha_inicio = datetime.date.today()
-                
-                # Intentar leer fecha final para cálculos precisos
-                fecha_final_excel = parse_date(row.get('Fecha Final del credito'))
-
-                # Calcular Semanas y Total usando lógica de Días Hábiles
-                plan_str = str(row.get('Plan. Pagos', ''))
-                semanas, monto_total, frecuencia = parse_plan_details(plan_str, monto_devolver_excel)
-                
-                # Si es "Unico" (1 pago), calcular semanas reales basadas en fechas
-                if frecuencia == "Unico":
-                    if fecha_final_excel and fecha_final_excel > fecha_inicio:
-                        dias_totales = (fecha_final_excel - fecha_inicio).days
-                        semanas = dias_totales / 7.0
-                    else:
-                        semanas = 4.0 # Default 1 mes si no hay fecha final
-                
-                # Si el total calculado es 0, usar el prestado
-                if monto_total == 0:
-                    monto_total = monto_prestado
-
-                # Calcular Cuota Semanal Equivalente
-                # El sistema necesita saber cuánto se paga por periodo.
-                # Si la frecuencia es Semanal, la cuota es Total / Semanas
-                if semanas > 0:
-                    pago_semanal = monto_total / semanas
-                else:
-                    pago_semanal = 0
-
-                cto_num = str(row.get('CTO.', ''))
-
-                credito = Credito(
-                    cliente_id=cliente.id,
-                    monto_prestado=monto_prestado,
-                    tasa_interes=0, 
-                    monto_total=monto_total,
-                    semanas=semanas,
-                    frecuencia=frecuencia,
-                    pago_semanal=pago_semanal,
-                    fecha_inicio=fecha_inicio,
-                    activo=True
-                )
-                db.add(credito)
-                db.commit()
-                db.refresh(credito)
-                count_creditos += 1
-
-                # 3. Pagos
-                payment_cols = [c for c in df.columns if is_payment_column(c)]
-                
-                for col_fecha in payment_cols:
-                    raw_val = row.get(col_fecha)
-                    monto_pago = clean_money(raw_val)
-                    
-                    if monto_pago > 0:
-                        fecha_pago = parse_date(col_fecha)
-                        if fecha_pago:
-                            pago = Pago(
-                                credito_id=credito.id,
-                                monto=monto_pago,
-                                fecha=fecha_pago,
-                                nota=f"Imp. Excel (CTO {cto_num})"
-                            )
-                            db.add(pago)
-                            count_pagos += 1
-                
-                db.commit()
-
-            except Exception as e:
-                print(f"⚠️ Error procesando crédito para {nombre}: {e}")
-                db.rollback()
+    # Clientes: id provisional de la planilla -> id en la base (los nuevos, después de insertarlos)
+    existentes = db.execute(
+        select(Cliente.id, Cliente.nombre, Cliente.dni, Cliente.direccion, Cliente.telefono).order_by(Cliente.id)
+    ).mappings().all()
+    por_dni = {c["dni"]: c for c in existentes if not _dni_provisorio(c["dni"])}
+    dnis = {c["dni"] for c in existentes}
+    por_nombre = {}
+    for c in existentes:
+        por_nombre.setdefault(c["nombre"], []).append(c)
+
+    ids_cliente, nombres = {}, {}
+    clientes_nuevos, cambios_clientes = [], []
+    for cliente in clientes:
+        nombres[cliente["id"]] = cliente["nombre"]
+        candidatos = list(por_nombre.get(cliente["nombre"], ()))
+        if not _dni_provisorio(cliente["dni"]) and cliente["dni"] in por_dni:
+            candidatos.insert(0, por_dni[cliente["dni"]])
+        # Entre varios (homónimos, o los DNI alternativos '<dni>-<fila>' de un conflicto, que
+        # también salen de la fila), el que ya tiene alguno de sus créditos; si no, el primero
+        actual = next((
+            c for c in candidatos
+            if any((c["id"], cto) in por_clave for cto in ctos.get(cliente["id"], ()))
+        ), candidatos[0] if candidatos else None)
+        if actual is None:
+            # El provisorio de la fila puede ser el de otro cliente ya importado (de otra fila)
+            dni, otro = cliente["dni"], 1
+            while cliente["dni"] in dnis:
+                cliente["dni"] = f"{dni}-{otro}"
+                otro += 1
+            dnis.add(cliente["dni"])
+            clientes_nuevos.append(cliente)
+            continue
+        ids_cliente[cliente["id"]] = actual["id"]
+        cambios = {campo: cliente[campo] for campo in CAMPOS_CLIENTE if cliente[campo] != actual[campo]}
+        if cambios.get("telefono") == "Sin registrar":
+            del cambios["telefono"]  # No borrar un teléfono cargado en la aplicación
+        if _dni_provisorio(actual["dni"]) and not _dni_provisorio(cliente["dni"]):
+            cambios["dni"] = cliente["dni"]  # Ahora la planilla trae el DNI real
+        if cambios:
+            cambios_clientes.append({"id": actual["id"], **cambios})
+
+    # Créditos: por (cliente, CTO); los de clientes nuevos son todos nuevos
+    sin_cto = {}
+    for c in db.execute(
+        select(Credito.id, Credito.cliente_id, *(getattr(Credito, campo) for campo in CAMPOS_CREDITO))
+        .where(Credito.numero_cto.is_(None)).order_by(Credito.id)
+    ).mappings():
+        sin_cto.setdefault((c["cliente_id"], c["fecha_inicio"], c["monto_prestado"], c["monto_total"]), []).append(c)
+
+    ids_credito, vistos = {}, set()
+    creditos_nuevos, cambios_creditos = [], []
+    for credito in creditos:
+        clave = (ids_cliente.get(credito["cliente_id"], ("nuevo", credito["cliente_id"])), credito["numero_cto"])
+        if credito["numero_cto"] is None or clave in vistos:
+            motivo = "sin CTO" if credito["numero_cto"] is None else f"CTO {credito['numero_cto']} repetido"
+            print(f"⚠️ Crédito de '{nombres[credito['cliente_id']]}' {motivo}: no se puede identificar, se omite.")
+            resumen["creditos_omitidos"] += 1
+            continue
+        vistos.add(clave)
+        actual = por_clave.get(clave)
+        cambios = {}
+        if actual is None:
+            # Importado antes de guardar el CTO (ver migrate_numero_cto.py): mismo cliente, fecha y montos
+            iguales = sin_cto.get((clave[0], credito["fecha_inicio"], credito["monto_prestado"], credito["monto_total"]))
+            if not iguales:
+                creditos_nuevos.append(credito)
                 continue
+            actual = iguales.pop(0)
+            cambios["numero_cto"] = credito["numero_cto"]
+        ids_credito[credito["id"]] = actual["id"]
+        cambios.update({campo: credito[campo] for campo in CAMPOS_CREDITO if _distinto(actual[campo], credito[campo])})
+        if cambios:
+            cambios_creditos.append({"id": actual["id"], **cambios})
 
-        except Exception as e:
-            print(f"❌ Error general en fila {index+2}: {e}")
-            db.rollback()
+    # Pagos: de los créditos ya importados, sólo los de una fecha que todavía no tienen
+    con_pago = {(credito_id, fecha) for credito_id, fecha in db.execute(select(Pago.credito_id, Pago.fecha))}
+    nuevos_ids = {credito["id"] for credito in creditos_nuevos}
+    pagos_nuevos = [
+        pago for pago in pagos
+        if pago["credito_id"] in nuevos_ids
+        or (pago["credito_id"] in ids_credito and (ids_credito[pago["credito_id"]], pago["fecha"]) not in con_pago)
+    ]
+
+    try:
+        ids_cliente.update(zip((c["id"] for c in clientes_nuevos), _insertar(db, Cliente, clientes_nuevos)))
+        for credito in creditos_nuevos:
+            credito["cliente_id"] = ids_cliente[credito["cliente_id"]]
+        ids_credito.update(zip((c["id"] for c in creditos_nuevos), _insertar(db, Credito, creditos_nuevos)))
+        for pago in pagos_nuevos:
+            pago["credito_id"] = ids_credito[pago["credito_id"]]
+        if pagos_nuevos:
+            db.execute(insert(Pago), pagos_nuevos)
+
+        # Actualizaciones masivas por clave primaria
+        for modelo, cambios in ((Cliente, cambios_clientes), (Credito, cambios_creditos)):
+            if cambios:
+                db.execute(update(modelo), cambios)
+
+        # Saldos, cuotas y estado sólo de los créditos tocados; las métricas se recalculan enteras (son unas sumas)
+        tocados = sorted(
+            {ids_credito[c["id"]] for c in creditos_nuevos}
+            | {c["id"] for c in cambios_creditos}
+            | {p["credito_id"] for p in pagos_nuevos}
+        )
+        for inicio in range(0, len(tocados), TANDA_RECALCULO):
+            tanda = tocados[inicio:inicio + TANDA_RECALCULO]
+            reconstruir_saldos(db, tanda)
+            reconstruir_cuotas(db, tanda)
+        reconciliar_activos(db)
+        reconstruir_metricas(db)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+    resumen.update(
+        clientes_nuevos=len(clientes_nuevos), clientes_actualizados=len(cambios_clientes),
+        creditos_nuevos=len(creditos_nuevos), creditos_actualizados=len(cambios_creditos),
+        pagos_nuevos=len(pagos_nuevos),
+    )
+    return resumen
+
+def import_excel(file_path, sesion=SessionLocal, actualizar=False):
+    if not os.path.exists(file_path):
+        print(f"❌ Error: No se encontró el archivo '{file_path}'")
+        return
+
+    print(f"📂 Leyendo archivo: {file_path}...")
+    try:
+        # Por streaming: de cada fila queda sólo su registro (cliente, crédito y pagos con monto)
+        registros = list(lector_excel.leer(file_path))
+    except Exception as e:
+        print(f"❌ Error al leer Excel: {e}")
+        return
+
+    db = sesion()
+    try:
+        if actualizar:
+            resumen = actualizar_registros(db, registros)
+        else:
+            count_clientes, count_creditos, count_pagos = importar_registros(db, registros)
+    except Exception as e:
+        print(f"❌ Error en la importación (la base no se modificó): {e}")
+        return
+    finally:
+        db.close()
+
+    if actualizar:
+        print("\n✅ Actualización Finalizada (sólo cambios)")
+        print(f"👥 Clientes: {resumen['clientes_nuevos']} nuevos, {resumen['clientes_actualizados']} actualizados")
+        print(f"💰 Créditos: {resumen['creditos_nuevos']} nuevos, {resumen['creditos_actualizados']} actualizados, {resumen['creditos_omitidos']} omitidos")
+        print(f"💵 Pagos nuevos: {resumen['pagos_nuevos']}")
+        return
 
     print("\n✅ Importación Finalizada (Lógica Días Hábiles Aplicada)")
     print(f"👥 Clientes: {count_clientes}")
@@ -420,14 +495,22 @@ def import_excel(file_path):
     print(f"💵 Pagos: {count_pagos}")
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Importa la planilla de clientes y créditos.")
+    parser.add_argument("--actualizar", action="store_true",
+                        help="aplicar sólo los cambios (clientes por DNI, créditos por CTO) sin borrar la base")
+    args = parser.parse_args()
+
     EXCEL_FILE = "datos_clientes.xlsx" 
     print("="*50)
     print("🚀 INICIANDO MIGRACIÓN DE DATOS v2")
     print("   - Lógica: 1 Semana = 5 Días Hábiles")
-    print("   - Limpieza automática de BD previa")
+    if args.actualizar:
+        print("   - Actualización incremental: sólo altas, cambios y pagos nuevos (una sola transacción)")
+    else:
+        print("   - Limpieza automática de BD previa (todo en una sola transacción)")
     print("="*50)
     
     if not os.path.exists(EXCEL_FILE):
         print(f"⚠️  No se encontró '{EXCEL_FILE}'")
     else:
-        import_excel(EXCEL_FILE)
+        import_excel(EXCEL_FILE, actualizar=args.actualizar)
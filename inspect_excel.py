@@ -1,19 +1,18 @@
-import pandas as pd
-import re
+from app import lector_excel
 
 file_path = "datos_clientes.xlsx"
 try:
-    df = pd.read_excel(file_path)
-    print("Columns:", df.columns.tolist())
+    # Por streaming, sin cargar la planilla entera (ver app/lector_excel.py)
+    print("Columns:", lector_excel.columnas(file_path))
     
     # Check for valid clients with NaN Pendiente
     print("\n--- Clients with NaN Pendiente ---")
     count = 0
-    for index, row in df.iterrows():
-        nombre = str(row['Nombre y Apellido']).strip()
-        pendiente = row['Pendiente $$$']
-        if nombre and nombre.lower() != 'nan' and pd.isna(pendiente):
-            print(f"Row {index}: {nombre} (Devolver: {row['Monto Devolver']})")
+    for numero, row in lector_excel.filas(file_path):
+        nombre = str(row.get('Nombre y Apellido') or '').strip()
+        pendiente = row.get('Pendiente $$$')
+        if nombre and pendiente is None:
+            print(f"Row {numero}: {nombre} (Devolver: {row.get('Monto Devolver')})")
             count += 1
             if count > 10:
                 print("... and more")
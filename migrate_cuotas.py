@@ -0,0 +1,23 @@
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app.database import SQLALCHEMY_DATABASE_URL
+from app.models import Cuota
+from app.cuotas import reconstruir_cuotas
+
+# Requiere los saldos de migrate_saldos.py (total_pagado) para imputar lo ya pagado
+def migrate():
+    engine = create_engine(SQLALCHEMY_DATABASE_URL)
+    # Crea la tabla 'cuotas' con su índice (fecha_vencimiento, credito_id) si no existe
+    Cuota.__table__.create(bind=engine, checkfirst=True)
+    print("Tabla 'cuotas' lista.")
+
+    db = sessionmaker(bind=engine)()
+    try:
+        cantidad = reconstruir_cuotas(db)
+        db.commit()
+        print(f"Cronograma generado para los créditos existentes: {cantidad} cuotas.")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    migrate()
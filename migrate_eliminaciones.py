@@ -0,0 +1,14 @@
+from sqlalchemy import create_engine
+from app.database import SQLALCHEMY_DATABASE_URL
+from app.models import Eliminacion
+from app.exportacion import asegurar_registro_eliminaciones, TABLAS_ELIMINACIONES
+
+def migrate():
+    engine = create_engine(SQLALCHEMY_DATABASE_URL)
+    # Bajas de clientes, créditos y pagos para las exportaciones incrementales (las anteriores no se conocen)
+    Eliminacion.__table__.create(bind=engine, checkfirst=True)
+    asegurar_registro_eliminaciones(engine)
+    print(f"Tabla 'eliminaciones' lista; se registran las bajas de: {', '.join(TABLAS_ELIMINACIONES)}.")
+
+if __name__ == "__main__":
+    migrate()
@@ -0,0 +1,29 @@
+from sqlalchemy import create_engine, text
+from app.database import SQLALCHEMY_DATABASE_URL
+
+INDICES = [
+    # Paginación por cursor (nombre, id) de los listados de clientes; sin nombre cuenta como ''
+    # (misma expresión que consultas.NOMBRE_ORDEN). Reemplaza al índice sobre (nombre, id).
+    "CREATE INDEX IF NOT EXISTS ix_clientes_nombre_orden_id ON clientes (coalesce(nombre, ''), id)",
+    "DROP INDEX IF EXISTS ix_clientes_nombre_id",
+    # Estado del cliente (EXISTS sobre sus créditos) sin recorrer toda la tabla de créditos
+    "CREATE INDEX IF NOT EXISTS ix_creditos_cliente_id ON creditos (cliente_id)",
+    # Total pagado por crédito (suma de sus pagos) sin recorrer toda la tabla de pagos
+    "CREATE INDEX IF NOT EXISTS ix_pagos_credito_id ON pagos (credito_id)",
+    # Cuotas vencidas e impagas para la hoja de cobranza (índice parcial; requiere migrate_cuotas.py)
+    "CREATE INDEX IF NOT EXISTS ix_cuotas_impagas ON cuotas (fecha_vencimiento, credito_id) WHERE monto_pagado < monto",
+]
+
+def migrate():
+    engine = create_engine(SQLALCHEMY_DATABASE_URL)
+    with engine.connect() as conn:
+        for sql in INDICES:
+            try:
+                conn.execute(text(sql))
+                print(f"OK: {sql}")
+            except Exception as e:
+                print(f"Error: {e}")
+        conn.commit()
+
+if __name__ == "__main__":
+    migrate()
@@ -0,0 +1,41 @@
+from datetime import datetime
+from sqlalchemy import create_engine, text
+from app.database import SQLALCHEMY_DATABASE_URL
+from app.models import MarcaExportacion
+
+# Tabla -> su columna de fecha, con la que se completa 'creado_en' de las filas existentes
+TABLAS = {
+    "clientes": "fecha_registro",
+    "creditos": "fecha_inicio",
+    "pagos": "fecha",
+    "notas": "fecha",
+}
+
+def migrate():
+    engine = create_engine(SQLALCHEMY_DATABASE_URL)
+    # Mismo formato con el que SQLAlchemy guarda DateTime en SQLite
+    ahora = datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")
+    with engine.connect() as conn:
+        for tabla, fecha in TABLAS.items():
+            for columna in ("creado_en", "actualizado_en"):
+                try:
+                    conn.execute(text(f"ALTER TABLE {tabla} ADD COLUMN {columna} DATETIME"))
+                    print(f"Columna '{columna}' agregada a '{tabla}'.")
+                except Exception as e:
+                    print(f"Error (puede que ya exista): {e}")
+
+            # Filas existentes: creadas en su propia fecha (o ahora si no tienen) y sin cambios desde entonces
+            conn.execute(text(
+                f"UPDATE {tabla} SET creado_en = COALESCE({fecha} || ' 00:00:00.000000', :ahora) WHERE creado_en IS NULL"
+            ), {"ahora": ahora})
+            conn.execute(text(f"UPDATE {tabla} SET actualizado_en = creado_en WHERE actualizado_en IS NULL"))
+            # Filas cambiadas desde una fecha, para las exportaciones incrementales
+            conn.execute(text(f"CREATE INDEX IF NOT EXISTS ix_{tabla}_actualizado_en ON {tabla} (actualizado_en)"))
+        conn.commit()
+
+    # Marcas de agua de las exportaciones incrementales
+    MarcaExportacion.__table__.create(bind=engine, checkfirst=True)
+    print("Marcas de tiempo completadas y tabla 'marcas_exportacion' lista.")
+
+if __name__ == "__main__":
+    migrate()
@@ -0,0 +1,41 @@
+import re
+from sqlalchemy import create_engine, text
+from app.database import SQLALCHEMY_DATABASE_URL
+from app.lector_excel import normalizar_cto
+
+# Nota que la importación deja en los pagos de cada crédito: "Imp. Excel (CTO 2762.0)"
+NOTA_IMPORTACION = re.compile(r"^Imp\. Excel \(CTO (.*)\)$")
+
+def migrate():
+    engine = create_engine(SQLALCHEMY_DATABASE_URL)
+    with engine.connect() as conn:
+        try:
+            conn.execute(text("ALTER TABLE creditos ADD COLUMN numero_cto VARCHAR"))
+            print("Columna 'numero_cto' agregada a 'creditos'.")
+        except Exception as e:
+            print(f"Error (puede que ya exista): {e}")
+
+        # Créditos ya importados: el CTO sale de la nota de sus pagos importados
+        filas = conn.execute(text(
+            "SELECT p.credito_id, MIN(p.nota) FROM pagos p JOIN creditos c ON c.id = p.credito_id "
+            "WHERE c.numero_cto IS NULL AND p.nota LIKE 'Imp. Excel (CTO %' GROUP BY p.credito_id"
+        )).all()
+        valores = []
+        for credito_id, nota in filas:
+            coincidencia = NOTA_IMPORTACION.match(nota)
+            numero = normalizar_cto(coincidencia.group(1)) if coincidencia else None
+            if numero is not None:
+                valores.append({"id": credito_id, "numero_cto": numero})
+        if valores:
+            conn.execute(text("UPDATE creditos SET numero_cto = :numero_cto WHERE id = :id"), valores)
+        conn.commit()
+
+        sin_cto = conn.execute(text("SELECT COUNT(*) FROM creditos WHERE numero_cto IS NULL")).scalar()
+    print(f"CTO completado en {len(valores)} créditos importados.")
+    if sin_cto:
+        # Los cargados desde la aplicación no tienen CTO; los importados sin ningún pago, tampoco:
+        # la importación incremental los reconoce por cliente, fecha de inicio y montos y les guarda el CTO
+        print(f"{sin_cto} créditos quedan sin CTO (cargados desde la aplicación o importados sin pagos).")
+
+if __name__ == "__main__":
+    migrate()
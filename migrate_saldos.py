@@ -0,0 +1,36 @@
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+from app.database import SQLALCHEMY_DATABASE_URL
+from app.saldos import reconstruir_saldos
+
+COLUMNAS = [
+    "ALTER TABLE creditos ADD COLUMN total_pagado FLOAT DEFAULT 0.0",
+    "ALTER TABLE creditos ADD COLUMN saldo FLOAT",
+    "ALTER TABLE creditos ADD COLUMN ultimo_pago_fecha DATE",
+    "ALTER TABLE creditos ADD COLUMN cantidad_pagos INTEGER DEFAULT 0",
+]
+
+def migrate():
+    engine = create_engine(SQLALCHEMY_DATABASE_URL)
+    with engine.connect() as conn:
+        for sql in COLUMNAS:
+            try:
+                conn.execute(text(sql))
+                print(f"OK: {sql}")
+            except Exception as e:
+                print(f"Error (puede que ya exista): {e}")
+        # Ordenar y filtrar créditos por deuda con el índice
+        conn.execute(text("CREATE INDEX IF NOT EXISTS ix_creditos_saldo ON creditos (saldo)"))
+        conn.commit()
+
+    # Completar los saldos de los créditos existentes desde sus pagos
+    db = sessionmaker(bind=engine)()
+    try:
+        reconstruir_saldos(db)
+        db.commit()
+        print("Saldos de créditos calculados desde los pagos.")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    migrate()
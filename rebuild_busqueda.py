@@ -0,0 +1,18 @@
+from sqlalchemy import text
+from app.database import engine
+from app.models import Base
+from app.busqueda import asegurar_indice_busqueda, reconstruir_indice_busqueda
+
+def rebuild():
+    Base.metadata.create_all(bind=engine)
+    if not asegurar_indice_busqueda(engine):
+        print("❌ Este SQLite no soporta FTS5.")
+        return
+
+    with engine.begin() as conn:
+        reconstruir_indice_busqueda(conn)
+        total = conn.execute(text("SELECT count(*) FROM clientes")).scalar()
+    print(f"✅ Índice de búsqueda reconstruido ({total} clientes).")
+
+if __name__ == "__main__":
+    rebuild()
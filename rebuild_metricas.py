@@ -0,0 +1,22 @@
+from sqlalchemy.orm import sessionmaker
+from app.database import engine
+from app.models import Base
+from app.metricas import reconstruir_metricas
+
+def rebuild():
+    Base.metadata.create_all(bind=engine)
+    SessionLocal = sessionmaker(bind=engine)
+    db = SessionLocal()
+    try:
+        m = reconstruir_metricas(db)
+        db.commit()
+        print("✅ Métricas del dashboard reconstruidas desde cero:")
+        print(f"   Clientes: {m.total_clientes}")
+        print(f"   Prestado: ${m.total_prestado:,.2f}")
+        print(f"   Cobrado: ${m.total_cobrado:,.2f}")
+        print(f"   Por Cobrar: ${(m.total_monto + m.total_recargos - m.total_cobrado):,.2f}")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    rebuild()
@@ -1,4 +1,5 @@
 import uvicorn
+import multiprocessing
 import os
 import sys
 import webbrowser
@@ -8,6 +9,9 @@ def open_browser():
     webbrowser.open("http://127.0.0.1:8000")
 
 if __name__ == "__main__":
+    # Los procesos de los recibos en lote (app/recibos.py) arrancan el ejecutable de nuevo
+    multiprocessing.freeze_support()
+
     # Si se ejecuta como ejecutable compilado por PyInstaller
     if getattr(sys, 'frozen', False):
         # El directorio base es donde se extrae el ejecutable temporalmente